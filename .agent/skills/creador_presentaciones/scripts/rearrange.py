@@ -7,17 +7,45 @@ Uso:
 
 Esto creará output.pptx usando diapositivas de template.pptx en el orden especificado.
 Las diapositivas pueden repetirse (ej: 34 aparece dos veces).
+
+Por defecto se trabaja directamente sobre las partes del paquete zip: las
+diapositivas repetidas comparten media y layouts con la original, solo se
+reescriben presentation.xml, sus relaciones, [Content_Types].xml y las relaciones
+de las diapositivas nuevas, y el resto de partes se copia en streaming.
+Con --python-pptx se usa el método anterior basado en python-pptx.
 """
 
 import argparse
+import os
+import posixpath
+import re
 import shutil
 import sys
+import tempfile
+import zipfile
 from copy import deepcopy
 from pathlib import Path
 
 import six
+from lxml import etree
 from pptx import Presentation
 
+# Espacios de nombres y tipos usados al editar el paquete directamente
+NS = {
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    "ct": "http://schemas.openxmlformats.org/package/2006/content-types",
+}
+RT_SLIDE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+RT_NOTES_SLIDE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide"
+)
+CT_SLIDE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+PRESENTATION_PART = "ppt/presentation.xml"
+PRESENTATION_RELS = "ppt/_rels/presentation.xml.rels"
+CONTENT_TYPES = "[Content_Types].xml"
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -40,6 +68,11 @@ Nota: Los índices de diapositiva son base-0 (primera diapositiva es 0, segunda
     parser.add_argument(
         "sequence", help="Secuencia de índices de diapositiva separados por comas (base-0)"
     )
+    parser.add_argument(
+        "--python-pptx",
+        action="store_true",
+        help="Usar el método anterior (python-pptx) en lugar de editar el paquete zip",
+    )
 
     args = parser.parse_args()
 
@@ -63,7 +96,10 @@ Nota: Los índices de diapositiva son base-0 (primera diapositiva es 0, segunda
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        rearrange_presentation(template_path, output_path, slide_sequence)
+        if args.python_pptx:
+            rearrange_presentation(template_path, output_path, slide_sequence)
+        else:
+            rearrange_package(template_path, output_path, slide_sequence)
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -216,5 +252,207 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
     print(f"La presentación final tiene {len(prs.slides)} diapositivas")
 
 
+def rels_path(partname):
+    """Ruta del archivo .rels de una parte (ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels)."""
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def resolve_target(partname, target):
+    """Resolver el Target relativo de una relación a un nombre de parte del zip."""
+    return posixpath.normpath(posixpath.join(posixpath.dirname(partname), target))
+
+
+def read_rels(zin, partname):
+    """Leer las relaciones de una parte como {rId: (tipo, parte_destino)}."""
+    try:
+        root = etree.fromstring(zin.read(rels_path(partname)))
+    except KeyError:
+        return {}
+    return {
+        rel.get("Id"): (rel.get("Type"), resolve_target(partname, rel.get("Target")))
+        for rel in root.iterfind("rel:Relationship", NS)
+        if rel.get("TargetMode") != "External"
+    }
+
+
+def serialize(root):
+    """Serializar una parte XML con la misma declaración que usa PowerPoint."""
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def duplicate_slide_rels(zin, source_partname):
+    """Relaciones de una diapositiva duplicada: las mismas de la fuente salvo las notas.
+
+    Media, layouts y demás destinos se referencian tal cual (no se copian); la parte
+    de notas tiene una relación inversa con su diapositiva y no puede compartirse.
+    """
+    try:
+        root = etree.fromstring(zin.read(rels_path(source_partname)))
+    except KeyError:
+        return None
+    for rel in root.findall("rel:Relationship", NS):
+        if rel.get("Type") == RT_NOTES_SLIDE:
+            root.remove(rel)
+    return serialize(root)
+
+
+def output_info(info):
+    """ZipInfo nuevo para la salida; reutilizar el de lectura alteraría sus offsets."""
+    out = zipfile.ZipInfo(info.filename, info.date_time)
+    out.compress_type = info.compress_type
+    out.external_attr = info.external_attr
+    return out
+
+
+def rearrange_package(template_path, output_path, slide_sequence):
+    """
+    Igual que rearrange_presentation, pero editando el paquete zip directamente.
+
+    Las diapositivas se reutilizan en su primera aparición; cada repetición es una
+    parte nueva con los mismos bytes de XML y relaciones que apuntan a los mismos
+    media y layouts. Las diapositivas no usadas (y sus notas) se omiten. Como las
+    secciones y presentaciones personalizadas referencian diapositivas concretas,
+    se eliminan si existen.
+
+    Args:
+        template_path: Ruta al archivo PPTX de plantilla
+        output_path: Ruta para el archivo PPTX de salida
+        slide_sequence: Lista de índices de diapositiva (base-0) a incluir
+    """
+    template_path = Path(template_path)
+    output_path = Path(output_path)
+
+    with zipfile.ZipFile(template_path) as zin:
+        presentation = etree.fromstring(zin.read(PRESENTATION_PART))
+        pres_rels = etree.fromstring(zin.read(PRESENTATION_RELS))
+        content_types = etree.fromstring(zin.read(CONTENT_TYPES))
+        rel_targets = read_rels(zin, PRESENTATION_PART)
+
+        sld_id_lst = presentation.find("p:sldIdLst", NS)
+        sld_ids = list(sld_id_lst) if sld_id_lst is not None else []
+        slide_parts = [rel_targets[sld.get(f"{{{NS['r']}}}id")][1] for sld in sld_ids]
+        total_slides = len(slide_parts)
+
+        for idx in slide_sequence:
+            if idx < 0 or idx >= total_slides:
+                raise ValueError(f"Índice de diapositiva {idx} fuera de rango (0-{total_slides - 1})")
+
+        # Contadores para nombres de parte, rIds e ids de diapositiva nuevos
+        next_slide_num = 1 + max(
+            (int(m.group(1)) for name in zin.namelist()
+             if (m := re.fullmatch(r"ppt/slides/slide(\d+)\.xml", name))),
+            default=0,
+        )
+        next_rid = 1 + max(
+            (int(m.group(1)) for rel in pres_rels
+             if (m := re.fullmatch(r"rId(\d+)", rel.get("Id", "")))),
+            default=0,
+        )
+        next_sld_id = 1 + max((int(sld.get("id")) for sld in sld_ids), default=255)
+
+        # Paso 1: construir la nueva lista de diapositivas
+        print(f"Procesando {len(slide_sequence)} diapositivas de la plantilla...")
+        used = set()
+        new_sld_ids = []
+        new_parts = {}  # nombre de parte nueva -> parte fuente
+        for i, template_idx in enumerate(slide_sequence):
+            source_sld = sld_ids[template_idx]
+            if template_idx not in used:
+                used.add(template_idx)
+                new_sld_ids.append(source_sld)
+                print(f"  [{i}] Usando diapositiva original {template_idx}")
+                continue
+
+            partname = f"ppt/slides/slide{next_slide_num}.xml"
+            rid = f"rId{next_rid}"
+            next_slide_num += 1
+            next_rid += 1
+            new_parts[partname] = slide_parts[template_idx]
+
+            rel = etree.SubElement(pres_rels, f"{{{NS['rel']}}}Relationship")
+            rel.set("Id", rid)
+            rel.set("Type", RT_SLIDE)
+            rel.set("Target", posixpath.relpath(partname, "ppt"))
+
+            override = etree.SubElement(content_types, f"{{{NS['ct']}}}Override")
+            override.set("PartName", f"/{partname}")
+            override.set("ContentType", CT_SLIDE)
+
+            sld = deepcopy(source_sld)
+            sld.set("id", str(next_sld_id))
+            sld.set(f"{{{NS['r']}}}id", rid)
+            next_sld_id += 1
+            new_sld_ids.append(sld)
+            print(f"  [{i}] Referenciando diapositiva {template_idx} como {partname}")
+
+        # Paso 2: descartar diapositivas no usadas junto con sus notas
+        dropped = set()
+        unused = [idx for idx in range(total_slides) if idx not in used]
+        print(f"\nEliminando {len(unused)} diapositivas no usadas...")
+        for idx in unused:
+            partname = slide_parts[idx]
+            dropped.update((partname, rels_path(partname)))
+            for rel_type, target in read_rels(zin, partname).values():
+                if rel_type == RT_NOTES_SLIDE:
+                    dropped.update((target, rels_path(target)))
+            rid = sld_ids[idx].get(f"{{{NS['r']}}}id")
+            for rel in pres_rels.findall("rel:Relationship", NS):
+                if rel.get("Id") == rid:
+                    pres_rels.remove(rel)
+
+        for override in content_types.findall("ct:Override", NS):
+            if override.get("PartName").lstrip("/") in dropped:
+                content_types.remove(override)
+
+        # Paso 3: reescribir presentation.xml con la secuencia final
+        print(f"Reordenando {len(new_sld_ids)} diapositivas a secuencia final...")
+        for sld in list(sld_id_lst):
+            sld_id_lst.remove(sld)
+        sld_id_lst.extend(new_sld_ids)
+
+        cust_show_lst = presentation.find("p:custShowLst", NS)
+        if cust_show_lst is not None:
+            presentation.remove(cust_show_lst)
+        for ext in presentation.findall("p:extLst/p:ext", NS):
+            if any(etree.QName(child).localname == "sectionLst" for child in ext):
+                ext.getparent().remove(ext)
+
+        rewritten = {
+            PRESENTATION_PART: serialize(presentation),
+            PRESENTATION_RELS: serialize(pres_rels),
+            CONTENT_TYPES: serialize(content_types),
+        }
+
+        # Paso 4: escribir el paquete en streaming (a un temporal si se sobrescribe la plantilla)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(suffix=".pptx", dir=output_path.parent)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_name, "w", zipfile.ZIP_DEFLATED) as zout:
+                for info in zin.infolist():
+                    if info.filename in dropped:
+                        continue
+                    if info.filename in rewritten:
+                        zout.writestr(output_info(info), rewritten[info.filename])
+                        continue
+                    with zin.open(info) as src, zout.open(output_info(info), "w") as dst:
+                        shutil.copyfileobj(src, dst)
+
+                for partname, source in new_parts.items():
+                    with zin.open(source) as src, zout.open(partname, "w") as dst:
+                        shutil.copyfileobj(src, dst)
+                    slide_rels = duplicate_slide_rels(zin, source)
+                    if slide_rels is not None:
+                        zout.writestr(rels_path(partname), slide_rels)
+            os.replace(tmp_name, output_path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    print(f"\nGuardada presentación reordenada en: {output_path}")
+    print(f"La presentación final tiene {len(new_sld_ids)} diapositivas")
+
+
 if __name__ == "__main__":
     main()
@@ -4,25 +4,36 @@ Aplicar reemplazos de texto a presentación PowerPoint.
 
 Uso:
     python replace.py <input.pptx> <replacements.json> <output.pptx>
+    python replace.py --batch <input.pptx> <directorio_salida> <reemplazos1.json> [reemplazos2.json ...]
 
 El JSON de reemplazos debe tener la estructura producida por inventory.py.
 TODAS las formas de texto identificadas por inventory.py tendrán su texto limpiado
 a menos que se especifique "paragraphs" en los reemplazos para esa forma.
+
+En modo --batch la plantilla se parsea una sola vez y cada JSON se aplica sobre una
+copia del XML de las diapositivas; cada salida se llama <directorio_salida>/<json>.pptx.
 """
 
 import json
+import os
 import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
-from inventory import InventoryData, extract_text_inventory
+from inventory import InventoryData, ShapeData, extract_text_inventory
 from pptx import Presentation
 from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
 from pptx.enum.text import PP_ALIGN
+from pptx.opc.oxml import serialize_part_xml
 from pptx.oxml.xmlchemy import OxmlElement
 from pptx.util import Pt
 
+DEFAULT_WORKERS = os.cpu_count() or 1  # Salidas escritas en paralelo en modo batch
+
 
 def clear_paragraph_bullets(paragraph):
     """Limpiar formato de viñeta de un párrafo."""
@@ -188,6 +199,62 @@ def check_duplicate_keys(pairs):
     return result
 
 
+def load_replacements(json_file: str) -> Dict:
+    """Cargar un JSON de reemplazos rechazando claves duplicadas."""
+    with open(json_file, "r", encoding="utf-8") as f:
+        return json.load(f, object_pairs_hook=check_duplicate_keys)
+
+
+def replace_shape_text(text_frame, replacement_shape_data: Dict) -> bool:
+    """Limpiar un text frame y escribir los párrafos de reemplazo, si los hay."""
+    text_frame.clear()
+
+    if "paragraphs" not in replacement_shape_data:
+        return False
+
+    for i, para_data in enumerate(replacement_shape_data["paragraphs"]):
+        if i == 0:
+            p = text_frame.paragraphs[0]
+        else:
+            p = text_frame.add_paragraph()
+
+        apply_paragraph_properties(p, para_data)
+
+    return True
+
+
+def report_validation_errors(errors: List[str]):
+    """Imprimir formas inválidas del JSON de reemplazo y abortar si existe alguna."""
+    if not errors:
+        return
+
+    print("ERROR: Formas inválidas en JSON de reemplazo:")
+    for error in errors:
+        print(f"  - {error}")
+    print("\nPor favor verifica el inventario y actualiza tu JSON de reemplazo.")
+    raise ValueError(f"Encontrados {len(errors)} error(es) de validación")
+
+
+def report_output_issues(overflow_errors: List[str], warnings: List[str]):
+    """Imprimir problemas de overflow/formato y abortar si existe alguno."""
+    if not (overflow_errors or warnings):
+        return
+
+    print("\nERROR: Problemas detectados en salida de reemplazo:")
+    if overflow_errors:
+        print("\nOverflow de texto empeoró:")
+        for error in overflow_errors:
+            print(f"  - {error}")
+    if warnings:
+        print("\nAdvertencias de formato:")
+        for warning in warnings:
+            print(f"  - {warning}")
+    print("\nPor favor corrige estos problemas antes de guardar.")
+    raise ValueError(
+        f"Encontrados {len(overflow_errors)} error(es) de overflow y {len(warnings)} advertencia(s)"
+    )
+
+
 def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     """Aplicar reemplazos de texto desde JSON a presentación PowerPoint."""
 
@@ -195,16 +262,9 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     inventory = extract_text_inventory(Path(pptx_file), prs)
     original_overflow = detect_frame_overflow(inventory)
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        replacements = json.load(f, object_pairs_hook=check_duplicate_keys)
+    replacements = load_replacements(json_file)
 
-    errors = validate_replacements(inventory, replacements)
-    if errors:
-        print("ERROR: Formas inválidas en JSON de reemplazo:")
-        for error in errors:
-            print(f"  - {error}")
-        print("\nPor favor verifica el inventario y actualiza tu JSON de reemplazo.")
-        raise ValueError(f"Encontrados {len(errors)} error(es) de validación")
+    report_validation_errors(validate_replacements(inventory, replacements))
 
     shapes_processed = 0
     shapes_cleared = 0
@@ -228,23 +288,10 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
                 print(f"Advertencia: {shape_key} no tiene referencia de forma")
                 continue
 
-            text_frame = shape.text_frame
-            text_frame.clear()
-            shapes_cleared += 1
-
             replacement_shape_data = replacements.get(slide_key, {}).get(shape_key, {})
-            if "paragraphs" not in replacement_shape_data:
-                continue
-
-            shapes_replaced += 1
-
-            for i, para_data in enumerate(replacement_shape_data["paragraphs"]):
-                if i == 0:
-                    p = text_frame.paragraphs[0]
-                else:
-                    p = text_frame.add_paragraph()
-
-                apply_paragraph_properties(p, para_data)
+            if replace_shape_text(shape.text_frame, replacement_shape_data):
+                shapes_replaced += 1
+            shapes_cleared += 1
 
     # Verificar problemas después de reemplazos
     import tempfile
@@ -278,20 +325,7 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
                 for warning in shape_data.warnings:
                     warnings.append(f"{slide_key}/{shape_key}: {warning}")
 
-    if overflow_errors or warnings:
-        print("\nERROR: Problemas detectados en salida de reemplazo:")
-        if overflow_errors:
-            print("\nOverflow de texto empeoró:")
-            for error in overflow_errors:
-                print(f"  - {error}")
-        if warnings:
-            print("\nAdvertencias de formato:")
-            for warning in warnings:
-                print(f"  - {warning}")
-        print("\nPor favor corrige estos problemas antes de guardar.")
-        raise ValueError(
-            f"Encontrados {len(overflow_errors)} error(es) de overflow y {len(warnings)} advertencia(s)"
-        )
+    report_output_issues(overflow_errors, warnings)
 
     prs.save(output_file)
 
@@ -302,8 +336,177 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     print(f"  - Formas reemplazadas: {shapes_replaced}")
 
 
+def element_index_path(root, element) -> Tuple[int, ...]:
+    """Ruta de índices de hijos desde root hasta element, válida en cualquier copia de root."""
+    path = []
+    while element is not root:
+        parent = element.getparent()
+        path.append(parent.index(element))
+        element = parent
+    return tuple(reversed(path))
+
+
+def resolve_index_path(root, path: Tuple[int, ...]):
+    """Inverso de element_index_path sobre una copia del árbol."""
+    element = root
+    for idx in path:
+        element = element[idx]
+    return element
+
+
+class ParsedTemplate:
+    """Plantilla parseada una sola vez y reutilizada por todos los trabajos de un batch.
+
+    Guarda las partes crudas del paquete, el inventario de texto con su overflow
+    original y, por cada diapositiva con texto, su XML y la ruta de índices de cada
+    forma para localizarla en una copia del XML sin volver a parsear el paquete.
+    """
+
+    def __init__(self, pptx_file: str):
+        self.pptx_file = pptx_file
+        self.prs = Presentation(pptx_file)
+        self.inventory = extract_text_inventory(Path(pptx_file), self.prs)
+
+        with zipfile.ZipFile(pptx_file) as zf:
+            self.parts = [(info, zf.read(info)) for info in zf.infolist()]
+
+        self.slides = {}
+        for slide_key, shapes_dict in self.inventory.items():
+            slide = self.prs.slides[int(slide_key.split("-")[1])]
+            root = slide.part._element
+            self.slides[slide_key] = {
+                "slide": slide,
+                "root": root,
+                "partname": slide.part.partname.lstrip("/"),
+                "paths": {
+                    shape_key: element_index_path(root, shape_data.shape._element)
+                    for shape_key, shape_data in shapes_dict.items()
+                },
+            }
+
+    def render_job(self, replacements: Dict) -> Tuple[Dict[str, bytes], Dict[str, int]]:
+        """Aplicar un JSON de reemplazos sobre copias del XML de las diapositivas.
+
+        Solo se verifica el overflow de las formas que recibieron párrafos nuevos:
+        el resto queda vacío y no puede desbordar ni generar advertencias.
+
+        Returns:
+            (partes XML reemplazadas por nombre dentro del zip, estadísticas)
+        """
+        report_validation_errors(validate_replacements(self.inventory, replacements))
+
+        stats = {"processed": 0, "cleared": 0, "replaced": 0}
+        overflow_errors = []
+        warnings = []
+        rendered = {}
+
+        for slide_key, slide_info in self.slides.items():
+            clone = deepcopy(slide_info["root"])
+            slide = slide_info["slide"]
+
+            for shape_key, path in slide_info["paths"].items():
+                stats["processed"] += 1
+                original = self.inventory[slide_key][shape_key]
+                # Misma clase de forma que la original (p.ej. placeholders que heredan
+                # geometría del layout), pero apuntando al elemento de la copia
+                shape = type(original.shape)(
+                    resolve_index_path(clone, path), original.shape._parent
+                )
+
+                replacement_shape_data = replacements.get(slide_key, {}).get(shape_key, {})
+                stats["cleared"] += 1
+                if not replace_shape_text(shape.text_frame, replacement_shape_data):
+                    continue
+                stats["replaced"] += 1
+
+                updated = ShapeData(shape, original.left_emu, original.top_emu, slide)
+                before = original.frame_overflow_bottom or 0.0
+                after = updated.frame_overflow_bottom or 0.0
+                if after > before + 0.01:
+                    overflow_errors.append(
+                        f'{slide_key}/{shape_key}: overflow empeoró en {after - before:.2f}" '
+                        f'(era {before:.2f}", ahora {after:.2f}")'
+                    )
+                for warning in updated.warnings:
+                    warnings.append(f"{slide_key}/{shape_key}: {warning}")
+
+            rendered[slide_info["partname"]] = serialize_part_xml(clone)
+
+        report_output_issues(overflow_errors, warnings)
+        return rendered, stats
+
+    def write(self, rendered: Dict[str, bytes], output_file: str):
+        """Escribir el paquete de salida copiando las partes no modificadas tal cual.
+
+        Cada parte usa un ZipInfo nuevo: writestr fija offset, CRC y tamaños en el
+        que recibe, y los de la plantilla se comparten entre escrituras paralelas.
+        """
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
+            for info, data in self.parts:
+                out = zipfile.ZipInfo(info.filename, info.date_time)
+                out.external_attr = info.external_attr
+                zf.writestr(out, rendered.get(info.filename, data), zipfile.ZIP_DEFLATED)
+
+
+def apply_replacements_batch(
+    pptx_file: str, jobs: List[Tuple[str, str]], workers: int = DEFAULT_WORKERS
+) -> List[str]:
+    """Aplicar muchos JSON de reemplazos a una misma plantilla.
+
+    La plantilla y su inventario se procesan una única vez; cada trabajo edita una
+    copia del XML de las diapositivas y las salidas se comprimen en paralelo.
+
+    Args:
+        pptx_file: Ruta a la plantilla PPTX
+        jobs: Lista de pares (json_reemplazos, pptx_salida)
+        workers: Número de salidas escritas simultáneamente
+
+    Returns:
+        Lista de archivos de salida escritos
+    """
+    template = ParsedTemplate(pptx_file)
+    print(f"Plantilla parseada: {len(template.prs.slides)} diapositivas, {len(jobs)} trabajo(s)")
+
+    written = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = []
+        for json_file, output_file in jobs:
+            print(f"\n[{Path(json_file).name}]")
+            try:
+                rendered, stats = template.render_job(load_replacements(json_file))
+            except ValueError as e:
+                print(f"  Omitido: {e}")
+                failed.append(json_file)
+                continue
+            print(
+                f"  Formas procesadas: {stats['processed']}, "
+                f"limpiadas: {stats['cleared']}, reemplazadas: {stats['replaced']}"
+            )
+            futures.append(
+                (output_file, executor.submit(template.write, rendered, output_file))
+            )
+
+        for output_file, future in futures:
+            future.result()
+            written.append(output_file)
+            print(f"Guardada presentación actualizada en: {output_file}")
+
+    if failed:
+        raise ValueError(
+            f"{len(failed)} de {len(jobs)} trabajo(s) fallaron: {', '.join(failed)}"
+        )
+
+    return written
+
+
 def main():
     """Punto de entrada principal para uso en línea de comandos."""
+    if len(sys.argv) >= 5 and sys.argv[1] == "--batch":
+        main_batch(Path(sys.argv[2]), Path(sys.argv[3]), [Path(a) for a in sys.argv[4:]])
+        return
+
     if len(sys.argv) != 4:
         print(__doc__)
         sys.exit(1)
@@ -329,5 +532,27 @@ def main():
         sys.exit(1)
 
 
+def main_batch(input_pptx: Path, output_dir: Path, json_files: List[Path]):
+    """Modo --batch: una salida por JSON de reemplazos sobre la misma plantilla."""
+    if not input_pptx.exists():
+        print(f"Error: Archivo de entrada '{input_pptx}' no encontrado")
+        sys.exit(1)
+
+    missing = [str(j) for j in json_files if not j.exists()]
+    if missing:
+        print(f"Error: Archivos JSON de reemplazos no encontrados: {', '.join(missing)}")
+        sys.exit(1)
+
+    jobs = [(str(j), str(output_dir / f"{j.stem}.pptx")) for j in json_files]
+
+    try:
+        apply_replacements_batch(str(input_pptx), jobs)
+    except Exception as e:
+        print(f"Error aplicando reemplazos: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+"""
+Pruebas del modo --batch de replace.py.
+
+Uso:
+    python -m pytest .agent/skills/creador_presentaciones/scripts/test_replace.py -q
+"""
+
+import io
+import json
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pptx")
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+sys.path.insert(0, str(Path(__file__).parent))
+from inventory import extract_text_inventory  # noqa: E402
+from replace import apply_replacements_batch  # noqa: E402
+
+SLIDES = 40
+TEXT_SLIDES = 4
+JOBS = 16
+WORKERS = 8
+
+
+def build_template(path):
+    """Presentación con una imagen distinta por diapositiva; solo las primeras llevan texto.
+
+    Con pocas formas de texto cada trabajo se renderiza más rápido de lo que tarda
+    en escribirse, así que las escrituras de los workers se solapan.
+    """
+    prs = Presentation()
+    for i in range(SLIDES):
+        if i < TEXT_SLIDES:
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = f"Título {i}"
+            slide.placeholders[1].text = f"Cuerpo {i}"
+        else:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+        # Ruido: partes grandes que tardan en comprimirse, como fotos reales
+        image = io.BytesIO()
+        Image.frombytes("RGB", (256, 256), os.urandom(256 * 256 * 3)).save(image, "PNG")
+        image.seek(0)
+        slide.shapes.add_picture(image, Inches(6), Inches(5), Inches(1), Inches(1))
+    prs.save(path)
+
+
+def test_batch_outputs_are_valid_with_several_workers(tmp_path):
+    template = tmp_path / "plantilla.pptx"
+    build_template(template)
+    inventory = extract_text_inventory(template)
+
+    jobs = []
+    for job in range(JOBS):
+        replacements = {
+            slide_key: {
+                # Textos de distinto largo: cada salida tiene sus propios offsets y CRC
+                shape_key: {"paragraphs": [{"text": f"{job} {slide_key} {shape_key} " + "x" * job}]}
+                for shape_key in shapes
+            }
+            for slide_key, shapes in inventory.items()
+        }
+        json_file = tmp_path / f"trabajo{job}.json"
+        json_file.write_text(json.dumps(replacements), encoding="utf-8")
+        jobs.append((str(json_file), str(tmp_path / "salida" / f"trabajo{job}.pptx")))
+
+    written = apply_replacements_batch(str(template), jobs, workers=WORKERS)
+
+    assert len(written) == JOBS
+    for job, output in enumerate(written):
+        with zipfile.ZipFile(output) as zf:
+            assert zf.testzip() is None
+        prs = Presentation(output)
+        assert len(prs.slides) == SLIDES
+        title = prs.slides[TEXT_SLIDES - 1].shapes.title.text
+        assert title.startswith(f"{job} slide-{TEXT_SLIDES - 1} ")
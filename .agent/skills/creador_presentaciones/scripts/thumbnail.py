@@ -16,14 +16,21 @@ Límites de cuadrícula por número de columnas:
 - 5 cols: máx 30 diapositivas por cuadrícula (5×6) [por defecto]
 - 6 cols: máx 42 diapositivas por cuadrícula (6×7)
 
+La rasterización del PDF se reparte en rangos de páginas entre varios procesos
+pdftoppm en paralelo, y cada cuadrícula se compone fila a fila a partir de
+imágenes decodificadas ya reducidas, de modo que la memoria pico no crece con el
+número de diapositivas.
+
 Uso:
-    python thumbnail.py input.pptx [prefijo_salida] [--cols N] [--outline-placeholders]
+    python thumbnail.py input.pptx [prefijo_salida] [--cols N] [--outline-placeholders] [--workers N]
 """
 
 import argparse
+import os
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from PIL import Image, ImageDraw, ImageFont
@@ -35,6 +42,8 @@ CONVERSION_DPI = 100  # DPI para conversión PDF a imagen
 MAX_COLS = 6  # Número máximo de columnas
 DEFAULT_COLS = 5  # Número de columnas por defecto
 JPEG_QUALITY = 95  # Calidad de compresión JPEG
+DEFAULT_WORKERS = os.cpu_count() or 1  # Procesos pdftoppm simultáneos
+MIN_PAGES_PER_SHARD = 4  # Evita lanzar un proceso por cada página suelta
 
 # Constantes de layout de cuadrícula
 GRID_PADDING = 20  # Espaciado entre miniaturas
@@ -65,6 +74,12 @@ def main():
         action="store_true",
         help="Resaltar placeholders de texto con borde de color",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Procesos pdftoppm en paralelo (por defecto: {DEFAULT_WORKERS})",
+    )
 
     args = parser.parse_args()
 
@@ -98,7 +113,9 @@ def main():
                     print(f"Encontrados placeholders en {len(placeholder_regions)} diapositivas")
 
             # Convertir diapositivas a imágenes
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
+            slide_images = convert_to_images(
+                input_path, Path(temp_dir), CONVERSION_DPI, max(1, args.workers)
+            )
             if not slide_images:
                 print("Error: No se encontraron diapositivas")
                 sys.exit(1)
@@ -171,7 +188,69 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
+def split_page_ranges(num_pages, workers):
+    """Dividir páginas 1..num_pages en rangos contiguos (primera, última) para cada worker."""
+    if num_pages <= 0:
+        return []
+    shards = max(1, min(workers, num_pages // MIN_PAGES_PER_SHARD or 1))
+    size, extra = divmod(num_pages, shards)
+    ranges = []
+    first = 1
+    for shard_idx in range(shards):
+        last = first + size - 1 + (1 if shard_idx < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def rasterize_page_range(pdf_path, output_root, dpi, first_page, last_page):
+    """Rasterizar un rango de páginas del PDF con un proceso pdftoppm independiente."""
+    result = subprocess.run(
+        [
+            "pdftoppm",
+            "-jpeg",
+            "-r",
+            str(dpi),
+            "-f",
+            str(first_page),
+            "-l",
+            str(last_page),
+            str(pdf_path),
+            str(output_root),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Falló la conversión a imágenes (páginas {first_page}-{last_page})"
+        )
+
+
+def page_number(image_path):
+    """Número de página de un archivo generado por pdftoppm (slide-007.jpg -> 7)."""
+    return int(image_path.stem.rsplit("-", 1)[1])
+
+
+def pdf_page_count(pdf_path):
+    """Número real de páginas del PDF: pdfinfo (poppler, como pdftoppm) o pypdf."""
+    try:
+        result = subprocess.run(
+            ["pdfinfo", str(pdf_path)], capture_output=True, text=True
+        )
+        for line in result.stdout.splitlines():
+            if line.startswith("Pages:"):
+                return int(line.split(":", 1)[1])
+    except (OSError, ValueError):
+        pass
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("No se pudo contar las páginas del PDF (falta pdfinfo o pypdf)")
+    return len(PdfReader(str(pdf_path)).pages)
+
+
+def convert_to_images(pptx_path, temp_dir, dpi, workers=DEFAULT_WORKERS):
     """Convertir PowerPoint a imágenes vía PDF, manejando diapositivas ocultas."""
     print("Analizando presentación...")
     prs = Presentation(str(pptx_path))
@@ -208,17 +287,31 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if result.returncode != 0 or not pdf_path.exists():
         raise RuntimeError("Falló la conversión a PDF")
 
-    # Convertir PDF a imágenes
-    print(f"Convirtiendo a imágenes a {dpi} DPI...")
-    result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
-        capture_output=True,
-        text=True,
+    # Convertir PDF a imágenes, repartiendo las páginas que tiene de verdad:
+    # según la versión y opciones de LibreOffice, el PDF omite o no las
+    # diapositivas ocultas
+    num_pages = pdf_page_count(pdf_path)
+    includes_hidden = bool(hidden_slides) and num_pages == total_slides
+    page_ranges = split_page_ranges(num_pages, workers)
+    print(
+        f"Convirtiendo a imágenes a {dpi} DPI "
+        f"({len(page_ranges)} proceso(s) en paralelo)..."
     )
-    if result.returncode != 0:
-        raise RuntimeError("Falló la conversión a imágenes")
+    with ThreadPoolExecutor(max_workers=max(1, len(page_ranges))) as executor:
+        futures = [
+            executor.submit(
+                rasterize_page_range, pdf_path, temp_dir / "slide", dpi, first, last
+            )
+            for first, last in page_ranges
+        ]
+        for future in futures:
+            future.result()
 
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
+    visible_images = sorted(temp_dir.glob("slide-*.jpg"), key=page_number)
+    if includes_hidden:
+        visible_images = [
+            path for path in visible_images if page_number(path) not in hidden_slides
+        ]
 
     # Crear lista completa con placeholders para diapositivas ocultas
     all_images = []
@@ -285,6 +378,119 @@ def create_grids(
     return grid_files
 
 
+def load_thumbnail(img_path, width, height, regions=None, slide_dimensions=None):
+    """Cargar una diapositiva reducida al tamaño de miniatura sin decodificarla completa.
+
+    Para JPEG, ``Image.draft`` aprovecha el escalado DCT del decodificador y
+    ``Image.reduce`` termina de bajar la resolución por factores enteros antes del
+    LANCZOS final, de modo que nunca se mantiene la imagen a resolución completa.
+    """
+    with Image.open(img_path) as img:
+        orig_w, orig_h = img.size
+        img.draft("RGB", (width, height))
+        factor = min(img.size[0] // width, img.size[1] // height) // 2
+        if factor > 1:
+            img = img.reduce(factor)
+        else:
+            img.load()
+        cur_w, cur_h = img.size
+
+        if regions:
+            if img.mode != "RGBA":
+                img = img.convert("RGBA")
+
+            if slide_dimensions:
+                slide_width_inches, slide_height_inches = slide_dimensions
+            else:
+                slide_width_inches = orig_w / CONVERSION_DPI
+                slide_height_inches = orig_h / CONVERSION_DPI
+
+            x_scale = cur_w / slide_width_inches
+            y_scale = cur_h / slide_height_inches
+            # Mantener el grosor relativo que tendría a resolución completa
+            stroke_width = max(
+                1, int(max(5, min(orig_w, orig_h) // 150) * cur_w / orig_w)
+            )
+
+            overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+
+            for region in regions:
+                px_left = int(region["left"] * x_scale)
+                px_top = int(region["top"] * y_scale)
+                px_width = int(region["width"] * x_scale)
+                px_height = int(region["height"] * y_scale)
+
+                overlay_draw.rectangle(
+                    [(px_left, px_top), (px_left + px_width, px_top + px_height)],
+                    outline=(255, 0, 0, 255),
+                    width=stroke_width,
+                )
+
+            img = Image.alpha_composite(img, overlay)
+            img = img.convert("RGB")
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        return img.copy()
+
+
+def create_grid_row(
+    image_paths,
+    cols,
+    width,
+    height,
+    first_slide_num,
+    font,
+    font_size,
+    label_padding,
+    placeholder_regions=None,
+    slide_dimensions=None,
+):
+    """Componer una fila de la cuadrícula (etiquetas + miniaturas) como una franja."""
+    row_h = height + font_size + label_padding * 2
+    grid_w = cols * width + (cols + 1) * GRID_PADDING
+    row = Image.new("RGB", (grid_w, row_h), "white")
+    draw = ImageDraw.Draw(row)
+
+    for col, img_path in enumerate(image_paths):
+        slide_num = first_slide_num + col
+        x = col * width + (col + 1) * GRID_PADDING
+
+        label = f"{slide_num}"
+        bbox = draw.textbbox((0, 0), label, font=font)
+        text_w = bbox[2] - bbox[0]
+        draw.text(
+            (x + (width - text_w) // 2, label_padding),
+            label,
+            fill="black",
+            font=font,
+        )
+
+        y_thumbnail = label_padding + font_size + label_padding
+
+        regions = placeholder_regions.get(slide_num) if placeholder_regions else None
+        img = load_thumbnail(img_path, width, height, regions, slide_dimensions)
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        row.paste(img, (tx, ty))
+        img.close()
+
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
+
+    return row
+
+
 def create_grid(
     image_paths,
     cols,
@@ -293,7 +499,7 @@ def create_grid(
     placeholder_regions=None,
     slide_dimensions=None,
 ):
-    """Crear cuadrícula de miniaturas de imágenes de diapositivas."""
+    """Crear cuadrícula de miniaturas de imágenes de diapositivas, fila a fila."""
     font_size = int(width * FONT_SIZE_RATIO)
     label_padding = int(font_size * LABEL_PADDING_RATIO)
 
@@ -302,88 +508,33 @@ def create_grid(
     height = int(width * aspect)
 
     rows = (len(image_paths) + cols - 1) // cols
+    row_h = height + font_size + label_padding * 2
     grid_w = cols * width + (cols + 1) * GRID_PADDING
-    grid_h = rows * (height + font_size + label_padding * 2) + (rows + 1) * GRID_PADDING
+    grid_h = rows * row_h + (rows + 1) * GRID_PADDING
 
     grid = Image.new("RGB", (grid_w, grid_h), "white")
-    draw = ImageDraw.Draw(grid)
 
     try:
         font = ImageFont.load_default(size=font_size)
     except Exception:
         font = ImageFont.load_default()
 
-    for i, img_path in enumerate(image_paths):
-        row, col = i // cols, i % cols
-        x = col * width + (col + 1) * GRID_PADDING
-        y_base = (
-            row * (height + font_size + label_padding * 2) + (row + 1) * GRID_PADDING
+    for row_idx in range(rows):
+        row_start = row_idx * cols
+        row = create_grid_row(
+            image_paths[row_start : row_start + cols],
+            cols,
+            width,
+            height,
+            start_slide_num + row_start,
+            font,
+            font_size,
+            label_padding,
+            placeholder_regions,
+            slide_dimensions,
         )
-
-        label = f"{start_slide_num + i}"
-        bbox = draw.textbbox((0, 0), label, font=font)
-        text_w = bbox[2] - bbox[0]
-        draw.text(
-            (x + (width - text_w) // 2, y_base + label_padding),
-            label,
-            fill="black",
-            font=font,
-        )
-
-        y_thumbnail = y_base + label_padding + font_size + label_padding
-
-        with Image.open(img_path) as img:
-            orig_w, orig_h = img.size
-
-            if placeholder_regions and (start_slide_num + i) in placeholder_regions:
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-
-                regions = placeholder_regions[start_slide_num + i]
-
-                if slide_dimensions:
-                    slide_width_inches, slide_height_inches = slide_dimensions
-                else:
-                    slide_width_inches = orig_w / CONVERSION_DPI
-                    slide_height_inches = orig_h / CONVERSION_DPI
-
-                x_scale = orig_w / slide_width_inches
-                y_scale = orig_h / slide_height_inches
-
-                overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
-                overlay_draw = ImageDraw.Draw(overlay)
-
-                for region in regions:
-                    px_left = int(region["left"] * x_scale)
-                    px_top = int(region["top"] * y_scale)
-                    px_width = int(region["width"] * x_scale)
-                    px_height = int(region["height"] * y_scale)
-
-                    stroke_width = max(5, min(orig_w, orig_h) // 150)
-                    overlay_draw.rectangle(
-                        [(px_left, px_top), (px_left + px_width, px_top + px_height)],
-                        outline=(255, 0, 0, 255),
-                        width=stroke_width,
-                    )
-
-                img = Image.alpha_composite(img, overlay)
-                img = img.convert("RGB")
-
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
-                )
+        grid.paste(row, (0, row_idx * row_h + (row_idx + 1) * GRID_PADDING))
+        row.close()
 
     return grid
 
@@ -1,14 +1,27 @@
+import argparse
+import asyncio
+import json
+import os
 import time
 import requests
 import statistics
 
 # Configuration
 BASE_URL = "http://localhost:5173"  # Adjust port if necessary (Vite default or 5179)
+FALLBACK_URL = "http://localhost:5179"
 ENDPOINTS = [
     "/",
     "/sequencer" # Simulated path, app is SPA
 ]
 
+# Load mode defaults (30 planners working at the same time)
+LOAD_CONCURRENCY = 30
+LOAD_RAMP_UP_S = 10.0
+LOAD_DURATION_S = 60.0
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qa_baselines.json")
+BASELINE_TOLERANCE = 0.20  # Allowed regression vs baseline before failing
+PERCENTILES = (50, 90, 99)
+
 def check_server_health():
     try:
         response = requests.get(BASE_URL)
@@ -69,5 +82,181 @@ def run_qa():
     else:
         print("PASS: Latency within acceptable limits.")
 
+class LatencyHistogram:
+    """
+    HDR-style latency histogram over integer microseconds.
+    Values are bucketed log-linearly: every power-of-two range above
+    2**(sub_bucket_bits + 1) us is split into 2**sub_bucket_bits linear
+    buckets (smaller values are exact), so the relative error of any reported
+    percentile stays below 2**-sub_bucket_bits whatever the range, and memory
+    depends on the number of distinct buckets, not on the number of samples.
+    """
+
+    def __init__(self, sub_bucket_bits=7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.total = 0
+        self.max_us = 0
+
+    def _bucket(self, value_us):
+        # Keep sub_bucket_bits + 1 significant bits: sub >= 2**sub_bucket_bits,
+        # so a bucket spans at most 2**-sub_bucket_bits of the values in it.
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits - 1)
+        return shift, value_us >> shift
+
+    def record(self, latency_ms):
+        value_us = max(0, int(latency_ms * 1000))
+        key = self._bucket(value_us)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.max_us = max(self.max_us, value_us)
+
+    def percentile(self, pct):
+        """Upper bound (ms) of the bucket holding the pct-th percentile."""
+        if not self.total:
+            return 0.0
+        target = max(1, int(round(pct / 100.0 * self.total)))
+        seen = 0
+        for shift, sub in sorted(self.counts):
+            seen += self.counts[(shift, sub)]
+            if seen >= target:
+                return min(((sub + 1) << shift) - 1, self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self):
+        result = {f"p{pct}": round(self.percentile(pct), 2) for pct in PERCENTILES}
+        result["max"] = round(self.max_us / 1000.0, 2)
+        result["count"] = self.total
+        return result
+
+
+async def _planner_session(client, base_url, start_delay, deadline, histograms, errors):
+    """One simulated planner: waits its ramp-up slot, then cycles the endpoints."""
+    await asyncio.sleep(start_delay)
+    while time.perf_counter() < deadline:
+        for endpoint in ENDPOINTS:
+            if time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.get(base_url + endpoint)
+                latency = (time.perf_counter() - start) * 1000  # ms
+                if response.status_code >= 400:
+                    errors[endpoint] += 1
+                else:
+                    histograms[endpoint].record(latency)
+            except Exception:
+                errors[endpoint] += 1
+
+
+async def run_load(base_url, concurrency=LOAD_CONCURRENCY, ramp_up=LOAD_RAMP_UP_S, duration=LOAD_DURATION_S):
+    """
+    Drives `concurrency` concurrent planners against the app through a single
+    pooled HTTP client. Planners start evenly spread over `ramp_up` seconds and
+    all stop `duration` seconds after the first one. Returns per-endpoint
+    percentiles and throughput.
+    """
+    import httpx  # Only the load mode needs an async client
+
+    histograms = {endpoint: LatencyHistogram() for endpoint in ENDPOINTS}
+    errors = {endpoint: 0 for endpoint in ENDPOINTS}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _planner_session(client, base_url, i * ramp_up / concurrency, deadline, histograms, errors)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in ENDPOINTS:
+        summary = histograms[endpoint].summary()
+        summary["errors"] = errors[endpoint]
+        summary["throughput_rps"] = round(summary["count"] / elapsed, 2) if elapsed else 0.0
+        results[endpoint] = summary
+    return results
+
+
+def load_baselines(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baselines(results, path=BASELINE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def compare_with_baseline(results, baselines, tolerance=BASELINE_TOLERANCE):
+    """Returns a list of regressions (latency up or throughput down by more than tolerance)."""
+    regressions = []
+    for endpoint, current in results.items():
+        baseline = baselines.get(endpoint)
+        if not baseline:
+            continue
+        for key in [f"p{pct}" for pct in PERCENTILES]:
+            if baseline.get(key) and current[key] > baseline[key] * (1 + tolerance):
+                regressions.append(f"{endpoint} {key}: {current[key]:.2f} ms (baseline {baseline[key]:.2f} ms)")
+        if baseline.get("throughput_rps") and current["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint} throughput: {current['throughput_rps']:.2f} req/s "
+                f"(baseline {baseline['throughput_rps']:.2f} req/s)"
+            )
+    return regressions
+
+
+def run_load_qa(concurrency, ramp_up, duration, baseline_path, update_baseline, tolerance):
+    print("--- Starting QA Load Test ---")
+    target_url = BASE_URL if check_server_health() else FALLBACK_URL
+    print(f"Target Server: {target_url}")
+    print(f"Planners: {concurrency} | Ramp-up: {ramp_up:.0f}s | Duration: {duration:.0f}s")
+
+    results = asyncio.run(run_load(target_url, concurrency, ramp_up, duration))
+
+    print(f"\nResults:")
+    print(f"{'Endpoint':<15}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'req/s':>10}{'errors':>8}")
+    for endpoint, r in results.items():
+        print(f"{endpoint:<15}{r['p50']:>10.2f}{r['p90']:>10.2f}{r['p99']:>10.2f}{r['max']:>10.2f}"
+              f"{r['throughput_rps']:>10.2f}{r['errors']:>8}")
+
+    if update_baseline:
+        save_baselines(results, baseline_path)
+        print(f"\nBaseline saved to {baseline_path}")
+        return True
+
+    baselines = load_baselines(baseline_path)
+    if not baselines:
+        print(f"\nNo baseline at {baseline_path}; run with --update-baseline to record one.")
+        return True
+
+    regressions = compare_with_baseline(results, baselines, tolerance)
+    if regressions:
+        print(f"\nFAIL: Regressions beyond {tolerance:.0%} of baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return False
+    print(f"\nPASS: All endpoints within {tolerance:.0%} of baseline.")
+    return True
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="QA performance check for the scheduler app.")
+    parser.add_argument("--load", action="store_true", help="Run the concurrent load test instead of the latency probe")
+    parser.add_argument("--concurrency", type=int, default=LOAD_CONCURRENCY)
+    parser.add_argument("--ramp-up", type=float, default=LOAD_RAMP_UP_S, help="Seconds to start all planners")
+    parser.add_argument("--duration", type=float, default=LOAD_DURATION_S, help="Test length in seconds")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=BASELINE_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.load:
+        ok = run_load_qa(args.concurrency, args.ramp_up, args.duration, args.baseline,
+                         args.update_baseline, args.tolerance)
+        raise SystemExit(0 if ok else 1)
     run_qa()
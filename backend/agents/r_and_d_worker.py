@@ -1,39 +1,158 @@
+import argparse
 import os
+import threading
 import time
 import datetime
+import hashlib
+import json
+from symbol_index import SymbolIndex
 # Note: In a real environment, you would import your LLM client library (e.g., openai, anthropic, gemini)
 # import google.generativeai as genai
 
+MAX_CONTEXT_CHARS = 5000  # Limit size for prompt
+HASH_CHUNK_BYTES = 64 * 1024
+
+FILES_TO_SCAN = [
+    "package.json",
+    "task.md",
+    "src/utils/sequencerWorker.ts", # Core algorithm
+    "src/components/ProductionSequencer.tsx" # Core UI
+]
+
+# Watch mode
+WATCH_DIRS = ["src/utils", "src/components", "backend"]
+WATCH_EXTENSIONS = (".ts", ".tsx", ".py")
+WATCH_DEBOUNCE_S = 2.0  # Quiet period that closes a burst of saves
+
+
+class DebouncedChanges:
+    """
+    Collects file system events and hands them out in debounced batches:
+    wait_batch() blocks (no polling) until events arrive, then until no new
+    event has been seen for `debounce_s`, and returns the set of paths.
+    """
+
+    def __init__(self, project_root, debounce_s=WATCH_DEBOUNCE_S):
+        self.project_root = project_root
+        self.debounce_s = debounce_s
+        self.pending = set()
+        self.last_event = 0.0
+        self.condition = threading.Condition()
+
+    def _relevant(self, path):
+        return path.endswith(WATCH_EXTENSIONS) and "__pycache__" not in path
+
+    def dispatch(self, event):
+        # watchdog handler entry point: receives every event of the observer
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        rel_paths = [
+            os.path.relpath(path, self.project_root).replace(os.sep, "/")
+            for path in paths if path and self._relevant(path)
+        ]
+        if not rel_paths:
+            return
+        with self.condition:
+            self.pending.update(rel_paths)
+            self.last_event = time.monotonic()
+            self.condition.notify()
+
+    def wait_batch(self):
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            while (remaining := self.last_event + self.debounce_s - time.monotonic()) > 0:
+                self.condition.wait(remaining)
+            batch, self.pending = self.pending, set()
+            return batch
+
+
 class InnovationAgent:
     def __init__(self, project_root):
         self.project_root = project_root
         self.last_scan = None
         self.insights_file = os.path.join(project_root, "INSIGHTS_ID.md")
+        # path -> {size, mtime_ns, sha256, excerpt}; persisted between runs
+        self.manifest_file = os.path.join(project_root, ".innovation_scan.json")
+        self.manifest = self._load_manifest()
+        self.changed_files = []
+        # Symbol index over src/ and backend/ (SQLite, incremental per file)
+        self.symbols = SymbolIndex(project_root)
 
     def log(self, message):
         print(f"[{datetime.datetime.now().isoformat()}] [R&D-Agent] {message}")
 
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+
+    def _hash_and_excerpt(self, full_path):
+        """
+        Streams the file once in fixed-size chunks: hashes all of it and keeps only
+        the first MAX_CONTEXT_CHARS characters, so memory stays bounded for any size.
+        """
+        digest = hashlib.sha256()
+        head = b""
+        with open(full_path, 'rb') as f:
+            while chunk := f.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+                # UTF-8 uses at most 4 bytes per character
+                if len(head) < MAX_CONTEXT_CHARS * 4:
+                    head += chunk[:MAX_CONTEXT_CHARS * 4 - len(head)]
+        excerpt = head.decode('utf-8', errors='ignore')[:MAX_CONTEXT_CHARS]
+        return digest.hexdigest(), excerpt
+
     def scan_codebase(self):
         """
         Reads critical files to understand current project state.
+        Only files whose size/mtime differ from the manifest are re-read, and a
+        file only counts as changed if its content hash differs. The list of
+        changed paths is left in self.changed_files.
         """
         self.log("Scanning codebase for changes...")
+        return self._scan_paths(FILES_TO_SCAN)
+
+    def _scan_paths(self, rel_paths):
+        """Refreshes the manifest entries of rel_paths and returns their excerpts."""
         # Dictionary to hold file contents
         code_context = {}
-        
-        files_to_scan = [
-            "package.json",
-            "task.md",
-            "src/utils/sequencerWorker.ts", # Core algorithm
-            "src/components/ProductionSequencer.tsx" # Core UI
-        ]
+        self.changed_files = []
+        manifest_dirty = False
 
-        for rel_path in files_to_scan:
+        for rel_path in rel_paths:
             full_path = os.path.join(self.project_root, rel_path)
-            if os.path.exists(full_path):
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    code_context[rel_path] = f.read()[:5000] # Limit size for prompt
-        
+            try:
+                stat = os.stat(full_path)
+            except FileNotFoundError:
+                if self.manifest.pop(rel_path, None) is not None:
+                    self.changed_files.append(rel_path)
+                    manifest_dirty = True
+                continue
+
+            entry = self.manifest.get(rel_path)
+            if not entry or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                sha256, excerpt = self._hash_and_excerpt(full_path)
+                if not entry or entry["sha256"] != sha256:
+                    self.changed_files.append(rel_path)
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256, "excerpt": excerpt}
+                self.manifest[rel_path] = entry
+                manifest_dirty = True
+
+            code_context[rel_path] = entry["excerpt"]
+
+        if manifest_dirty:
+            self._save_manifest()
+        self.last_scan = datetime.datetime.now()
         return code_context
 
     def best_practices_benchmark(self):
@@ -44,20 +163,38 @@ class InnovationAgent:
         self.log("Benchmarking against industry standards (GenAI, RL, SAP PP/DS)...")
         return "Industry Trend: Hyper-personalization of scheduling interfaces using GenAI."
 
+    def relevant_functions(self, names):
+        """
+        Source of the named symbols (exact names or SQL LIKE patterns) from the
+        index, so prompts can carry whole functions instead of file prefixes.
+        """
+        return {
+            f"{symbol['path']}::{symbol['name']}": self.symbols.source(symbol)
+            for name in names
+            for symbol in self.symbols.find(name=name)
+        }
+
     def generate_insights(self, context, benchmark):
         """
         Simulates LLM analysis to generate roadmap/gap analysis.
         """
         self.log("Generating strategic insights...")
+        outline = "\n".join(
+            f"- `{path}`: " + ", ".join(symbols)
+            for path in self.changed_files if (symbols := self.symbols.outline(path))
+        ) or "- (no indexed changes)"
         
         # Mocking the LLM response for this script execution
         insight_content = f"""# INSIGHTS_ID: Automatic Scan
 **Date:** {datetime.datetime.now().strftime('%Y-%m-%d')}
-**Trigger:** Codebase Change Detected
+**Trigger:** Codebase Change Detected ({', '.join(self.changed_files) or 'manual run'})
 
 ## Detected Context
 Analyzed {len(context)} critical files. Core logic is React + Genetic Algorithm.
 
+## Changed Symbols
+{outline}
+
 ## Strategic Recommendation
 Consider implementing a **Chat Interface** for the sequencer.
 Current market trend: '{benchmark}'
@@ -66,15 +203,27 @@ Current market trend: '{benchmark}'
 """
         return insight_content
 
-    def run_cycle(self):
+    def run_cycle(self, changed_paths=None):
         """
         Main execution loop.
+        With changed_paths (watch mode) only those files are re-read; the rest of
+        the context comes from the in-memory manifest cache.
         """
         self.log("Starting Innovation Cycle...")
         
         # 1. Scan
-        context = self.scan_codebase()
+        if changed_paths is None:
+            context = self.scan_codebase()
+        else:
+            context = {path: self.manifest[path]["excerpt"] for path in FILES_TO_SCAN if path in self.manifest}
+            context.update(self._scan_paths(sorted(changed_paths)))
+        if not self.changed_files and os.path.exists(self.insights_file):
+            self.log("No changes since last scan. Skipping cycle.")
+            return False
         
+        # Keep the symbol index in step with the files that triggered the cycle
+        self.symbols.update(None if changed_paths is None else changed_paths)
+
         # 2. Benchmark
         trends = self.best_practices_benchmark()
         
@@ -86,11 +235,49 @@ Current market trend: '{benchmark}'
             f.write(insights)
             
         self.log(f"Cycle Complete. Insights saved to {self.insights_file}")
+        return True
+
+    def watch(self, debounce_s=WATCH_DEBOUNCE_S):
+        """
+        Event-driven mode: subscribes to file system events (inotify on Linux)
+        for WATCH_DIRS and runs one cycle per debounced burst of saves.
+        Blocks until interrupted; idle CPU is only the observer thread.
+        """
+        from watchdog.observers import Observer  # Only watch mode needs watchdog
+
+        changes = DebouncedChanges(self.project_root, debounce_s)
+        observer = Observer()
+        for rel_dir in WATCH_DIRS:
+            full_dir = os.path.join(self.project_root, rel_dir)
+            if os.path.isdir(full_dir):
+                observer.schedule(changes, full_dir, recursive=True)
+        observer.start()
+
+        # Warm the in-memory cache once so later cycles only read changed files
+        self.scan_codebase()
+        self.log(f"Watching {', '.join(WATCH_DIRS)} (debounce {debounce_s:.1f}s)...")
+        try:
+            while True:
+                self.run_cycle(changes.wait_batch())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.stop()
+            observer.join()
 
 if __name__ == "__main__":
     # Pointing to the current workspace root
     # Adjust this path if running from a different directory
     WORKSPACE_ROOT = r"d:\scheduler-app" 
+
+    parser = argparse.ArgumentParser(description="R&D InnovationAgent worker.")
+    parser.add_argument("--root", default=WORKSPACE_ROOT, help="Project root to scan")
+    parser.add_argument("--watch", action="store_true", help="Run continuously on file system events")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_S, help="Seconds of quiet that close a burst")
+    args = parser.parse_args()
     
-    agent = InnovationAgent(WORKSPACE_ROOT)
-    agent.run_cycle()
+    agent = InnovationAgent(args.root)
+    if args.watch:
+        agent.watch(args.debounce)
+    else:
+        agent.run_cycle()
@@ -0,0 +1,316 @@
+import ast
+import hashlib
+import os
+import re
+import sqlite3
+
+# Persistent symbol index (functions, classes, exports, line ranges, hashes)
+# over the TS/Python sources, stored in SQLite and updated per changed file.
+# Lets the R&D agent pull just the functions it needs instead of raw file prefixes.
+
+INDEX_DIRS = ["src", "backend"]
+INDEX_EXTENSIONS = (".ts", ".tsx", ".py")
+SKIP_DIRS = {"node_modules", "__pycache__", ".venv", "venv", "dist"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    exported INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols(name);
+CREATE INDEX IF NOT EXISTS idx_symbols_path ON symbols(path);
+"""
+
+# Top-level TS declarations, matched on source with comments/strings blanked out
+TS_DECLARATIONS = [
+    ("function", re.compile(r"^(export\s+)?(default\s+)?(async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)", re.M)),
+    ("class", re.compile(r"^(export\s+)?(default\s+)?(abstract\s+)?class\s+([A-Za-z_$][\w$]*)", re.M)),
+    ("interface", re.compile(r"^(export\s+)?()()interface\s+([A-Za-z_$][\w$]*)", re.M)),
+    ("type", re.compile(r"^(export\s+)?()()type\s+([A-Za-z_$][\w$]*)\s*(?:<[^=]*>)?\s*=", re.M)),
+    ("enum", re.compile(r"^(export\s+)?()(const\s+)?enum\s+([A-Za-z_$][\w$]*)", re.M)),
+    ("variable", re.compile(r"^(export\s+)?()()(?:const|let|var)\s+([A-Za-z_$][\w$]*)", re.M)),
+    ("function", re.compile(r"^()()()([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?function\b", re.M)),
+]
+TS_BLOCK_KINDS = {"function", "class", "interface", "enum"}
+TS_INITIALIZER = re.compile(r"(?:=>|[^=])*?=(?![=>])\s*(?:async\s+)?")  # `=>` may appear in the type
+TS_FUNCTION_START = re.compile(r"function\b|[A-Za-z_$][\w$]*\s*=>")
+TS_ARROW_AFTER_PARAMS = re.compile(r"\s*(?::[^=;{]*)?=>")
+
+
+def mask_ts(source):
+    """
+    Single pass tokenizer that blanks comments, string and template literal
+    contents (keeping newlines and `${...}` code) so braces and keywords can be
+    matched with plain regexes and a depth counter.
+    """
+    out = list(source)
+    i, n = 0, len(source)
+    template_depths = []  # brace depth at which each open `${` returns to its template
+    depth = 0
+
+    def blank(start, end):
+        for k in range(start, end):
+            if out[k] != "\n":
+                out[k] = " "
+
+    def skip_template(i):
+        # Returns the index after the template chunk starting at i (inside backticks)
+        start = i
+        while i < n:
+            if source[i] == "\\":
+                i += 2
+                continue
+            if source[i] == "`":
+                blank(start, i)
+                return i + 1, False
+            if source.startswith("${", i):
+                blank(start, i)
+                return i + 2, True
+            i += 1
+        blank(start, n)
+        return n, False
+
+    while i < n:
+        c = source[i]
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            end = n if end == -1 else end
+            blank(i, end)
+            i = end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            blank(i, end)
+            i = end
+        elif c in "'\"":
+            j = i + 1
+            while j < n and source[j] != c and source[j] != "\n":
+                j += 2 if source[j] == "\\" else 1
+            blank(i + 1, min(j, n))
+            i = j + 1
+        elif c == "`":
+            i, opened = skip_template(i + 1)
+            if opened:
+                template_depths.append(depth)
+                depth += 1
+        elif c == "{":
+            depth += 1
+            i += 1
+        elif c == "}":
+            depth -= 1
+            i += 1
+            if template_depths and template_depths[-1] == depth:
+                template_depths.pop()
+                i, opened = skip_template(i)
+                if opened:
+                    template_depths.append(depth)
+                    depth += 1
+        else:
+            i += 1
+    return "".join(out)
+
+
+def _depth_prefix(masked):
+    """Bracket depth before every character of the masked source."""
+    depths = [0] * (len(masked) + 1)
+    depth = 0
+    for i, c in enumerate(masked):
+        depths[i] = depth
+        if c in "({[":
+            depth += 1
+        elif c in ")}]":
+            depth = max(0, depth - 1)
+    depths[len(masked)] = depth
+    return depths
+
+
+def _is_function_initializer(masked, depths, pos, end):
+    """True if the `const x = ...` declaration at pos is initialized with a function or arrow."""
+    m = TS_INITIALIZER.match(masked, pos, end)
+    if not m:
+        return False
+    i = m.end()
+    if TS_FUNCTION_START.match(masked, i, end):
+        return True
+    if i < end and masked[i] == "(":
+        # Skip the parameter list (possibly multi-line) to its matching paren
+        base = depths[i]
+        j = i + 1
+        while j < end and not (masked[j] == ")" and depths[j + 1] == base):
+            j += 1
+        return bool(TS_ARROW_AFTER_PARAMS.match(masked, j + 1, end))
+    return False
+
+
+def parse_ts(source):
+    """Top-level TS/TSX symbols as (name, kind, exported, start_line, end_line)."""
+    masked = mask_ts(source)
+    depths = _depth_prefix(masked)
+
+    starts = []
+    for kind, pattern in TS_DECLARATIONS:
+        for m in pattern.finditer(masked):
+            if depths[m.start()] == 0:
+                starts.append((m.start(), kind, m.group(4), bool(m.group(1))))
+    starts.sort()
+    # Several patterns can hit the same position (e.g. `export const enum`); keep the first
+    unique = []
+    for start in starts:
+        if not unique or unique[-1][0] != start[0]:
+            unique.append(start)
+
+    symbols = []
+    for idx, (pos, kind, name, exported) in enumerate(unique):
+        limit = unique[idx + 1][0] if idx + 1 < len(unique) else len(masked)
+        end = limit
+        entered_block = False
+        for j in range(pos, limit):
+            c = masked[j]
+            if c == ";" and depths[j] == 0:
+                end = j + 1
+                break
+            if c == "{" and depths[j] == 0:
+                entered_block = True
+            if c == "}" and depths[j + 1] == 0 and entered_block and kind in TS_BLOCK_KINDS:
+                end = j + 1
+                break
+        text = masked[pos:end].rstrip()
+        if kind == "variable" and _is_function_initializer(masked, depths, pos, end):
+            kind = "function"
+        start_line = masked.count("\n", 0, pos) + 1
+        end_line = start_line + text.count("\n")
+        symbols.append((name, kind, exported, start_line, end_line))
+    return symbols
+
+
+def parse_python(source):
+    """Top-level Python functions/classes and class methods via the ast module."""
+    symbols = []
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return symbols
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append((node.name, "function", not node.name.startswith("_"), node.lineno, node.end_lineno))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append((node.name, "class", not node.name.startswith("_"), node.lineno, node.end_lineno))
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append((f"{node.name}.{child.name}", "method", not child.name.startswith("_"),
+                                    child.lineno, child.end_lineno))
+    return symbols
+
+
+class SymbolIndex:
+    def __init__(self, project_root, db_path=None):
+        self.project_root = project_root
+        self.db_path = db_path or os.path.join(project_root, ".innovation_symbols.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _source_files(self):
+        for rel_dir in INDEX_DIRS:
+            full_dir = os.path.join(self.project_root, rel_dir)
+            for root, dirs, files in os.walk(full_dir):
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+                for name in files:
+                    if name.endswith(INDEX_EXTENSIONS):
+                        yield os.path.relpath(os.path.join(root, name), self.project_root).replace(os.sep, "/")
+
+    def update(self, rel_paths=None):
+        """
+        Re-indexes files whose size/mtime changed (all indexed dirs if rel_paths
+        is None, else just those paths). Files are re-parsed only if their hash
+        changed. Returns the list of re-indexed or removed paths.
+        """
+        known = {r["path"]: r for r in self.conn.execute("SELECT * FROM files")}
+        if rel_paths is None:
+            rel_paths = set(self._source_files())
+            removed = [path for path in known if path not in rel_paths]
+        else:
+            rel_paths = {p for p in rel_paths if p.endswith(INDEX_EXTENSIONS)}
+            removed = [p for p in rel_paths if p in known and not os.path.exists(os.path.join(self.project_root, p))]
+
+        changed = []
+        with self.conn:
+            for path in removed:
+                self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                changed.append(path)
+
+            for path in sorted(set(rel_paths) - set(removed)):
+                full_path = os.path.join(self.project_root, path)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                row = known.get(path)
+                if row and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                with open(full_path, "rb") as f:
+                    raw = f.read()
+                sha256 = hashlib.sha256(raw).hexdigest()
+                self.conn.execute(
+                    "INSERT INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256",
+                    (path, stat.st_size, stat.st_mtime_ns, sha256),
+                )
+                if row and row["sha256"] == sha256:
+                    continue
+                self._index_file(path, raw.decode("utf-8", errors="ignore"))
+                changed.append(path)
+        return changed
+
+    def _index_file(self, path, source):
+        parser = parse_python if path.endswith(".py") else parse_ts
+        lines = source.splitlines()
+        self.conn.execute("DELETE FROM symbols WHERE path = ?", (path,))
+        self.conn.executemany(
+            "INSERT INTO symbols (path, name, kind, exported, start_line, end_line, sha1) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (path, name, kind, int(exported), start, end,
+                 hashlib.sha1("\n".join(lines[start - 1:end]).encode("utf-8")).hexdigest())
+                for name, kind, exported, start, end in parser(source)
+            ],
+        )
+
+    def find(self, name=None, path=None, kind=None):
+        """Symbols matching all given filters (name accepts SQL LIKE patterns)."""
+        clauses, params = [], []
+        if name is not None:
+            clauses.append("name LIKE ?")
+            params.append(name)
+        if path is not None:
+            clauses.append("path = ?")
+            params.append(path)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return [dict(r) for r in self.conn.execute(f"SELECT * FROM symbols{where} ORDER BY path, start_line", params)]
+
+    def source(self, symbol):
+        """Source text of one symbol (as returned by find)."""
+        with open(os.path.join(self.project_root, symbol["path"]), "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+        return "\n".join(lines[symbol["start_line"] - 1:symbol["end_line"]])
+
+    def outline(self, path):
+        """One line per symbol: `kind name (Lstart-end)`."""
+        return [f"{s['kind']} {s['name']} (L{s['start_line']}-{s['end_line']})" for s in self.find(path=path)]
@@ -0,0 +1,421 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Local stand-in for the Supabase REST API (PostgREST) used by the stores.
+# Loads supabase/migrations/*.sql into SQLite and serves /rest/v1/<table>
+# with the filter syntax the app sends (select, eq, in, order, limit, ...,
+# Prefer: count=exact on GET and HEAD),
+# optionally adding artificial latency so load tests behave like the cloud.
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, "supabase", "migrations")
+DEFAULT_PORT = 54321  # Same port as `supabase start`
+JSON_TYPES = {"JSON", "JSONB"}
+FILTER_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "LIKE",  # SQLite LIKE is already case-insensitive for ASCII
+}
+# Postgres-only statements with no SQLite equivalent (RLS, policies, constraints added later)
+SKIPPED_STATEMENTS = re.compile(
+    r"^\s*(CREATE\s+POLICY|ALTER\s+TABLE\s+\w+\s+(ENABLE|DISABLE)\s+ROW\s+LEVEL|ALTER\s+TABLE\s+\w+\s+ADD\s+CONSTRAINT)",
+    re.IGNORECASE,
+)
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class PostgrestError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def _translate_statement(statement):
+    """Rewrite the Postgres-specific bits of a migration statement for SQLite."""
+    statement = re.sub(r"DEFAULT\s+gen_random_uuid\(\)", "DEFAULT (gen_random_uuid())", statement, flags=re.IGNORECASE)
+    statement = re.sub(r"DEFAULT\s+now\(\)", "DEFAULT (now())", statement, flags=re.IGNORECASE)
+    return statement
+
+
+def split_sql(script):
+    """Split a migration script into complete statements, dropping comments."""
+    statements = []
+    buffer = ""
+    for line in script.splitlines():
+        line = re.sub(r"--.*$", "", line)
+        if not line.strip():
+            continue
+        buffer += line + "\n"
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+class LocalDatabase:
+    """SQLite database built from the Supabase migrations, shared by all request threads."""
+
+    def __init__(self, db_path=":memory:", migrations_dirs=(MIGRATIONS_DIR,)):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+        self.conn.create_function("now", 0, _now)
+        self.lock = threading.Lock()
+        self.columns = {}
+
+        for migrations_dir in migrations_dirs:
+            for path in sorted(glob.glob(os.path.join(migrations_dir, "*.sql"))):
+                self.load_migration(path)
+        self._refresh_schema()
+
+    def load_migration(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            script = f.read()
+        with self.lock:
+            for statement in split_sql(script):
+                if SKIPPED_STATEMENTS.match(statement):
+                    continue
+                self.conn.execute(_translate_statement(statement))
+
+    def _refresh_schema(self):
+        tables = [r["name"] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        self.columns = {
+            table: {r["name"]: (r["type"] or "").upper() for r in self.conn.execute(f'PRAGMA table_info("{table}")')}
+            for table in tables
+        }
+
+    # --- Query building ---
+
+    def _check_table(self, table):
+        if table not in self.columns:
+            raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+
+    def _check_column(self, table, column):
+        if column not in self.columns[table]:
+            raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+
+    def _encode(self, table, column, value):
+        if self.columns[table].get(column) in JSON_TYPES and value is not None:
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    def _decode_row(self, table, row):
+        result = dict(row)
+        for column, value in result.items():
+            if self.columns[table].get(column) in JSON_TYPES and isinstance(value, str):
+                try:
+                    result[column] = json.loads(value)
+                except ValueError:
+                    pass
+        return result
+
+    def _where(self, table, filters):
+        """Translate PostgREST filters (`col=op.value`) into a WHERE clause."""
+        clauses, params = [], []
+        for column, expression in filters:
+            self._check_column(table, column)
+            negate = expression.startswith("not.")
+            if negate:
+                expression = expression[4:]
+            op, _, value = expression.partition(".")
+            if op in FILTER_OPERATORS:
+                if op in ("like", "ilike"):
+                    value = value.replace("*", "%")
+                clause = f'"{column}" {FILTER_OPERATORS[op]} ?'
+                params.append(value)
+            elif op == "in":
+                values = [v.strip().strip('"') for v in value.strip("()").split(",") if v.strip()]
+                clause = f'"{column}" IN ({", ".join("?" * len(values))})'
+                params.extend(values)
+            elif op == "is":
+                literal = {"null": "NULL", "true": "1", "false": "0"}.get(value.lower())
+                if literal is None:
+                    raise PostgrestError(400, "PGRST100", f"invalid is. value: {value}")
+                clause = f'"{column}" IS {literal}'
+            else:
+                raise PostgrestError(400, "PGRST100", f"unsupported operator: {op}")
+            clauses.append(f"NOT ({clause})" if negate else clause)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _select_list(self, table, select):
+        if not select or select.strip() == "*":
+            return "*"
+        columns = [c.strip() for c in select.split(",") if c.strip()]
+        for column in columns:
+            self._check_column(table, column)
+        return ", ".join(f'"{c}"' for c in columns)
+
+    def _order_by(self, table, order):
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            parts = term.strip().split(".")
+            self._check_column(table, parts[0])
+            direction = "DESC" if "desc" in parts[1:] else "ASC"
+            nulls = " NULLS FIRST" if "nullsfirst" in parts[1:] else (" NULLS LAST" if "nullslast" in parts[1:] else "")
+            terms.append(f'"{parts[0]}" {direction}{nulls}')
+        return " ORDER BY " + ", ".join(terms)
+
+    # --- Operations ---
+
+    def select(self, table, select=None, filters=(), order=None, limit=None, offset=None):
+        self._check_table(table)
+        where, params = self._where(table, filters)
+        sql = f'SELECT {self._select_list(table, select)} FROM "{table}"{where}{self._order_by(table, order)}'
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+            if offset is not None:
+                sql += " OFFSET ?"
+                params.append(int(offset))
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._decode_row(table, r) for r in rows]
+
+    def count(self, table, filters=()):
+        """Rows matching `filters`, ignoring limit/offset (Prefer: count=exact)."""
+        self._check_table(table)
+        where, params = self._where(table, filters)
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', params).fetchone()[0]
+
+    def insert(self, table, rows, on_conflict=None, merge=False, ignore=False):
+        self._check_table(table)
+        inserted = []
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for row in rows:
+                    for column in row:
+                        self._check_column(table, column)
+                    columns = list(row)
+                    if columns:
+                        column_list = ", ".join(f'"{c}"' for c in columns)
+                        sql = f'INSERT INTO "{table}" ({column_list}) VALUES ({", ".join("?" * len(columns))})'
+                    else:
+                        sql = f'INSERT INTO "{table}" DEFAULT VALUES'
+                    if merge or ignore:
+                        target = on_conflict or "id"
+                        sql += f' ON CONFLICT ("{target}") '
+                        updates = [c for c in columns if c != target]
+                        if merge and updates:
+                            sql += "DO UPDATE SET " + ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+                        else:
+                            sql += "DO NOTHING"
+                    sql += " RETURNING *"
+                    result = self.conn.execute(sql, [self._encode(table, c, row[c]) for c in columns]).fetchone()
+                    if result is not None:
+                        inserted.append(self._decode_row(table, result))
+                self.conn.execute("COMMIT")
+            except sqlite3.IntegrityError as e:
+                self.conn.execute("ROLLBACK")
+                raise PostgrestError(409, "23505", str(e))
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def update(self, table, values, filters=()):
+        self._check_table(table)
+        for column in values:
+            self._check_column(table, column)
+        if not values:
+            return []
+        where, params = self._where(table, filters)
+        assignments = ", ".join(f'"{c}" = ?' for c in values)
+        sql = f'UPDATE "{table}" SET {assignments}{where} RETURNING *'
+        with self.lock:
+            rows = self.conn.execute(sql, [self._encode(table, c, v) for c, v in values.items()] + params).fetchall()
+        return [self._decode_row(table, r) for r in rows]
+
+    def delete(self, table, filters=()):
+        self._check_table(table)
+        where, params = self._where(table, filters)
+        with self.lock:
+            rows = self.conn.execute(f'DELETE FROM "{table}"{where} RETURNING *', params).fetchall()
+        return [self._decode_row(table, r) for r in rows]
+
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    """Minimal PostgREST-compatible handler for /rest/v1/<table>."""
+
+    server_version = "LocalPostgREST/0.1"
+    database = None
+    latency_ms = 0.0
+    jitter_ms = 0.0
+
+    def log_message(self, format, *args):
+        pass  # Keep load tests quiet
+
+    def _inject_latency(self):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _parse(self):
+        parts = urlsplit(self.path)
+        match = re.fullmatch(r"/rest/v1/([^/]+)/?", parts.path)
+        if not match or not IDENTIFIER.match(unquote(match.group(1))):
+            raise PostgrestError(404, "PGRST125", f"invalid path: {parts.path}")
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        options = {k: v for k, v in query if k in RESERVED_PARAMS}
+        filters = [(k, v) for k, v in query if k not in RESERVED_PARAMS]
+        return unquote(match.group(1)), options, filters
+
+    def _prefer(self):
+        return {p.strip() for p in self.headers.get("Prefer", "").split(",") if p.strip()}
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, status, payload=None, extra_headers=None):
+        body = b"" if payload is None else json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body and self.command != "HEAD":  # HEAD: GET's headers, Content-Length included, no body
+            self.wfile.write(body)
+
+    def _respond_rows(self, rows, status_with_body, prefer, offset=0, total=None):
+        # Content-Range is "<first>-<last>/<total>", total "*" unless Prefer: count=... asked for it
+        total_text = "*" if total is None else str(total)
+        content_range = f"{offset}-{offset + len(rows) - 1}/{total_text}" if rows else f"*/{total or 0}"
+        if "return=representation" not in prefer and self.command not in ("GET", "HEAD"):
+            self._send(204 if self.command != "POST" else 201)
+            return
+        if "application/vnd.pgrst.object+json" in self.headers.get("Accept", ""):
+            if len(rows) != 1:
+                raise PostgrestError(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned ({len(rows)})")
+            self._send(status_with_body, rows[0])
+            return
+        self._send(status_with_body, rows, {"Content-Range": content_range})
+
+    def _handle(self, operation):
+        self._inject_latency()
+        try:
+            table, options, filters = self._parse()
+            prefer = self._prefer()
+            if operation == "select":
+                rows = self.database.select(table, options.get("select"), filters, options.get("order"),
+                                            options.get("limit"), options.get("offset"))
+                # count=exact, planned and estimated are all exact here
+                counted = any(p.startswith("count=") for p in prefer)
+                total = self.database.count(table, filters) if counted else None
+                offset = int(options["offset"]) if options.get("limit") and options.get("offset") else 0
+                self._respond_rows(rows, 200, prefer, offset, total)
+            elif operation == "insert":
+                body = self._body()
+                rows = body if isinstance(body, list) else [body or {}]
+                inserted = self.database.insert(table, rows, options.get("on_conflict"),
+                                                merge="resolution=merge-duplicates" in prefer,
+                                                ignore="resolution=ignore-duplicates" in prefer)
+                self._respond_rows(inserted, 201, prefer)
+            elif operation == "update":
+                self._respond_rows(self.database.update(table, self._body() or {}, filters), 200, prefer)
+            elif operation == "delete":
+                self._respond_rows(self.database.delete(table, filters), 200, prefer)
+        except PostgrestError as e:
+            self._send(e.status, {"code": e.code, "message": e.message, "details": None, "hint": None})
+        except (ValueError, sqlite3.Error) as e:
+            self._send(400, {"code": "PGRST100", "message": str(e), "details": None, "hint": None})
+
+    def do_GET(self):
+        self._handle("select")
+
+    def do_HEAD(self):
+        self._handle("select")
+
+    def do_POST(self):
+        self._handle("insert")
+
+    def do_PATCH(self):
+        self._handle("update")
+
+    def do_DELETE(self):
+        self._handle("delete")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, PATCH, DELETE, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "*")
+        self.end_headers()
+
+
+def create_server(host="127.0.0.1", port=DEFAULT_PORT, db_path=":memory:", migrations_dirs=(MIGRATIONS_DIR,),
+                  latency_ms=0.0, jitter_ms=0.0):
+    """Build (but do not start) a threaded server bound to a fresh handler class."""
+    handler = type("BoundPostgrestHandler", (PostgrestHandler,), {
+        "database": LocalDatabase(db_path, migrations_dirs),
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_in_background(**kwargs):
+    """Start the stand-in on a daemon thread; returns (server, base_url). Useful from tests/benchmarks."""
+    kwargs.setdefault("port", 0)
+    server = create_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Supabase/PostgREST stand-in backed by SQLite.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=":memory:", help="SQLite file (default: in-memory)")
+    parser.add_argument("--migrations", action="append", help="Extra migrations directory (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the injected latency")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.db, [MIGRATIONS_DIR] + (args.migrations or []),
+                           args.latency_ms, args.jitter_ms)
+    print(f"Local PostgREST listening on http://{args.host}:{args.port}/rest/v1 "
+          f"(latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms)")
+    print(f"Point VITE_SUPABASE_URL at http://{args.host}:{args.port} to use it from the app.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
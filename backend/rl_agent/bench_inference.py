@@ -0,0 +1,147 @@
+"""
+Benchmark the NumPy policy against the stable-baselines3 model.
+
+Measures, for each backend that is available:
+  - cold start: fresh interpreter -> import -> load -> first predict (wall time, peak RSS)
+  - single-observation latency (p50 / p99 over many calls)
+  - batched throughput for a few batch sizes
+
+The SB3 rows are skipped when torch / stable-baselines3 or the .zip are missing.
+
+Usage:
+    python bench_inference.py [--weights rl_pilot_v1_policy.npz] [--model rl_pilot_v1.zip]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+from export_policy import DEFAULT_MODEL, DEFAULT_OUTPUT
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BATCH_SIZES = (1, 32, 1024)
+
+# Each snippet runs in a fresh interpreter and prints one JSON line.
+COLD_START_NUMPY = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from policy_numpy import NumpyPolicy
+policy = NumpyPolicy.load(sys.argv[1])
+policy.predict([0.0] * policy.obs_size)
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+COLD_START_SB3 = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import numpy as np
+from stable_baselines3 import PPO
+model = PPO.load(sys.argv[1], device="cpu")
+model.predict(np.zeros(model.observation_space.shape, dtype=np.float32), deterministic=True)
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def cold_start(snippet, path, repeats):
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", snippet, path],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    seconds = sorted(r["seconds"] for r in runs)
+    return {
+        "median_s": seconds[len(seconds) // 2],
+        "min_s": seconds[0],
+        "max_rss_mb": max(r["max_rss_kb"] for r in runs) / 1024,
+    }
+
+
+def latency(predict, obs, calls):
+    predict(obs[0])  # warm-up
+    samples = np.empty(calls)
+    for i in range(calls):
+        o = obs[i % len(obs)]
+        t0 = time.perf_counter()
+        predict(o)
+        samples[i] = time.perf_counter() - t0
+    return {
+        "p50_us": float(np.percentile(samples, 50) * 1e6),
+        "p99_us": float(np.percentile(samples, 99) * 1e6),
+    }
+
+
+def throughput(predict, obs, batch_size, min_seconds=0.5):
+    batch = obs[:batch_size]
+    predict(batch)
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        predict(batch)
+        n += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_seconds:
+            break
+    return n * batch_size / elapsed
+
+
+def sb3_available(model_path):
+    if not os.path.exists(model_path):
+        return False
+    try:
+        import stable_baselines3  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NumPy vs SB3 policy inference")
+    parser.add_argument("--weights", default=DEFAULT_OUTPUT, help="NumPy weights (.npz) from export_policy.py")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="SB3 model .zip (optional)")
+    parser.add_argument("--cold-runs", type=int, default=5, help="Fresh interpreters per backend")
+    parser.add_argument("--calls", type=int, default=20000, help="Single-observation calls for latency")
+    args = parser.parse_args()
+
+    weights = os.path.abspath(args.weights)
+    model_path = os.path.abspath(args.model)
+    if not os.path.exists(weights):
+        sys.exit(f"Weights file not found: {weights} (run export_policy.py first)")
+
+    from policy_numpy import NumpyPolicy
+
+    rng = np.random.default_rng(0)
+    policy = NumpyPolicy.load(weights)
+    # 3 inputs for toy-env policies, 6 for ones trained with train_pilot.py --instance.
+    obs = rng.uniform(0, 1, size=(max(BATCH_SIZES), policy.obs_size)).astype(np.float32)
+
+    backends = {"numpy": (COLD_START_NUMPY, weights, policy.predict)}
+    if sb3_available(model_path):
+        from stable_baselines3 import PPO
+        model = PPO.load(model_path, device="cpu")
+        backends["sb3"] = (
+            COLD_START_SB3, model_path,
+            lambda o: model.predict(o, deterministic=True),
+        )
+    else:
+        print("stable-baselines3 or model .zip not available; benchmarking the NumPy path only.\n")
+
+    for name, (snippet, path, predict) in backends.items():
+        print(f"=== {name} ===")
+        cs = cold_start(snippet, path, args.cold_runs)
+        print(f"Cold start:  median {cs['median_s'] * 1000:.0f} ms  (min {cs['min_s'] * 1000:.0f} ms)  peak RSS {cs['max_rss_mb']:.0f} MB")
+        lat = latency(predict, obs, args.calls)
+        print(f"Single obs:  p50 {lat['p50_us']:.1f} us  p99 {lat['p99_us']:.1f} us")
+        for bs in BATCH_SIZES:
+            print(f"Batch {bs:>5}: {throughput(predict, obs, bs):,.0f} obs/s")
+        print()
+
+
+if __name__ == "__main__":
+    main()
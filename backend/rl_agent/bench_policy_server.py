@@ -0,0 +1,113 @@
+"""
+Load benchmark for policy_server.py.
+
+Starts the server in a subprocess, then runs N client processes. Each client
+sends one observation at a time on a fixed schedule (--rate requests/s per
+client) and measures latency from the *scheduled* send time, so a stalled
+server is not hidden by clients backing off (coordinated omission).
+With --rate 0 clients run closed-loop as fast as the server answers.
+
+Usage:
+    python bench_policy_server.py --weights rl_pilot_v1_policy.npz --clients 8 --rate 500
+"""
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from export_policy import DEFAULT_OUTPUT
+from policy_numpy import NumpyPolicy
+from policy_server import PolicyClient
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def client_worker(args):
+    unix_path, rate, duration, seed, obs_size = args
+    rng = np.random.default_rng(seed)
+    obs = rng.uniform(0, 1, size=(1024, obs_size)).astype(np.float32)
+    latencies = []
+
+    with PolicyClient(unix_path, obs_size=obs_size) as client:
+        interval = 1.0 / rate if rate else 0.0
+        start = time.perf_counter()
+        scheduled = start
+        i = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= duration:
+                break
+            if interval:
+                if now < scheduled:
+                    time.sleep(scheduled - now)
+                sent_at = scheduled
+                scheduled += interval
+            else:
+                sent_at = now
+            client.predict_many(obs[i % len(obs)])
+            latencies.append(time.perf_counter() - sent_at)
+            i += 1
+    return np.array(latencies)
+
+
+def wait_for_socket(path, proc, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(path):
+            return
+        if proc.poll() is not None:
+            sys.exit("Policy server exited during startup")
+        time.sleep(0.05)
+    sys.exit("Policy server did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the policy inference server")
+    parser.add_argument("--weights", default=DEFAULT_OUTPUT, help="NumPy weights (.npz) from export_policy.py")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client processes")
+    parser.add_argument("--rate", type=float, default=500, help="Requests/s per client (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    parser.add_argument("--max-batch", type=int, default=None)
+    parser.add_argument("--max-wait-us", type=float, default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        sys.exit(f"Weights file not found: {args.weights} (run export_policy.py first)")
+
+    obs_size = NumpyPolicy.load(args.weights).obs_size
+    sock_path = os.path.join(tempfile.mkdtemp(prefix="rl_policy_"), "policy.sock")
+    cmd = [sys.executable, os.path.join(HERE, "policy_server.py"),
+           "--weights", os.path.abspath(args.weights), "--unix", sock_path]
+    if args.max_batch:
+        cmd += ["--max-batch", str(args.max_batch)]
+    if args.max_wait_us is not None:
+        cmd += ["--max-wait-us", str(args.max_wait_us)]
+    server = subprocess.Popen(cmd, cwd=HERE, stdout=subprocess.DEVNULL)
+
+    try:
+        wait_for_socket(sock_path, server)
+        mode = f"{args.rate:,.0f} req/s per client" if args.rate else "closed loop"
+        print(f"Running {args.clients} clients for {args.duration:.0f}s ({mode})...")
+
+        jobs = [(sock_path, args.rate, args.duration, seed, obs_size) for seed in range(args.clients)]
+        with mp.Pool(args.clients) as pool:
+            results = pool.map(client_worker, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    lat = np.concatenate(results) * 1e6
+    throughput = len(lat) / args.duration
+    print(f"\nRequests:   {len(lat):,}  ({throughput:,.0f} req/s)")
+    print(f"Latency us: p50 {np.percentile(lat, 50):.0f}  p90 {np.percentile(lat, 90):.0f}  "
+          f"p99 {np.percentile(lat, 99):.0f}  p99.9 {np.percentile(lat, 99.9):.0f}  max {lat.max():.0f}")
+    verdict = "OK" if np.percentile(lat, 99) < 1000 else "ABOVE 1 ms"
+    print(f"p99 target (< 1 ms): {verdict}")
+
+
+if __name__ == "__main__":
+    main()
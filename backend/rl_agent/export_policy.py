@@ -0,0 +1,106 @@
+"""
+Export the PPO actor of rl_pilot_v1.zip to a NumPy weights file.
+
+This is the only step that needs torch / stable-baselines3; the resulting .npz
+is consumed by policy_numpy.NumpyPolicy.
+
+Usage:
+    python export_policy.py [rl_pilot_v1.zip] [-o rl_pilot_v1_policy.npz]
+"""
+import argparse
+import numpy as np
+
+from policy_numpy import NumpyPolicy
+
+DEFAULT_MODEL = "rl_pilot_v1.zip"
+DEFAULT_OUTPUT = "rl_pilot_v1_policy.npz"
+VERIFY_SAMPLES = 4096
+
+
+def _activation_name(module):
+    return type(module).__name__.lower()
+
+
+def _log_softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    return z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+
+
+def policy_to_numpy(model):
+    """Walk the actor path of an SB3 ActorCriticPolicy and copy its layers."""
+    import torch.nn as nn
+
+    policy = model.policy
+    # FlattenExtractor is the only extractor a Box MlpPolicy uses; anything else
+    # (CNN, custom extractor) would need its own port.
+    extractor = getattr(policy, "pi_features_extractor", policy.features_extractor)
+    if type(extractor).__name__ != "FlattenExtractor":
+        raise ValueError("Only MlpPolicy with FlattenExtractor can be exported")
+
+    weights, biases, activations = [], [], []
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, nn.Linear):
+            weights.append(module.weight.detach().cpu().numpy().T)
+            biases.append(module.bias.detach().cpu().numpy())
+            activations.append("identity")
+        else:
+            # Activation following the previous Linear layer.
+            activations[-1] = _activation_name(module)
+
+    head = policy.action_net
+    weights.append(head.weight.detach().cpu().numpy().T)
+    biases.append(head.bias.detach().cpu().numpy())
+    activations.append("identity")
+
+    return NumpyPolicy(weights, biases, activations, model.observation_space.shape)
+
+
+def verify(model, np_policy, samples=VERIFY_SAMPLES, seed=0):
+    """Compare logits and greedy actions against the torch policy."""
+    import torch
+
+    rng = np.random.default_rng(seed)
+    space = model.observation_space
+    obs = rng.uniform(space.low, space.high, size=(samples, *space.shape)).astype(np.float32)
+
+    with torch.no_grad():
+        obs_t = torch.as_tensor(obs)
+        dist = model.policy.get_distribution(obs_t)
+        torch_logits = dist.distribution.logits.cpu().numpy()
+    # Categorical stores normalised logits (log-probabilities); compare those.
+    np_logits = _log_softmax(np_policy.logits(obs))
+
+    max_diff = float(np.abs(torch_logits - np_logits).max())
+    torch_actions, _ = model.predict(obs, deterministic=True)
+    np_actions, _ = np_policy.predict(obs, deterministic=True)
+    agreement = float((torch_actions == np_actions).mean())
+    return max_diff, agreement
+
+
+def export(model_path=DEFAULT_MODEL, output_path=DEFAULT_OUTPUT, check=True):
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    np_policy = policy_to_numpy(model)
+    np_policy.save(output_path, source=str(model_path))
+    print(f"Exported {len(np_policy.weights)} layers ({' -> '.join(np_policy.activation_names)}) to {output_path}")
+
+    if check:
+        max_diff, agreement = verify(model, np_policy)
+        print(f"Verification: max |logit diff| = {max_diff:.2e}, greedy action agreement = {agreement:.2%}")
+        if agreement < 1.0:
+            print("WARNING: NumPy policy disagrees with the torch policy on some observations")
+    return np_policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the PPO pilot policy to NumPy weights")
+    parser.add_argument("model", nargs="?", default=DEFAULT_MODEL, help="SB3 model .zip")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="Output .npz path")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the torch vs NumPy comparison")
+    args = parser.parse_args()
+    export(args.model, args.output, check=not args.no_verify)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Torch-free inference for the mutation-rate pilot policy.
+
+Loads the weights written by export_policy.py (a plain .npz file) and runs the
+PPO actor MLP with NumPy only, so consumers skip the torch / stable-baselines3
+import entirely. `predict` mirrors `model.predict`: it accepts a single
+observation or a batch and returns `(actions, None)`.
+"""
+import json
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "elu": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))),
+    "leakyrelu": lambda x: np.where(x > 0, x, 0.01 * x),
+    "identity": lambda x: x,
+}
+
+
+class NumpyPolicy:
+    def __init__(self, weights, biases, activations, obs_shape):
+        if not (len(weights) == len(biases) == len(activations)):
+            raise ValueError("weights, biases and activations must have the same length")
+        unknown = [a for a in activations if a not in ACTIVATIONS]
+        if unknown:
+            raise ValueError(f"Unsupported activation(s): {unknown}")
+
+        # Weights are stored as (in, out) so a batch is just `x @ W + b`.
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.activations = [ACTIVATIONS[a] for a in activations]
+        self.activation_names = list(activations)
+        self.obs_shape = tuple(obs_shape)
+        self.obs_size = int(np.prod(self.obs_shape))
+        self.n_actions = self.weights[-1].shape[1]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            weights = [data[f"w{i}"] for i in range(meta["n_layers"])]
+            biases = [data[f"b{i}"] for i in range(meta["n_layers"])]
+        return cls(weights, biases, meta["activations"], meta["obs_shape"])
+
+    def save(self, path, **extra_meta):
+        meta = {
+            "n_layers": len(self.weights),
+            "activations": self.activation_names,
+            "obs_shape": list(self.obs_shape),
+            "n_actions": self.n_actions,
+            **extra_meta,
+        }
+        arrays = {"meta": np.array(json.dumps(meta))}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        np.savez(path, **arrays)
+
+    def logits(self, obs):
+        """Action logits for a (batch, *obs_shape) array."""
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.obs_size)
+        for w, b, act in zip(self.weights, self.biases, self.activations):
+            x = act(x @ w + b)
+        return x
+
+    def action_probabilities(self, obs):
+        z = self.logits(obs)
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict(self, obs, deterministic=True, rng=None):
+        """
+        Same contract as stable-baselines3 `model.predict` for a Discrete action
+        space: a single observation returns a scalar action, a batch returns an
+        array of actions. The second element (recurrent state) is always None.
+        """
+        obs = np.asarray(obs, dtype=np.float32)
+        single = obs.shape == self.obs_shape
+
+        if deterministic:
+            actions = self.logits(obs).argmax(axis=1)
+        else:
+            rng = rng if rng is not None else np.random.default_rng()
+            probs = self.action_probabilities(obs)
+            # Inverse-CDF sampling, vectorised over the batch.
+            u = rng.random((probs.shape[0], 1), dtype=np.float32)
+            actions = (probs.cumsum(axis=1) < u).sum(axis=1)
+            actions = np.minimum(actions, self.n_actions - 1)
+
+        if single:
+            return actions[0], None
+        return actions, None
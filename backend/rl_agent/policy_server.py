@@ -0,0 +1,233 @@
+"""
+Local inference server for the mutation-rate pilot policy.
+
+Holds a NumpyPolicy in memory and answers over a Unix socket (or TCP) with a
+fixed-size binary protocol, so a GA loop can ask for a decision every
+generation without paying HTTP or torch overhead.
+
+Protocol (little endian, pipelining allowed, responses in request order):
+    request  = uint32 id, float32 obs[obs_size]      (4 + 4 * obs_size bytes)
+    response = uint32 id, int32 action               (8 bytes)
+
+obs_size comes from the policy: 3 for the toy environment (stagnation,
+mutation_rate, progress), 6 for policies trained with `train_pilot.py
+--instance` (plus the three diversity features). Clients pass the same size.
+
+Requests that arrive while a batch is being assembled (from any connection) are
+evaluated together in one `predict` call ("micro-batching").
+
+Usage:
+    python policy_server.py --unix /tmp/rl_policy.sock
+    python policy_server.py --port 8765
+"""
+import argparse
+import asyncio
+import os
+import socket
+import time
+import numpy as np
+
+from export_policy import DEFAULT_OUTPUT
+from policy_numpy import NumpyPolicy
+
+DEFAULT_SOCKET = "/tmp/rl_policy.sock"
+DEFAULT_MAX_BATCH = 512
+DEFAULT_MAX_WAIT_US = 0
+READ_CHUNK = 64 * 1024
+
+DEFAULT_OBS_SIZE = 3
+
+
+def request_dtype(obs_size=DEFAULT_OBS_SIZE):
+    return np.dtype([("id", "<u4"), ("obs", "<f4", (obs_size,))])
+
+
+REQUEST_DTYPE = request_dtype()
+RESPONSE_DTYPE = np.dtype([("id", "<u4"), ("action", "<i4")])
+
+
+class PolicyServer:
+    def __init__(self, policy, max_batch=DEFAULT_MAX_BATCH, max_wait_us=DEFAULT_MAX_WAIT_US):
+        self.policy = policy
+        self.request_dtype = request_dtype(policy.obs_size)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_us / 1e6
+        self.pending = []  # (writer, frames) in arrival order
+        self.pending_count = 0
+        self.wakeup = None
+        self.stats = {"requests": 0, "batches": 0, "connections": 0}
+
+    async def handle_connection(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats["connections"] += 1
+
+        buf = b""
+        frame = self.request_dtype.itemsize
+        try:
+            while True:
+                data = await reader.read(READ_CHUNK)
+                if not data:
+                    break
+                buf += data
+                n = len(buf) // frame
+                if n:
+                    # copy() so the frames outlive the buffer slice
+                    frames = np.frombuffer(buf, dtype=self.request_dtype, count=n).copy()
+                    buf = buf[n * frame:]
+                    self.pending.append((writer, frames))
+                    self.pending_count += n
+                    self.wakeup.set()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def batch_loop(self):
+        while True:
+            await self.wakeup.wait()
+            # Give other connections a chance to add their requests, unless the
+            # batch is already full. A zero wait still yields once, which picks
+            # up every socket that became readable in the same loop iteration;
+            # a positive wait is bounded below by the event loop timer resolution.
+            if self.pending_count < self.max_batch:
+                await asyncio.sleep(self.max_wait)
+
+            pending, self.pending = self.pending, []
+            self.pending_count = 0
+            self.wakeup.clear()
+            self._answer(pending)
+
+    def _answer(self, pending):
+        frames = np.concatenate([f for _, f in pending]) if len(pending) > 1 else pending[0][1]
+        obs = frames["obs"]
+        actions = np.empty(len(frames), dtype=np.int32)
+        for start in range(0, len(frames), self.max_batch):
+            chunk, _ = self.policy.predict(obs[start:start + self.max_batch], deterministic=True)
+            actions[start:start + self.max_batch] = chunk
+            self.stats["batches"] += 1
+        self.stats["requests"] += len(frames)
+
+        offset = 0
+        for writer, f in pending:
+            n = len(f)
+            if not writer.is_closing():
+                resp = np.empty(n, dtype=RESPONSE_DTYPE)
+                resp["id"] = f["id"]
+                resp["action"] = actions[offset:offset + n]
+                writer.write(resp.tobytes())
+            offset += n
+
+    async def report_loop(self, interval):
+        last = dict(self.stats)
+        while True:
+            await asyncio.sleep(interval)
+            req = self.stats["requests"] - last["requests"]
+            batches = self.stats["batches"] - last["batches"]
+            avg = req / batches if batches else 0
+            print(f"[{time.strftime('%H:%M:%S')}] {req / interval:,.0f} req/s, avg batch {avg:.1f}, connections {self.stats['connections']}")
+            last = dict(self.stats)
+
+    async def serve(self, unix_path=None, host="127.0.0.1", port=None, report_interval=0):
+        self.wakeup = asyncio.Event()
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+            where = f"{host}:{port}"
+
+        tasks = [asyncio.create_task(self.batch_loop())]
+        if report_interval:
+            tasks.append(asyncio.create_task(self.report_loop(report_interval)))
+        print(f"Policy server listening on {where} ({self.policy.obs_size} inputs, max batch {self.max_batch}, "
+              f"max wait {self.max_wait * 1e6:.0f} us)", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tasks:
+                t.cancel()
+            if unix_path and os.path.exists(unix_path):
+                os.unlink(unix_path)
+
+
+class PolicyClient:
+    """
+    Blocking client for the GA side. One instance per thread/process;
+    `obs_size` must match the served policy.
+    """
+
+    def __init__(self, unix_path=None, host="127.0.0.1", port=None, timeout=5.0, obs_size=DEFAULT_OBS_SIZE):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.obs_size = obs_size
+        self.request_dtype = request_dtype(obs_size)
+        self.next_id = 0
+
+    def _recv_exact(self, n):
+        chunks = []
+        while n:
+            chunk = self.sock.recv(n)
+            if not chunk:
+                raise ConnectionError("Policy server closed the connection")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def predict_many(self, observations):
+        """Pipeline a batch of observations; returns one action per row."""
+        obs = np.asarray(observations, dtype=np.float32).reshape(-1, self.obs_size)
+        req = np.empty(len(obs), dtype=self.request_dtype)
+        req["id"] = (np.arange(len(obs)) + self.next_id) & 0xFFFFFFFF
+        req["obs"] = obs
+        self.next_id = (self.next_id + len(obs)) & 0xFFFFFFFF
+        self.sock.sendall(req.tobytes())
+        resp = np.frombuffer(self._recv_exact(len(obs) * RESPONSE_DTYPE.itemsize), dtype=RESPONSE_DTYPE)
+        return resp["action"].copy()
+
+    def predict(self, stagnation, mutation_rate, progress, *features):
+        """One decision; `features` are the extra inputs of 6-input policies (diversity)."""
+        return int(self.predict_many([[stagnation, mutation_rate, progress, *features]])[0])
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the NumPy pilot policy over a Unix socket or TCP")
+    parser.add_argument("--weights", default=DEFAULT_OUTPUT, help="NumPy weights (.npz) from export_policy.py")
+    parser.add_argument("--unix", default=None, help=f"Unix socket path (default {DEFAULT_SOCKET} unless --port is given)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Listen on TCP instead of a Unix socket")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-us", type=float, default=DEFAULT_MAX_WAIT_US,
+                        help="Extra wait for more requests before running a partial batch (0 = next loop iteration)")
+    parser.add_argument("--report", type=float, default=0, help="Print throughput every N seconds")
+    args = parser.parse_args()
+
+    unix_path = None if args.port and not args.unix else (args.unix or DEFAULT_SOCKET)
+
+    server = PolicyServer(NumpyPolicy.load(args.weights), args.max_batch, args.max_wait_us)
+    try:
+        asyncio.run(server.serve(unix_path, args.host, args.port, args.report))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Memory-mapped rollout storage for offline RL / imitation.
+
+A store is a directory holding one fixed-dtype .npy column per field plus a
+small meta.json with the capacity and write cursor:
+
+    rollouts/
+      meta.json
+      obs.npy  next_obs.npy  action.npy  reward.npy  done.npy  truncated.npy
+      episode.npy  info_fitness.npy  info_mutation_rate.npy
+
+Columns are opened with np.lib.format.open_memmap, so the writer appends in
+place and the reader samples minibatches by index without loading whole files;
+RAM stays constant no matter how many transitions are stored. The buffer is a
+ring: once `capacity` is reached, the oldest transitions are overwritten.
+
+Transitions come from SchedulerEnv rollouts (`record`), from training runs
+(see RecordRolloutsCallback in train_pilot.py) or from instrumented GA runs
+written as JSON lines (`ingest`), one object per generation:
+
+    {"obs": [stag, mut, prog], "action": 2, "reward": 9.1, "next_obs": [...],
+     "done": false, "info": {"fitness": 812.4, "mutation_rate": 0.07}}
+
+Observations have 3 values, or 6 with the real GA (SchedulerEnv(instance),
+which adds the diversity features). A new store takes its observation shape
+from the environment (`record --instance`) or from the first trace line.
+
+Usage:
+    python rollout_store.py record rollouts --episodes 1000 [--weights rl_pilot_v1_policy.npz]
+    python rollout_store.py record rollouts_ga --episodes 50 --instance benchmark
+    python rollout_store.py ingest rollouts ga_trace.jsonl
+    python rollout_store.py info rollouts
+"""
+import argparse
+import json
+import os
+import numpy as np
+
+META_FILE = "meta.json"
+DEFAULT_CAPACITY = 1_000_000
+OBS_SHAPE = (3,)
+INFO_FIELDS = ("fitness", "mutation_rate")
+
+
+def _columns(obs_shape, info_fields):
+    cols = {
+        "obs": (np.float32, obs_shape),
+        "next_obs": (np.float32, obs_shape),
+        "action": (np.int32, ()),
+        "reward": (np.float32, ()),
+        "done": (np.bool_, ()),
+        "truncated": (np.bool_, ()),
+        "episode": (np.int64, ()),
+    }
+    for name in info_fields:
+        cols[f"info_{name}"] = (np.float32, ())
+    return cols
+
+
+def _read_meta(directory):
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RolloutWriter:
+    """
+    Appends transitions to a ring-buffer store. One writer per store. An
+    existing store is reopened for appending; its obs shape and column dtypes
+    must match, or ValueError.
+    """
+
+    def __init__(self, directory, capacity=DEFAULT_CAPACITY, obs_shape=OBS_SHAPE, info_fields=INFO_FIELDS):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE)
+
+        if os.path.exists(meta_path):
+            meta = _read_meta(directory)
+            if tuple(meta["obs_shape"]) != tuple(obs_shape):
+                raise ValueError(f"{directory} stores observations of shape {tuple(meta['obs_shape'])}, "
+                                 f"not {tuple(obs_shape)}")
+            mode = "r+"
+        else:
+            meta = {
+                "capacity": int(capacity),
+                "obs_shape": list(obs_shape),
+                "info_fields": list(info_fields),
+                "cursor": 0,
+                "size": 0,
+                "total_written": 0,
+                "episode": 0,  # id given to the next transition added with add()
+            }
+            mode = "w+"
+
+        self.meta = meta
+        self.capacity = meta["capacity"]
+        self.info_fields = tuple(meta["info_fields"])
+        self.columns = {}
+        for name, (dtype, shape) in _columns(tuple(meta["obs_shape"]), self.info_fields).items():
+            path = os.path.join(directory, f"{name}.npy")
+            if mode == "w+":
+                self.columns[name] = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=dtype, shape=(self.capacity, *shape))
+            else:
+                col = np.load(path, mmap_mode="r+")
+                if col.dtype != dtype or col.shape != (self.capacity, *shape):
+                    raise ValueError(f"{path} is {col.dtype} {col.shape}, expected "
+                                     f"{np.dtype(dtype)} {(self.capacity, *shape)}")
+                self.columns[name] = col
+        if mode == "w+":
+            self.flush()
+
+    def __len__(self):
+        return self.meta["size"]
+
+    def end_episode(self):
+        """Start a new episode id even though the last transition was not terminal."""
+        self.meta["episode"] += 1
+
+    def add(self, obs, action, reward, next_obs, done, truncated=False, info=None):
+        """Append one transition; the episode id advances after done/truncated."""
+        info = info or {}
+        episode = self.meta["episode"]
+        self.add_batch(
+            obs=np.asarray(obs, dtype=np.float32)[None],
+            action=np.asarray([action]),
+            reward=np.asarray([reward]),
+            next_obs=np.asarray(next_obs, dtype=np.float32)[None],
+            done=np.asarray([done]),
+            truncated=np.asarray([truncated]),
+            episode=np.asarray([episode]),
+            info={k: np.asarray([info.get(k, np.nan)]) for k in self.info_fields},
+        )
+        if done or truncated:
+            self.end_episode()
+
+    def add_batch(self, obs, action, reward, next_obs, done, truncated, episode, info):
+        """Vectorised append of n transitions (each argument has n rows)."""
+        n = len(action)
+        if n > self.capacity:
+            # Only the last `capacity` rows would survive anyway.
+            skip = n - self.capacity
+            obs, action, reward, next_obs = obs[skip:], action[skip:], reward[skip:], next_obs[skip:]
+            done, truncated, episode = done[skip:], truncated[skip:], episode[skip:]
+            info = {k: v[skip:] for k, v in info.items()}
+            self.meta["total_written"] += skip
+            n = self.capacity
+
+        values = {
+            "obs": obs, "next_obs": next_obs, "action": action, "reward": reward,
+            "done": done, "truncated": truncated, "episode": episode,
+        }
+        for k in self.info_fields:
+            values[f"info_{k}"] = info.get(k, np.full(n, np.nan, dtype=np.float32))
+
+        start = self.meta["cursor"]
+        first = min(n, self.capacity - start)
+        for name, col in self.columns.items():
+            col[start:start + first] = values[name][:first]
+            if first < n:
+                col[:n - first] = values[name][first:]
+
+        self.meta["cursor"] = (start + n) % self.capacity
+        self.meta["size"] = min(self.capacity, self.meta["size"] + n)
+        self.meta["total_written"] += n
+
+    def flush(self):
+        """Persist column pages and the cursor; readers see new data after this."""
+        for col in self.columns.values():
+            col.flush()
+        tmp = os.path.join(self.directory, META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.directory, META_FILE))
+
+    def close(self):
+        self.flush()
+        self.columns.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RolloutReader:
+    """Random access over a store; only the sampled rows are read from disk."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = _read_meta(directory)
+        self.info_fields = tuple(self.meta["info_fields"])
+        self.columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in _columns(tuple(self.meta["obs_shape"]), self.info_fields)
+        }
+
+    def refresh(self):
+        """Pick up transitions flushed by a writer since this reader opened."""
+        self.meta = _read_meta(self.directory)
+
+    def __len__(self):
+        return self.meta["size"]
+
+    def _physical(self, logical):
+        """Logical index 0 = oldest stored transition."""
+        size, cap = self.meta["size"], self.meta["capacity"]
+        oldest = self.meta["cursor"] if size == cap else 0
+        return (oldest + np.asarray(logical)) % cap
+
+    def get(self, indices, fields=None):
+        idx = self._physical(indices)
+        # Sorted access keeps the page-cache reads sequential-ish.
+        order = np.argsort(idx, kind="stable")
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        sorted_idx = idx[order]
+        names = fields or self.columns.keys()
+        return {name: self.columns[name][sorted_idx][inverse] for name in names}
+
+    def sample(self, batch_size, rng=None, fields=None):
+        if len(self) == 0:
+            raise ValueError("Rollout store is empty")
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.get(rng.integers(0, len(self), size=batch_size), fields)
+
+    def iterate(self, batch_size, shuffle=True, rng=None, fields=None):
+        """One pass over every stored transition in minibatches."""
+        rng = rng if rng is not None else np.random.default_rng()
+        order = rng.permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            yield self.get(order[start:start + batch_size], fields)
+
+
+# --- Sources ----------------------------------------------------------------
+
+def record_env(writer, episodes, policy=None, flush_every=100, env=None):
+    """Roll out SchedulerEnv episodes (random actions, or `policy.predict`)."""
+    if env is None:
+        from scheduler_env import SchedulerEnv
+        env = SchedulerEnv()
+    for ep in range(episodes):
+        obs, _ = env.reset()
+        done = False
+        while not done:
+            if policy is None:
+                action = env.action_space.sample()
+            else:
+                action, _ = policy.predict(obs, deterministic=False)
+            next_obs, reward, terminated, truncated, info = env.step(int(action))
+            writer.add(obs, action, reward, next_obs, terminated, truncated, info)
+            obs = next_obs
+            done = terminated or truncated
+        if (ep + 1) % flush_every == 0:
+            writer.flush()
+    writer.flush()
+
+
+def ingest_jsonl(writer, path, chunk=4096):
+    """Append GA trace lines (see module docstring) in vectorised chunks."""
+    rows = []
+
+    def write_rows():
+        writer.add_batch(
+            obs=np.array([r["obs"] for r in rows], dtype=np.float32),
+            action=np.array([r["action"] for r in rows], dtype=np.int32),
+            reward=np.array([r["reward"] for r in rows], dtype=np.float32),
+            next_obs=np.array([r["next_obs"] for r in rows], dtype=np.float32),
+            done=np.array([r.get("done", False) for r in rows]),
+            truncated=np.array([r.get("truncated", False) for r in rows]),
+            episode=np.array([r["_episode"] for r in rows], dtype=np.int64),
+            info={k: np.array([r.get("info", {}).get(k, np.nan) for r in rows], dtype=np.float32)
+                  for k in writer.info_fields},
+        )
+        rows.clear()
+
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row["_episode"] = writer.meta["episode"]
+            rows.append(row)
+            count += 1
+            if row.get("done") or row.get("truncated"):
+                writer.end_episode()
+            if len(rows) >= chunk:
+                write_rows()
+    if rows:
+        last = rows[-1]
+        write_rows()
+        # A trace that stops mid-run must not merge with the next one.
+        if not (last.get("done") or last.get("truncated")):
+            writer.end_episode()
+    writer.flush()
+    return count
+
+
+def trace_obs_shape(path):
+    """Observation shape of a GA trace, from its first line (OBS_SHAPE if empty)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                return (len(json.loads(line)["obs"]),)
+    return OBS_SHAPE
+
+
+def print_info(directory):
+    reader = RolloutReader(directory)
+    meta = reader.meta
+    disk = sum(os.path.getsize(os.path.join(directory, f"{n}.npy")) for n in reader.columns)
+    print(f"Store:        {directory}")
+    print(f"Transitions:  {len(reader):,} / {meta['capacity']:,} (total written {meta['total_written']:,})")
+    print(f"Episodes:     {meta['episode']:,}")
+    print(f"Disk:         {disk / 1e6:.1f} MB")
+    if len(reader):
+        batch = reader.sample(min(len(reader), 10000), np.random.default_rng(0), fields=["reward", "action"])
+        counts = np.bincount(batch["action"], minlength=3)
+        print(f"Sample:       mean reward {batch['reward'].mean():.2f}, action mix {counts / counts.sum()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped rollout store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Record SchedulerEnv rollouts")
+    rec.add_argument("directory")
+    rec.add_argument("--episodes", type=int, default=100)
+    rec.add_argument("--weights", default=None, help="NumPy policy (.npz); random actions if omitted")
+    rec.add_argument("--instance", default=None,
+                     help="Run the real GA on this instance bank .npz or 'benchmark' (6-value observations)")
+    rec.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+
+    ing = sub.add_parser("ingest", help="Append GA trace JSON lines")
+    ing.add_argument("directory")
+    ing.add_argument("trace")
+    ing.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+
+    inf = sub.add_parser("info", help="Summarise a store")
+    inf.add_argument("directory")
+
+    args = parser.parse_args()
+    if args.command == "info":
+        print_info(args.directory)
+        return
+
+    env = None
+    if args.command == "record":
+        from scheduler_env import SchedulerEnv
+        env = SchedulerEnv(args.instance)
+        obs_shape = env.observation_space.shape
+    else:
+        obs_shape = trace_obs_shape(args.trace)
+
+    with RolloutWriter(args.directory, capacity=args.capacity, obs_shape=obs_shape) as writer:
+        if args.command == "record":
+            policy = None
+            if args.weights:
+                from policy_numpy import NumpyPolicy
+                policy = NumpyPolicy.load(args.weights)
+            before = writer.meta["total_written"]
+            record_env(writer, args.episodes, policy, env=env)
+            print(f"Recorded {writer.meta['total_written'] - before:,} transitions from {args.episodes} episodes")
+        else:
+            n = ingest_jsonl(writer, args.trace)
+            print(f"Ingested {n:,} transitions from {args.trace}")
+    print_info(args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,90 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
+import os
 import random
+import sys
+
+# The real GA lives in backend/sequencer (plain modules, no package)
+SEQUENCER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sequencer")
+if SEQUENCER_DIR not in sys.path:
+    sys.path.insert(0, SEQUENCER_DIR)
 
 class SchedulerEnv(gym.Env):
     """
     Custom Environment that follows gym interface.
     Simulates a Genetic Algorithm process for the Scheduler.
+
+    Without an instance the GA is the original toy simulation. With
+    `instance` (a sequencer Instance, a bank .npz path or "benchmark") every
+    step runs one generation of the real GA (backend/sequencer/ga.py) and the
+    observation gains three population diversity features, maintained
+    incrementally by the GA as individuals are replaced.
     """
     metadata = {'render.modes': ['console']}
 
-    def __init__(self):
+    def __init__(self, instance=None, population_size=40, max_generations=100):
         super(SchedulerEnv, self).__init__()
         
         # Actions: 0=Decrease Mutation, 1=Maintain, 2=Increase
         self.action_space = spaces.Discrete(3)
         
+        self.instance = self._load_instance(instance)
+        self.population_size = population_size
+        self.max_generations = max_generations
+        self.ga = None
+
         # Observation: [StagnationCount (0-50), CurrentMutationRate (0.0-1.0), GenerationProgress (0.0-1.0)]
-        self.observation_space = spaces.Box(low=0, high=1, shape=(3,), dtype=np.float32)
+        # GA mode adds [PositionDiversity, EdgeEntropy, DistinctEliteRatio], all 0-1.
+        obs_size = 3 if self.instance is None else 6
+        self.observation_space = spaces.Box(low=0, high=1, shape=(obs_size,), dtype=np.float32)
         
         self.reset()
 
+    @staticmethod
+    def _load_instance(instance):
+        if instance is None or not isinstance(instance, str):
+            return instance
+        from instance import Instance
+        if instance == "benchmark":
+            return Instance.from_benchmark_json()
+        return Instance.load(instance)
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         
         self.current_generation = 0
-        self.max_generations = 100
         self.stagnation_counter = 0
         self.current_mutation_rate = 0.05 # Initial guess
         self.best_fitness = 1000.0 # Lower is better (Cost)
         
         # Simulated "Optimal" mutation rate changes over time to make it tricky
         self.target_optimal_rate = 0.1 
+
+        if self.instance is not None:
+            from ga import GeneticAlgorithm
+            # The agent owns the mutation rate, so the GA's own boost is off.
+            self.ga = GeneticAlgorithm(
+                self.instance,
+                population_size=self.population_size,
+                mutation_rate=self.current_mutation_rate,
+                seed=int(self.np_random.integers(2**31)),
+                adaptive_mutation=False,
+            )
+            self.initial_cost = max(self.ga.best_cost, 1e-9)
+            self.best_fitness = self.ga.best_cost
         
         return self._get_obs(), {}
 
     def _get_obs(self):
-        return np.array([
+        obs = [
             self.stagnation_counter / 50.0, # Normalized stagnation
             self.current_mutation_rate,
             self.current_generation / self.max_generations
-        ], dtype=np.float32)
+        ]
+        if self.ga is not None:
+            obs.extend(self.ga.diversity_features())
+        return np.array(obs, dtype=np.float32)
 
     def step(self, action):
         self.current_generation += 1
@@ -51,6 +95,9 @@ class SchedulerEnv(gym.Env):
         elif action == 2: # Increase
             self.current_mutation_rate = min(0.5, self.current_mutation_rate + 0.01)
         # action 1 is maintain
+
+        if self.ga is not None:
+            return self._step_ga()
         
         # 2. Simulate Environment Reaction (Genetic Algorithm Step)
         # Logic: If mutation rate is close to "optimal", we improve fitness.
@@ -102,6 +149,25 @@ class SchedulerEnv(gym.Env):
         
         return self._get_obs(), reward, terminated, truncated, info
 
+    def _step_ga(self):
+        # One real generation at the chosen mutation rate
+        previous_fitness = self.best_fitness
+        self.ga.step(self.current_mutation_rate)
+        self.best_fitness = self.ga.best_cost
+        self.stagnation_counter = self.ga.stagnation
+
+        # Same shape as the simulation: improvement (as % of the initial cost) minus stagnation
+        reward = 100.0 * (previous_fitness - self.best_fitness) / self.initial_cost
+        if self.stagnation_counter > 0:
+            reward -= 1
+
+        terminated = self.current_generation >= self.max_generations
+        info = {
+            "fitness": self.best_fitness,
+            "mutation_rate": self.current_mutation_rate
+        }
+        return self._get_obs(), reward, terminated, False, info
+
     def render(self, mode='console'):
         if mode == 'console':
             print(f"Gen: {self.current_generation} | Mut: {self.current_mutation_rate:.2f} | Stag: {self.stagnation_counter} | Fit: {self.best_fitness:.2f}")
@@ -0,0 +1,310 @@
+"""
+Parallel hyperparameter sweep for PPO on SchedulerEnv.
+
+Samples learning rate, n_steps, batch size and gamma, trains each configuration
+in a process pool and evaluates it every --eval-interval timesteps. Weak trials
+are pruned early using the intermediate eval reward:
+
+  - median: stop a trial whose reward is below the median of the other trials
+            at the same step (after a warm-up)
+  - asha:   asynchronous successive halving; at each rung (min_steps * eta^k)
+            only the top 1/eta of the trials seen so far at that rung continue
+
+Everything is stored in a local SQLite study, so a sweep can be inspected
+while it runs and resumed (same --study name) later. --time-budget bounds the
+wall-clock time: no new trials start after it and running trials stop at their
+next evaluation.
+
+Usage:
+    python sweep_ppo.py --trials 100 --workers 4 --time-budget 1800
+    python sweep_ppo.py --study pilot --show
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+DEFAULT_DB = "ppo_sweep.db"
+DEFAULT_STUDY = "pilot"
+
+SEARCH_SPACE = {
+    "learning_rate": ("loguniform", 1e-5, 1e-2),
+    "n_steps": ("choice", [64, 128, 256, 512, 1024, 2048]),
+    "batch_size": ("choice", [32, 64, 128, 256]),
+    "gamma": ("choice", [0.9, 0.95, 0.98, 0.99, 0.995, 0.999]),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    study TEXT NOT NULL,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL,          -- running | complete | pruned | timeout | failed
+    best_reward REAL,
+    last_step INTEGER,
+    error TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS reports (
+    trial_id INTEGER NOT NULL,
+    step INTEGER NOT NULL,
+    reward REAL NOT NULL,
+    PRIMARY KEY (trial_id, step)
+);
+CREATE INDEX IF NOT EXISTS idx_trials_study ON trials(study);
+CREATE INDEX IF NOT EXISTS idx_reports_step ON reports(step);
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def sample_params(rng):
+    params = {}
+    for name, (kind, *spec) in SEARCH_SPACE.items():
+        if kind == "loguniform":
+            low, high = spec
+            params[name] = math.exp(rng.uniform(math.log(low), math.log(high)))
+        else:
+            params[name] = rng.choice(spec[0])
+    # SB3 wants n_steps to be a multiple of batch_size (one env).
+    if params["batch_size"] > params["n_steps"]:
+        params["batch_size"] = params["n_steps"]
+    return params
+
+
+# --- Pruners -------------------------------------------------------------
+
+class MedianPruner:
+    def __init__(self, warmup_steps, min_trials=5):
+        self.warmup_steps = warmup_steps
+        self.min_trials = min_trials
+
+    def should_prune(self, conn, study, trial_id, step, reward):
+        if step < self.warmup_steps:
+            return False
+        others = [r for (r,) in conn.execute(
+            "SELECT r.reward FROM reports r JOIN trials t ON t.id = r.trial_id "
+            "WHERE t.study = ? AND r.step = ? AND r.trial_id != ?",
+            (study, step, trial_id),
+        )]
+        if len(others) < self.min_trials:
+            return False
+        return reward < statistics.median(others)
+
+
+class SuccessiveHalvingPruner:
+    def __init__(self, min_steps, eta=3):
+        self.min_steps = min_steps
+        self.eta = eta
+
+    def rung_of(self, step):
+        """Highest rung whose threshold `step` has reached, or None."""
+        if step < self.min_steps:
+            return None
+        return int(math.floor(math.log(step / self.min_steps, self.eta) + 1e-9))
+
+    def should_prune(self, conn, study, trial_id, step, reward):
+        rung = self.rung_of(step)
+        if rung is None:
+            return False
+        threshold = self.min_steps * self.eta ** rung
+        # Only decide once per rung: at the first report that crosses it.
+        prev = conn.execute(
+            "SELECT MAX(step) FROM reports WHERE trial_id = ? AND step < ?",
+            (trial_id, step),
+        ).fetchone()[0]
+        if prev is not None and prev >= threshold:
+            return False
+
+        # Each trial's reward at its first report at or beyond the threshold.
+        rows = conn.execute(
+            "SELECT r.trial_id, r.reward FROM reports r JOIN trials t ON t.id = r.trial_id "
+            "WHERE t.study = ? AND r.step = ("
+            "  SELECT MIN(step) FROM reports WHERE trial_id = r.trial_id AND step >= ?)",
+            (study, threshold),
+        ).fetchall()
+        values = sorted([v for tid, v in rows if tid != trial_id] + [reward], reverse=True)
+        if len(values) < self.eta:
+            return False
+        keep = max(1, len(values) // self.eta)
+        return reward < values[keep - 1]
+
+
+def make_pruner(name, eval_interval, eta):
+    if name == "median":
+        return MedianPruner(warmup_steps=2 * eval_interval)
+    if name == "asha":
+        return SuccessiveHalvingPruner(min_steps=eval_interval, eta=eta)
+    return None
+
+
+# --- Trial worker ---------------------------------------------------------
+
+def evaluate(model, env, episodes):
+    total = 0.0
+    for ep in range(episodes):
+        obs, _ = env.reset(seed=ep)
+        done = False
+        while not done:
+            action, _ = model.predict(obs, deterministic=True)
+            obs, reward, terminated, truncated, _ = env.step(action)
+            total += reward
+            done = terminated or truncated
+    return total / episodes
+
+
+def run_trial(db_path, study, trial_id, params, cfg):
+    """Runs in a pool worker. Returns (trial_id, state, best_reward)."""
+    import torch
+    from stable_baselines3 import PPO
+    from scheduler_env import SchedulerEnv
+
+    # One BLAS/torch thread per worker; the pool provides the parallelism.
+    torch.set_num_threads(1)
+    random.seed(cfg["seed"] + trial_id)
+
+    conn = connect(db_path)
+    pruner = make_pruner(cfg["pruner"], cfg["eval_interval"], cfg["eta"])
+    best, state, step = None, "complete", 0
+    try:
+        env, eval_env = SchedulerEnv(), SchedulerEnv()
+        model = PPO("MlpPolicy", env, verbose=0, seed=cfg["seed"] + trial_id, device="cpu", **params)
+
+        while step < cfg["max_steps"]:
+            step = min(step + cfg["eval_interval"], cfg["max_steps"])
+            # PPO always collects whole rollouts of n_steps, so it may overshoot.
+            model.learn(total_timesteps=max(1, step - model.num_timesteps), reset_num_timesteps=False)
+            reward = evaluate(model, eval_env, cfg["eval_episodes"])
+            best = reward if best is None else max(best, reward)
+
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?)", (trial_id, step, reward))
+                conn.execute("UPDATE trials SET best_reward = ?, last_step = ? WHERE id = ?", (best, step, trial_id))
+
+            if pruner and pruner.should_prune(conn, study, trial_id, step, reward):
+                state = "pruned"
+                break
+            if time.time() > cfg["deadline"]:
+                state = "timeout"
+                break
+        error = None
+    except Exception as e:
+        state, error = "failed", repr(e)
+
+    with conn:
+        conn.execute(
+            "UPDATE trials SET state = ?, error = ?, finished_at = ? WHERE id = ?",
+            (state, error, time.time(), trial_id),
+        )
+    conn.close()
+    return trial_id, state, best
+
+
+# --- Driver ---------------------------------------------------------------
+
+def create_trial(conn, study, params):
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO trials (study, params, state, started_at) VALUES (?, ?, 'running', ?)",
+            (study, json.dumps(params), time.time()),
+        )
+    return cur.lastrowid
+
+
+def show_study(conn, study, top=10):
+    counts = dict(conn.execute("SELECT state, COUNT(*) FROM trials WHERE study = ? GROUP BY state", (study,)).fetchall())
+    print(f"Study '{study}': " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) if counts else f"Study '{study}' is empty")
+    rows = conn.execute(
+        "SELECT id, state, best_reward, last_step, params FROM trials "
+        "WHERE study = ? AND best_reward IS NOT NULL ORDER BY best_reward DESC LIMIT ?",
+        (study, top),
+    ).fetchall()
+    if not rows:
+        return
+    print(f"\n{'trial':>5} {'state':>9} {'reward':>9} {'steps':>7}  params")
+    for tid, state, reward, steps, params in rows:
+        p = json.loads(params)
+        desc = f"lr={p['learning_rate']:.2e} n_steps={p['n_steps']} batch={p['batch_size']} gamma={p['gamma']}"
+        print(f"{tid:>5} {state:>9} {reward:>9.1f} {steps:>7}  {desc}")
+
+
+def sweep(args):
+    conn = connect(args.db)
+    # Trials left "running" by an interrupted sweep will never finish.
+    with conn:
+        conn.execute("UPDATE trials SET state = 'failed', error = 'interrupted' WHERE study = ? AND state = 'running'", (args.study,))
+    done_before = conn.execute("SELECT COUNT(*) FROM trials WHERE study = ?", (args.study,)).fetchone()[0]
+
+    deadline = time.time() + args.time_budget if args.time_budget else float("inf")
+    cfg = {
+        "max_steps": args.max_steps,
+        "eval_interval": args.eval_interval,
+        "eval_episodes": args.eval_episodes,
+        "pruner": args.pruner,
+        "eta": args.eta,
+        "seed": args.seed,
+        "deadline": deadline,
+    }
+    rng = random.Random(args.seed + done_before)
+    remaining = args.trials
+
+    print(f"Sweeping {args.trials} configurations on {args.workers} workers (pruner: {args.pruner})...")
+    start = time.time()
+    running = set()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        while remaining or running:
+            while remaining and len(running) < args.workers and time.time() < deadline:
+                params = sample_params(rng)
+                tid = create_trial(conn, args.study, params)
+                running.add(pool.submit(run_trial, args.db, args.study, tid, params, cfg))
+                remaining -= 1
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                tid, state, best = fut.result()
+                best_txt = f"{best:.1f}" if best is not None else "-"
+                print(f"[{time.time() - start:7.1f}s] trial {tid}: {state} (best eval reward {best_txt})")
+
+    print(f"\nSweep finished in {time.time() - start:.1f}s\n")
+    show_study(conn, args.study)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel PPO hyperparameter sweep on SchedulerEnv")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite study file")
+    parser.add_argument("--study", default=DEFAULT_STUDY, help="Study name (reuse to resume)")
+    parser.add_argument("--trials", type=int, default=100, help="Configurations to try")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel training processes")
+    parser.add_argument("--max-steps", type=int, default=10000, help="Timesteps for a trial that is never pruned")
+    parser.add_argument("--eval-interval", type=int, default=2000, help="Timesteps between evaluations")
+    parser.add_argument("--eval-episodes", type=int, default=5, help="Episodes per evaluation")
+    parser.add_argument("--pruner", choices=["median", "asha", "none"], default="asha")
+    parser.add_argument("--eta", type=int, default=3, help="Reduction factor for successive halving")
+    parser.add_argument("--time-budget", type=float, default=0, help="Wall-clock budget in seconds (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", action="store_true", help="Print the study results and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        conn = connect(args.db)
+        show_study(conn, args.study)
+        conn.close()
+        return
+    sweep(args)
+
+
+if __name__ == "__main__":
+    main()
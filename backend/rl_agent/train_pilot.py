@@ -1,27 +1,173 @@
+import argparse
+import glob
 import os
+import re
 import time
 from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import (
+    BaseCallback,
+    CallbackList,
+    CheckpointCallback,
+    EvalCallback,
+    StopTrainingOnNoModelImprovement,
+)
 from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 from scheduler_env import SchedulerEnv
+from export_policy import policy_to_numpy
+from rollout_store import RolloutWriter
 
-def train():
+SAVE_PATH = "rl_pilot_v1"
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_PREFIX = "rl_pilot"
+CHECKPOINT_RE = re.compile(rf"{CHECKPOINT_PREFIX}_(\d+)_steps\.zip$")
+
+
+class RollingCheckpointCallback(CheckpointCallback):
+    """CheckpointCallback that only keeps the newest `keep_last` checkpoints."""
+
+    def __init__(self, *args, keep_last=3, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keep_last = keep_last
+
+    def _on_step(self):
+        result = super()._on_step()
+        if self.n_calls % self.save_freq == 0 and self.keep_last:
+            for path in list_checkpoints(self.save_path)[:-self.keep_last]:
+                os.remove(path)
+        return result
+
+
+class RecordRolloutsCallback(BaseCallback):
+    """Appends every training transition to a memory-mapped rollout store."""
+
+    def __init__(self, directory, flush_every=1000):
+        super().__init__()
+        self.directory = directory
+        self.flush_every = flush_every
+        self.writer = None
+
+    def _on_training_start(self):
+        self.writer = RolloutWriter(self.directory, obs_shape=self.training_env.observation_space.shape)
+
+    def _on_step(self):
+        # _last_obs is still the observation the actions were taken from.
+        obs = self.model._last_obs
+        new_obs, actions = self.locals["new_obs"], self.locals["actions"]
+        rewards, dones, infos = self.locals["rewards"], self.locals["dones"], self.locals["infos"]
+        for i in range(len(dones)):
+            truncated = bool(infos[i].get("TimeLimit.truncated", False))
+            # On episode end the VecEnv already reset; the real last obs is in info.
+            next_obs = infos[i]["terminal_observation"] if dones[i] else new_obs[i]
+            self.writer.add(obs[i], actions[i], rewards[i], next_obs,
+                            bool(dones[i]) and not truncated, truncated, infos[i])
+        if self.n_calls % self.flush_every == 0:
+            self.writer.flush()
+        return True
+
+    def _on_training_end(self):
+        self.writer.close()
+
+
+def list_checkpoints(directory):
+    """Checkpoint .zip files in `directory`, oldest first (by timestep)."""
+    found = []
+    for path in glob.glob(os.path.join(directory, f"{CHECKPOINT_PREFIX}_*_steps.zip")):
+        match = CHECKPOINT_RE.search(os.path.basename(path))
+        if match:
+            found.append((int(match.group(1)), path))
+    return [path for _, path in sorted(found)]
+
+
+def build_model(env, args):
+    """Fresh PPO model, or the latest checkpoint (policy + optimizer state) with --resume."""
+    checkpoints = list_checkpoints(args.checkpoint_dir) if args.resume else []
+    if checkpoints:
+        latest = checkpoints[-1]
+        # model.save() stores the policy and its Adam optimizer state, so
+        # training continues exactly where the checkpoint left off.
+        model = PPO.load(latest, env=env, verbose=1)
+        print(f"Resuming from {latest} ({model.num_timesteps} timesteps done)")
+        return model
+    if args.resume:
+        print(f"No checkpoint found in {args.checkpoint_dir}/, starting from scratch")
+    return PPO("MlpPolicy", env, verbose=1)
+
+
+def build_callbacks(args):
+    checkpoint = RollingCheckpointCallback(
+        save_freq=args.checkpoint_freq,
+        save_path=args.checkpoint_dir,
+        name_prefix=CHECKPOINT_PREFIX,
+        keep_last=args.keep_checkpoints,
+    )
+
+    # K eval episodes spread over separate env processes. The policy runs in
+    # this process; the workers step their envs in parallel.
+    workers = max(1, min(args.eval_workers, args.eval_episodes))
+    vec_cls = SubprocVecEnv if workers > 1 else DummyVecEnv
+    eval_env = make_vec_env(SchedulerEnv, n_envs=workers, seed=1000, vec_env_cls=vec_cls,
+                            env_kwargs={"instance": args.instance})
+
+    plateau = StopTrainingOnNoModelImprovement(
+        max_no_improvement_evals=args.patience,
+        min_evals=args.min_evals,
+        verbose=1,
+    )
+    evaluation = EvalCallback(
+        eval_env,
+        n_eval_episodes=args.eval_episodes,
+        eval_freq=args.eval_freq,
+        best_model_save_path=args.checkpoint_dir,
+        deterministic=True,
+        callback_after_eval=plateau,
+        verbose=1,
+    )
+    callbacks = [checkpoint, evaluation]
+    if args.record_dir:
+        callbacks.append(RecordRolloutsCallback(args.record_dir))
+    return CallbackList(callbacks), eval_env
+
+
+def train(args):
     print("Initializing Scheduler Simulation Environment...")
-    env = SchedulerEnv()
-    
+    env = SchedulerEnv(args.instance)
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+
     # Instantiate the agent
-    model = PPO("MlpPolicy", env, verbose=1)
-    
-    print("Starting Training (10,000 timesteps)...")
+    model = build_model(env, args)
+    remaining = max(0, args.timesteps - model.num_timesteps)
+    callbacks, eval_env = build_callbacks(args)
+
+    print(f"Starting Training ({remaining:,} of {args.timesteps:,} timesteps)...")
     start_time = time.time()
-    model.learn(total_timesteps=10000)
-    
-    print(f"Training Complete in {time.time() - start_time:.2f}s")
-    
+    try:
+        model.learn(total_timesteps=remaining, callback=callbacks, reset_num_timesteps=not args.resume)
+    except KeyboardInterrupt:
+        path = os.path.join(args.checkpoint_dir, f"{CHECKPOINT_PREFIX}_{model.num_timesteps}_steps")
+        model.save(path)
+        print(f"\nInterrupted. Checkpoint saved to {path}.zip (continue with --resume)")
+        return
+    finally:
+        eval_env.close()
+
+    print(f"Training Complete in {time.time() - start_time:.2f}s ({model.num_timesteps:,} timesteps)")
+
+    # Keep the best evaluated policy rather than the last one
+    best_path = os.path.join(args.checkpoint_dir, "best_model.zip")
+    if os.path.exists(best_path):
+        model = PPO.load(best_path, env=env)
+        print(f"Using best evaluated model from {best_path}")
+
     # Save the model
-    save_path = "rl_pilot_v1"
+    save_path = SAVE_PATH
     model.save(save_path)
     print(f"Model saved to {save_path}.zip")
-    
+
+    # Torch-free copy of the actor for consumers (see policy_numpy.py)
+    policy_to_numpy(model).save(f"{save_path}_policy.npz", source=f"{save_path}.zip")
+    print(f"NumPy policy saved to {save_path}_policy.npz")
+
     # Test the trained agent
     print("\n--- Testing Trained Agent ---")
     obs, _ = env.reset()
@@ -33,8 +179,27 @@ def train():
         env.render()
         if terminated or truncated:
             break
-            
+
     print(f"Test Run Total Reward: {total_reward}")
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the PPO mutation-rate pilot")
+    parser.add_argument("--timesteps", type=int, default=10000, help="Total training timesteps")
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--checkpoint-freq", type=int, default=2000, help="Timesteps between checkpoints")
+    parser.add_argument("--keep-checkpoints", type=int, default=3, help="Checkpoints to keep (0 = all)")
+    parser.add_argument("--eval-freq", type=int, default=1000, help="Timesteps between evaluations")
+    parser.add_argument("--eval-episodes", type=int, default=8, help="Episodes per evaluation")
+    parser.add_argument("--eval-workers", type=int, default=os.cpu_count() or 1, help="Eval env processes")
+    parser.add_argument("--patience", type=int, default=5, help="Evaluations without improvement before stopping")
+    parser.add_argument("--min-evals", type=int, default=3, help="Evaluations before early stopping can trigger")
+    parser.add_argument("--instance", default=None,
+                        help="Train on the real GA: instance bank .npz or 'benchmark' (adds diversity features)")
+    parser.add_argument("--record-dir", default=None, help="Also append training transitions to this rollout store")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    train()
+    train(parse_args())
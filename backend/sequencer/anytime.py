@@ -0,0 +1,204 @@
+"""
+Anytime sequencing: "give me the best you have in 3 seconds".
+
+The worker only reports progress every 10 generations and the sequence at
+`complete`. Here any algorithm of metaheuristics.ALGORITHMS runs in a
+background thread on an evaluator that queues every improving sequence, so
+callers can consume incumbents as they appear:
+
+    solver = AnytimeSolver(instance, max_seconds=3)
+    for inc in solver:
+        show(inc.sequence, inc.cost)        # break / solver.cancel() to stop
+    best = solver.result()
+
+Leaving a sync loop early stops the search. An async generator is only
+closed when it is finalized, so async consumers stop it on exit with the
+solver as an async context manager:
+
+    async with AnytimeSolver(instance, max_seconds=3) as solver:
+        async for inc in solver:
+            show(inc.sequence, inc.cost)    # break: cancelled on leaving the block
+    best = solver.result()
+
+or just `solve(instance, max_seconds=3)` for the final one. The constructive
+heuristics (EDD, nearest neighbour, ATCS) are scored first, so the first
+incumbent arrives within milliseconds. Cancellation is cooperative: the
+search stops at its next evaluation batch.
+
+Usage:
+    python anytime.py --instance benchmark --seconds 3
+    python anytime.py --instance instance_bank/n0500_00.npz --algorithm cls --evals 200000
+"""
+import argparse
+import asyncio
+import queue
+import threading
+from collections import namedtuple
+import numpy as np
+
+from ga import SEEDS
+from instance import Instance
+from metaheuristics import ALGORITHMS, BudgetExhausted, BudgetedEvaluator
+
+DEFAULT_ALGORITHM = "ga"
+
+Incumbent = namedtuple("Incumbent", "sequence cost seconds evaluations")
+
+_DONE = object()
+
+
+class StreamingEvaluator(BudgetedEvaluator):
+    """BudgetedEvaluator that queues each new best sequence and honours a cancel event."""
+
+    def __init__(self, instance, max_seconds=None, max_evaluations=None):
+        super().__init__(instance, max_seconds, max_evaluations)
+        self.cancelled = threading.Event()
+        self.incumbents = queue.Queue()
+
+    def exhausted(self):
+        return self.cancelled.is_set() or super().exhausted()
+
+    def costs(self, perms):
+        improvements = len(self.trace)
+        try:
+            return super().costs(perms)
+        finally:
+            # The best of a truncated last batch counts too.
+            if len(self.trace) > improvements:
+                seconds, evaluations, cost = self.trace[-1]
+                self.incumbents.put(Incumbent(self.best.copy(), cost, seconds, evaluations))
+
+
+class AnytimeSolver:
+    """
+    Runs `algorithm` under a wall-clock and/or evaluation budget (neither:
+    until cancelled) and streams improving incumbents. Iterate it once, sync
+    or async (inside `async with solver:` so an early exit cancels the
+    search); result() waits for the end and returns the best Incumbent.
+    """
+
+    def __init__(self, instance, algorithm=DEFAULT_ALGORITHM, seed=0, max_seconds=None, max_evaluations=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm!r}; choose from {', '.join(ALGORITHMS)}")
+        self.algorithm = algorithm
+        self.seed = seed
+        self.ev = StreamingEvaluator(instance, max_seconds, max_evaluations)
+        self.error = None
+        self._thread = None
+
+    # --- search thread
+
+    def _search(self):
+        fn, restart = ALGORITHMS[self.algorithm]
+        rng = np.random.default_rng(self.seed)
+        ev = self.ev
+        try:
+            ev.costs(np.array([seed(ev, rng) for seed in SEEDS.values()], dtype=np.int32))
+            fn(ev, rng)
+            while restart:
+                fn(ev, rng)
+        except BudgetExhausted:
+            pass
+        except Exception as exc:  # surfaced to the consumer
+            self.error = exc
+        finally:
+            ev.incumbents.put(_DONE)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._search, name=f"anytime-{self.algorithm}", daemon=True)
+            self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the search to stop; it does at its next evaluation batch."""
+        self.ev.cancelled.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- consumers
+
+    def _next(self, item):
+        if item is _DONE:
+            self._thread.join()
+            if self.error is not None:
+                raise self.error
+        return item
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                item = self._next(self.ev.incumbents.get())
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # Closed early (break, exception): stop the search too.
+            self.cancel()
+
+    async def _aiter(self):
+        self.start()
+        try:
+            while True:
+                item = self._next(await asyncio.to_thread(self.ev.incumbents.get))
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            self.cancel()
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc):
+        self.cancel()
+
+    def result(self):
+        """Wait for the search to end and return the best Incumbent (None if nothing was scored)."""
+        self.start()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        ev = self.ev
+        if ev.best is None:
+            return None
+        seconds, evaluations, _ = ev.trace[-1]
+        return Incumbent(ev.best.copy(), ev.best_cost, seconds, evaluations)
+
+
+def solve(instance, max_seconds=None, max_evaluations=None, algorithm=DEFAULT_ALGORITHM, seed=0):
+    """Best Incumbent found within the budget."""
+    if max_seconds is None and max_evaluations is None:
+        raise ValueError("a time or evaluation budget is required")
+    return AnytimeSolver(instance, algorithm, seed, max_seconds, max_evaluations).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anytime sequencing with streamed incumbents")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--algorithm", default=DEFAULT_ALGORITHM, choices=list(ALGORITHMS))
+    parser.add_argument("--seconds", type=float, default=None, help="Wall-clock budget")
+    parser.add_argument("--evals", type=int, default=None, help="Evaluation budget")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.seconds is None and args.evals is None:
+        args.seconds = 3.0
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    solver = AnytimeSolver(inst, args.algorithm, args.seed, args.seconds, args.evals)
+    print(f"{inst}: {args.algorithm}, budget {args.seconds or '-'}s / {args.evals or '-'} evaluations")
+    for inc in solver:
+        print(f"  {inc.seconds:>8.3f}s {inc.evaluations:>10,} evals  cost {inc.cost:>16,.2f}")
+    best = solver.result()
+    if best is not None:
+        print(f"Best {best.cost:,.2f} after {solver.ev.evaluations:,} evaluations in {solver.ev.elapsed():.2f}s")
+
+
+if __name__ == "__main__":
+    main()
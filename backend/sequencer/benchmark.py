@@ -0,0 +1,269 @@
+"""
+Leaderboard for the sequencing metaheuristics (metaheuristics.py), the
+repeatable version of scripts/benchmark_sequencer.js.
+
+Every algorithm runs on every instance with several seeds under the same
+time or evaluation budget, in parallel worker processes. Each run records its
+best cost, evaluations/sec and improvement trace; time-to-target is measured
+against the best cost known for the instance (this run and the previous one).
+Results are written to benchmark_results/<timestamp>.json and the leaderboard
+is compared with the previous results file to flag regressions.
+
+Usage:
+    python benchmark.py --time 5 --seeds 3
+    python benchmark.py --bank instance_bank --max-n 200 --evals 200000 --algorithms vns tabu ga
+    python benchmark.py --instance benchmark --instance my_case.npz --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from instance import Instance
+from instance_bank import DEFAULT_BANK, InstanceBank
+from metaheuristics import ALGORITHMS, run_algorithm
+
+DEFAULT_RESULTS = "benchmark_results"
+DEFAULT_TARGET_GAP = 1.0  # % above the best known cost that counts as reaching the target
+DEFAULT_TOLERANCE = 1.0  # % worse mean cost than the previous run that counts as a regression
+
+
+def fingerprint(instance):
+    """Stable id of an instance's data, so runs can be compared across files and renames."""
+    h = hashlib.sha1()
+    for arr in (instance.quantity, instance.daily_sales, instance.stock_days,
+                instance.production_days, instance.family, instance.setup_hours):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    h.update(json.dumps(instance.params, sort_keys=True).encode())
+    return h.hexdigest()[:12]
+
+
+def load_spec(spec):
+    return Instance.from_benchmark_json() if spec == "benchmark" else Instance.load(spec)
+
+
+def collect_instances(args):
+    """[(spec, instance)] from --instance and --bank; spec is what a worker reloads."""
+    specs = list(args.instance or [])
+    if args.bank:
+        bank = InstanceBank(args.bank)
+        specs += [os.path.join(args.bank, e["file"]) for e in bank.entries(args.min_n, args.max_n)]
+    if not specs:
+        specs = ["benchmark"]
+    return [(spec, load_spec(spec)) for spec in specs]
+
+
+def run_job(job):
+    """Worker process: one (algorithm, instance, seed) run."""
+    ev = run_algorithm(job["algorithm"], load_spec(job["spec"]), job["seed"],
+                       max_seconds=job["max_seconds"], max_evaluations=job["max_evaluations"])
+    seconds = ev.elapsed()
+    return {
+        "algorithm": job["algorithm"],
+        "instance": job["instance"],
+        "seed": job["seed"],
+        "best_cost": ev.best_cost,
+        "best": ev.best.tolist() if ev.best is not None else None,
+        "evaluations": ev.evaluations,
+        "seconds": seconds,
+        "evals_per_sec": ev.evaluations / seconds if seconds > 0 else 0.0,
+        "trace": ev.trace,
+    }
+
+
+def time_to_target(trace, target):
+    """(seconds, evaluations) of the first improvement at or below `target`, or None."""
+    for seconds, evaluations, cost in trace:
+        if cost <= target:
+            return seconds, evaluations
+    return None
+
+
+# --- results files ------------------------------------------------------------
+
+def previous_results(results_dir, compare=None):
+    if compare:
+        path = compare
+    else:
+        files = sorted(glob.glob(os.path.join(results_dir, "*.json")))
+        if not files:
+            return None
+        path = files[-1]
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["path"] = path
+    return data
+
+
+def write_results(results_dir, data):
+    os.makedirs(results_dir, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+    path = os.path.join(results_dir, stamp + ".json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+    return path
+
+
+def best_known(runs, previous):
+    """Lowest cost per instance over this run and the previous results file."""
+    best = {}
+    if previous:
+        for key, entry in previous.get("best_known", {}).items():
+            best[key] = dict(entry)
+    for r in runs:
+        if r["best"] is not None and (r["instance"] not in best or r["best_cost"] < best[r["instance"]]["cost"]):
+            best[r["instance"]] = {"cost": r["best_cost"], "algorithm": r["algorithm"],
+                                   "seed": r["seed"], "sequence": r["best"]}
+    return best
+
+
+# --- leaderboard --------------------------------------------------------------
+
+def summarize(runs, best, target_gap):
+    """Per-algorithm aggregates; also fills gap / time_to_target into each run."""
+    by_instance = {}
+    for r in runs:
+        ref = best[r["instance"]]["cost"]
+        r["gap"] = 100 * (r["best_cost"] - ref) / ref if ref > 0 else 0.0
+        hit = time_to_target(r["trace"], ref * (1 + target_gap / 100))
+        r["time_to_target"] = hit[0] if hit else None
+        r["evals_to_target"] = hit[1] if hit else None
+        by_instance.setdefault((r["instance"], r["seed"]), []).append(r)
+
+    # Rank algorithms within each (instance, seed); ties share the better rank.
+    for group in by_instance.values():
+        costs = sorted(r["best_cost"] for r in group)
+        for r in group:
+            r["rank"] = costs.index(r["best_cost"]) + 1
+
+    summary = {}
+    for name in dict.fromkeys(r["algorithm"] for r in runs):
+        rs = [r for r in runs if r["algorithm"] == name]
+        hits = [r["time_to_target"] for r in rs if r["time_to_target"] is not None]
+        summary[name] = {
+            "runs": len(rs),
+            "mean_gap": float(np.mean([r["gap"] for r in rs])),
+            "mean_rank": float(np.mean([r["rank"] for r in rs])),
+            "wins": sum(r["rank"] == 1 for r in rs),
+            "hit_rate": len(hits) / len(rs),
+            "median_time_to_target": float(np.median(hits)) if hits else None,
+            "evals_per_sec": float(np.mean([r["evals_per_sec"] for r in rs])),
+            "mean_cost": {key: float(np.mean([r["best_cost"] for r in rs if r["instance"] == key]))
+                          for key in dict.fromkeys(r["instance"] for r in rs)},
+        }
+    return summary
+
+
+def compare(summary, previous, budget, tolerance):
+    """Per-algorithm change vs the previous run on the instances both share."""
+    if not previous:
+        return {}
+    old = previous.get("summary", {})
+    deltas = {}
+    for name, s in summary.items():
+        if name not in old:
+            continue
+        shared = [k for k in s["mean_cost"] if k in old[name]["mean_cost"]]
+        if not shared:
+            continue
+        change = float(np.mean([100 * (s["mean_cost"][k] - old[name]["mean_cost"][k]) / old[name]["mean_cost"][k]
+                                for k in shared if old[name]["mean_cost"][k] > 0] or [0.0]))
+        speed = 100 * (s["evals_per_sec"] - old[name]["evals_per_sec"]) / old[name]["evals_per_sec"] \
+            if old[name]["evals_per_sec"] else 0.0
+        deltas[name] = {"cost_change": change, "speed_change": speed, "instances": len(shared),
+                        "regression": change > tolerance}
+    if previous.get("budget") != budget:
+        print(f"Note: budget differs from {previous['path']} ({previous.get('budget')}), "
+              f"comparison is indicative only")
+    return deltas
+
+
+def print_leaderboard(summary, deltas, previous):
+    since = f" vs {os.path.basename(previous['path'])}" if previous else ""
+    print(f"\n{'#':>2} {'algorithm':<9} {'gap %':>8} {'rank':>5} {'wins':>5} {'hit %':>6} "
+          f"{'ttt s':>7} {'evals/s':>10}  {'change' + since}")
+    ordered = sorted(summary.items(), key=lambda kv: (kv[1]["mean_gap"], kv[1]["mean_rank"]))
+    for pos, (name, s) in enumerate(ordered, 1):
+        ttt = f"{s['median_time_to_target']:.2f}" if s["median_time_to_target"] is not None else "-"
+        d = deltas.get(name)
+        change = ""
+        if d:
+            change = f"cost {d['cost_change']:+.2f}%  speed {d['speed_change']:+.0f}%"
+            if d["regression"]:
+                change += "  REGRESSION"
+        print(f"{pos:>2} {name:<9} {s['mean_gap']:>8.3f} {s['mean_rank']:>5.2f} {s['wins']:>5} "
+              f"{100 * s['hit_rate']:>6.0f} {ttt:>7} {s['evals_per_sec']:>10,.0f}  {change}")
+    regressions = [name for name, d in deltas.items() if d["regression"]]
+    if regressions:
+        print(f"\nRegressions (> tolerance): {', '.join(regressions)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sequencing metaheuristics")
+    parser.add_argument("--instance", action="append", help="Instance .npz or 'benchmark' (repeatable)")
+    parser.add_argument("--bank", nargs="?", const=DEFAULT_BANK, default=None, help="Run on an instance bank directory")
+    parser.add_argument("--min-n", type=int, default=0)
+    parser.add_argument("--max-n", type=int, default=None)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument("--seeds", type=int, default=3, help="Seeds per (algorithm, instance)")
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument("--time", type=float, default=None, help="Seconds per run")
+    budget.add_argument("--evals", type=int, default=None, help="Evaluations per run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel runs")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="Results directory")
+    parser.add_argument("--compare", default=None, help="Results file to compare with (default: latest)")
+    parser.add_argument("--target-gap", type=float, default=DEFAULT_TARGET_GAP, help="Target: %% above best known")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Regression threshold in %%")
+    parser.add_argument("--no-save", action="store_true", help="Print the leaderboard without writing results")
+    args = parser.parse_args()
+    if args.time is None and args.evals is None:
+        args.time = 5.0
+    budget = {"seconds": args.time, "evaluations": args.evals}
+
+    instances = collect_instances(args)
+    keys = {spec: fingerprint(inst) for spec, inst in instances}
+    jobs = [{"algorithm": name, "spec": spec, "instance": keys[spec], "seed": seed,
+             "max_seconds": args.time, "max_evaluations": args.evals}
+            for spec, _ in instances for name in args.algorithms for seed in range(args.seeds)]
+    limit = f"{args.time:g}s" if args.time is not None else f"{args.evals:,} evaluations"
+    print(f"{len(args.algorithms)} algorithms x {len(instances)} instances x {args.seeds} seeds = "
+          f"{len(jobs)} runs of {limit} on {args.workers} workers")
+
+    runs = []
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            runs.append(future.result())
+            if done % max(1, len(jobs) // 10) == 0 or done == len(jobs):
+                print(f"  {done}/{len(jobs)} runs ({time.time() - start:.0f}s)")
+
+    previous = previous_results(args.results, args.compare) if (args.compare or os.path.isdir(args.results)) else None
+    best = best_known(runs, previous)
+    summary = summarize(runs, best, args.target_gap)
+    deltas = compare(summary, previous, budget, args.tolerance)
+    print_leaderboard(summary, deltas, previous)
+
+    if not args.no_save:
+        data = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "budget": budget,
+            "target_gap": args.target_gap,
+            "instances": {keys[spec]: {"spec": spec, "name": inst.name, "n": len(inst)} for spec, inst in instances},
+            "best_known": best,
+            "summary": summary,
+            "comparison": deltas,
+            "runs": [{k: v for k, v in r.items() if k != "best"} for r in runs],
+        }
+        print(f"\nResults written to {write_results(args.results, data)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Lower bounds on the sequencing objective, and optimality-gap early stopping.
+
+The objective (evaluation.py) before the clamp at 0 is
+
+    lost_weight * lost_sales + sum over consecutive pairs of edge(a, b)
+
+with edge = (1 - w) * costoHora * changeover - bonus * same_family. The two
+parts are bounded separately and added:
+
+  changeovers  assignment relaxation: every item but the first has exactly
+               one predecessor and every item at most one successor, which a
+               Hamiltonian path from item 0 satisfies, so the optimal
+               assignment of successors costs no more than any sequence. The
+               assignment happily closes cycles inside a family, so the
+               family entry/exit bound is taken when it is higher.
+  lost sales   lower bounds on start times, from the shortest production
+               runs (SPT slots) and from the cheapest changeovers into each
+               family. Matching items (or whole families) to those starts,
+               EDD order when the weights are equal, costs no more than any
+               sequence.
+
+The exact subset bound from exact.py is valid too, so lower_bound() keeps the
+larger of the two.
+
+Usage:
+    python bounds.py --instance benchmark
+    python bounds.py --instance instance_bank/n0200_00.npz --generations 500 --target-gap 2
+    python bounds.py --instance instance_bank/n0050_00.npz --check 200
+"""
+import argparse
+import time
+import numpy as np
+
+from evaluation import Evaluator, LOST_SALES_EXPONENT
+from instance import Instance
+
+DEFAULT_TARGET_GAP = 1.0  # % above the lower bound at which the search stops
+MAX_MATCHED_ITEMS = 500  # items matched to start slots in the lost-sales bound
+CHECK_SAMPLES = 200  # --check: random sub-instances compared with Held-Karp
+CHECK_SIZES = (4, 9)  # --check: items besides item 0 in each sub-instance
+
+
+def assignment(cost):
+    """
+    Minimum-cost perfect assignment of a square matrix (Hungarian method,
+    shortest augmenting paths with potentials). Returns (columns per row, cost).
+    """
+    n = len(cost)
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    p = np.zeros(n + 1, dtype=np.int64)  # p[j]: row matched to column j (1-based, 0 = free)
+    way = np.zeros(n + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.empty(n, dtype=np.int64)
+    cols[p[1:] - 1] = np.arange(n)
+    return cols, float(cost[np.arange(n), cols].sum())
+
+
+def edge_costs(evaluator):
+    """Objective contribution of putting b right after a."""
+    setup_weight = (1 - evaluator.weight) * evaluator.cost_setup
+    return setup_weight * evaluator.item_setup - evaluator.bonus * evaluator.same_family
+
+
+def changeover_bound(evaluator):
+    """
+    Assignment relaxation of the path from item 0. A dummy node takes the
+    successor slot of the last item and precedes item 0, so each real item has
+    one predecessor and one successor in the relaxed problem.
+    """
+    n = evaluator.n
+    if n <= 1:
+        return 0.0
+    edge = edge_costs(evaluator)
+    big = 1e3 * (np.abs(edge).max() + 1) * n
+    cost = np.zeros((n + 1, n + 1))
+    cost[:n, :n] = edge
+    cost[np.arange(n), np.arange(n)] = big  # no self loops
+    cost[:n, 0] = big  # nothing precedes item 0 ...
+    cost[n, 0] = 0.0  # ... except the dummy
+    cost[n, 1:n] = big
+    cost[n, n] = big
+    _, total = assignment(cost)
+    return total
+
+
+def family_edge_bound(evaluator):
+    """
+    Edge-sum bound from families: the first item of every family but item 0's
+    is entered from outside it, and the last item of every family but the one
+    the sequence ends in leaves it. Other items move at least as cheaply as
+    the cheapest move into (out of) them. The larger of the two sums.
+    """
+    fam = evaluator.instance.family
+    edge = edge_costs(evaluator).copy()
+    np.fill_diagonal(edge, np.inf)
+    incoming = outgoing = 0.0
+    exits = []
+    for f in np.unique(fam):
+        members = fam == f
+        others = ~members
+        enter = edge[others][:, members].min() if others.any() else np.inf
+        leave = edge[members][:, others].min() if others.any() else np.inf
+        inside = edge[members][:, members].min() if members.sum() > 1 else np.inf
+        # Incoming edges: every item but item 0.
+        count = int(members[1:].sum())
+        if count:
+            cheapest = min(inside, enter)
+            incoming += cheapest * count if f == fam[0] else enter + cheapest * (count - 1)
+        # Outgoing edges: every item but the last of the sequence.
+        count = int(members.sum())
+        cheapest = min(inside, leave)
+        if np.isfinite(leave):
+            outgoing += leave + cheapest * (count - 1)
+            exits.append(leave)
+        elif count > 1:
+            outgoing += cheapest * (count - 1)
+    # The family the sequence ends in is never left.
+    outgoing -= max(exits, default=0.0)
+    return float(max(incoming, outgoing))
+
+
+def slot_starts(evaluator):
+    """Earliest start of the k-th item after item 0: item 0 plus the k - 1 shortest runs."""
+    p = evaluator.production
+    rest = np.sort(p[1:])
+    return p[0] + np.concatenate([[0.0], np.cumsum(rest)[:-1]])
+
+
+def family_entries(evaluator):
+    """
+    (families other than item 0's, cheapest changeover into each from outside
+    it, shortest run in each). Unknown-family items change over in 0 h, so
+    they make every entry free.
+    """
+    fam, setup, p = evaluator.instance.family, evaluator.item_setup, evaluator.production
+    families = [f for f in np.unique(fam[1:]) if f != fam[0]]
+    entry = np.array([setup[fam != f][:, fam == f].min() for f in families])
+    shortest = np.array([p[fam == f].min() for f in families])
+    return np.array(families), entry, shortest
+
+
+def _matched_lost(weights, due, starts, release):
+    """
+    Least sum of weights * max(0, start - due) ** 1.2 over matchings of items to
+    `starts` (as many as items, ascending), no item starting before its
+    release. Earliest due date to the earliest start is optimal when the
+    weights are equal and no release binds; otherwise solve the assignment.
+    """
+    if np.all(weights == weights[0]) and np.all(release <= starts[0]):
+        delay = np.maximum(0.0, starts - np.sort(due))
+        return float(weights[0] * np.power(delay, LOST_SALES_EXPONENT).sum())
+    delay = np.maximum(0.0, np.maximum(starts[None, :], release[:, None]) - due[:, None])
+    _, lost = assignment(weights[:, None] * np.power(delay, LOST_SALES_EXPONENT))
+    return lost
+
+
+def lost_sales_bound(evaluator, max_items=MAX_MATCHED_ITEMS):
+    """
+    Lost sales (units, before costoTn) no sequence can beat; the larger of two
+    bounds on the start times:
+
+      item slots     the k-th item starts after item 0 and the k - 1 shortest
+                     runs, and no item of another family than item 0 starts
+                     before the cheapest changeover into its family;
+      family order   the j-th family entered starts after j entry changeovers
+                     and one run of each family entered before it.
+    """
+    sales, stock = evaluator.sales, evaluator.stock
+    fam = evaluator.instance.family
+    first = np.maximum(0.0, -stock[0]) ** LOST_SALES_EXPONENT * sales[0]
+    if evaluator.n <= 1:
+        return float(first)
+    p0 = evaluator.production[0]
+    families, entry, shortest = family_entries(evaluator)
+    release = np.full(evaluator.n, p0)
+    for f, e in zip(families, entry):
+        release[fam == f] += e
+
+    slots = slot_starts(evaluator)
+    items = np.arange(1, evaluator.n)
+    # Items that are not late even in the last slot cost nothing anywhere and keep the later slots.
+    risk = items[(stock[items] < np.maximum(slots[-1], release[items])) & (sales[items] > 0)]
+    item_bound = 0.0
+    if len(risk):
+        if len(risk) > max_items:
+            # Any subset of the items is a valid bound too: keep the ones that can cost most.
+            worst = sales[risk] * np.maximum(0.0, slots[max_items - 1] - stock[risk]) ** LOST_SALES_EXPONENT
+            risk = risk[np.argsort(-worst, kind="stable")[:max_items]]
+        item_bound = _matched_lost(sales[risk], stock[risk], slots[:len(risk)], release[risk])
+
+    family_bound = 0.0
+    if len(families):
+        order = np.argsort(entry)
+        entered = p0 + np.cumsum(entry[order]) + np.concatenate([[0.0], np.cumsum(np.sort(shortest))[:-1]])
+        cost = np.zeros((len(families), len(families)))
+        for row, f in enumerate(families):
+            members = fam == f
+            delay = np.maximum(0.0, entered[None, :] - stock[members][:, None])
+            cost[row] = (sales[members][:, None] * np.power(delay, LOST_SALES_EXPONENT)).sum(axis=0)
+        _, family_bound = assignment(cost)
+    return float(first + max(item_bound, family_bound))
+
+
+def relaxation_bound(instance):
+    """Assignment + lost-sales bound, clamped at 0 like the objective."""
+    ev = Evaluator(instance)
+    changeover = max(changeover_bound(ev), family_edge_bound(ev))
+    lost = lost_sales_bound(ev)
+    return {
+        "lower_bound": max(0.0, ev.weight * ev.cost_lost * lost + changeover),
+        "changeover_part": changeover,
+        "lost_sales_units": lost,
+    }
+
+
+def lower_bound(instance, exact_subset=True):
+    """Best available lower bound and the pieces it came from."""
+    start = time.perf_counter()
+    result = relaxation_bound(instance)
+    result["source"] = "relaxation"
+    if exact_subset:
+        from exact import solve
+        exact = solve(instance)
+        if exact["lower_bound"] > result["lower_bound"]:
+            result["lower_bound"] = exact["lower_bound"]
+            result["source"] = "exact" if exact["optimal"] else "exact subset"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def gap(incumbent, bound):
+    """Optimality gap in %: how much cheaper than `incumbent` a sequence could still be."""
+    if incumbent <= 0:
+        return 0.0
+    return 100.0 * max(0.0, incumbent - bound) / incumbent
+
+
+class GapStopper:
+    """
+    GeneticAlgorithm.run callback: records the gap every generation and stops
+    the run once it is at or below `target_gap` (%).
+    """
+
+    def __init__(self, bound, target_gap=DEFAULT_TARGET_GAP):
+        self.bound = bound
+        self.target_gap = target_gap
+        self.history = []
+
+    def __call__(self, ga):
+        g = gap(ga.best_cost, self.bound)
+        self.history.append(g)
+        return g > self.target_gap
+
+    @property
+    def last(self):
+        return self.history[-1] if self.history else None
+
+
+def check_bounds(instance, samples=CHECK_SAMPLES, sizes=CHECK_SIZES, seed=0):
+    """
+    Compare the bounds with the Held-Karp optimum of random sub-instances
+    (item 0 plus `sizes` others), with their sales and with sales zeroed so
+    only changeovers count. Returns the violations as (bound, value, optimum, items).
+    """
+    from exact import held_karp
+    rng = np.random.default_rng(seed)
+    violations = []
+    for _ in range(samples):
+        size = int(rng.integers(sizes[0], sizes[1] + 1))
+        items = np.concatenate([[0], rng.choice(np.arange(1, len(instance)), size=size, replace=False)])
+        sub = instance.subset(items)
+        no_sales = instance.subset(items)
+        no_sales.daily_sales = np.zeros(len(items))
+        for case in (sub, no_sales):
+            optimum = held_karp(case, max_items=sizes[1])["cost"]
+            ev = Evaluator(case)
+            checks = {
+                "family_edge": family_edge_bound(ev),
+                "changeover": changeover_bound(ev),
+                "relaxation": relaxation_bound(case)["lower_bound"],
+            }
+            for name, value in checks.items():
+                if value > optimum + 1e-6 * max(1.0, optimum):
+                    violations.append((name, value, optimum, items))
+    return violations
+
+
+def main():
+    from ga import GeneticAlgorithm
+
+    parser = argparse.ArgumentParser(description="Lower bounds and gap-based early stopping")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--generations", type=int, default=250, help="GA generations at most (0 = bound only)")
+    parser.add_argument("--target-gap", type=float, default=DEFAULT_TARGET_GAP, help="Stop at this gap in %%")
+    parser.add_argument("--no-exact", action="store_true", help="Skip the exact subset bound")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", type=int, default=0, metavar="SAMPLES",
+                        help="Check the bounds against Held-Karp on this many random sub-instances")
+    args = parser.parse_args()
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    if args.check:
+        violations = check_bounds(inst, args.check, seed=args.seed)
+        for name, value, optimum, items in violations[:10]:
+            print(f"  {name} bound {value:,.2f} > optimum {optimum:,.2f} for items {items.tolist()}")
+        print(f"{inst}: {len(violations)} bounds above the optimum in {args.check} sub-instances "
+              f"(with and without sales)")
+        if violations:
+            raise SystemExit(1)
+        return
+    bound = lower_bound(inst, exact_subset=not args.no_exact)
+    print(f"{inst}")
+    print(f"Lower bound {bound['lower_bound']:,.2f} ({bound['source']}) in {bound['seconds']:.2f}s: "
+          f"changeover part {bound['changeover_part']:,.2f}, lost sales >= {bound['lost_sales_units']:,.2f} units")
+    if not args.generations:
+        return
+
+    ga = GeneticAlgorithm(inst, seed=args.seed)
+    stopper = GapStopper(bound["lower_bound"], args.target_gap)
+    start = time.perf_counter()
+    ga.run(args.generations, callback=stopper)
+    elapsed = time.perf_counter() - start
+    stopped = ga.generation < args.generations
+    print(f"GA: best {ga.best_cost:,.2f} after {ga.generation} generations in {elapsed:.2f}s, "
+          f"gap {stopper.last:.2f}%" + (f" (stopped early, target {args.target_gap}%)" if stopped else ""))
+
+
+if __name__ == "__main__":
+    main()
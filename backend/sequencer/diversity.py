@@ -0,0 +1,111 @@
+import numpy as np
+
+# Population diversity kept up to date incrementally.
+#
+# Two packed count matrices describe the whole population:
+#   position[item, pos]  how many individuals have `item` at `pos`
+#   edge[a, b]           how many individuals have `b` right after `a`
+# Adding or removing one permutation touches N cells of each (O(N)), and the
+# metrics only need two running sums over those cells, so they are O(1) to
+# read instead of the O(P^2 * N) pairwise comparison.
+#
+#   position_diversity  mean pairwise Hamming distance of positions / (N - 1)
+#                       (position 0 is fixed, so N - 1 is the maximum)
+#   edge_entropy        Shannon entropy of the adjacency-edge distribution,
+#                       normalised by its maximum for this population size
+#   distinct_ratio      distinct permutations / individuals (among `slots`,
+#                       e.g. the elite, or the whole population)
+
+
+def _xlogx(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x > 0, x * np.log(np.maximum(x, 1)), 0.0)
+
+
+class PopulationDiversity:
+    def __init__(self, n_items, capacity):
+        self.n = n_items
+        self.capacity = capacity
+        self.position = np.zeros((n_items, n_items), dtype=np.int32)
+        self.edge = np.zeros((n_items, n_items), dtype=np.int32)
+        self.members = np.full((capacity, n_items), -1, dtype=np.int32)
+        self.hashes = [None] * capacity
+        self.size = 0
+        self._cols = np.arange(n_items)
+        # sum over position cells of c * (c - 1): ordered pairs sharing a position
+        self.position_pairs = 0
+        # sum over edge cells of e * log(e)
+        self.edge_xlogx = 0.0
+
+    def add(self, slot, perm):
+        perm = np.asarray(perm, dtype=np.int32)
+        if self.hashes[slot] is not None:
+            self.remove(slot)
+        pos = self.position[perm, self._cols]
+        self.position_pairs += 2 * int(pos.sum())
+        self.position[perm, self._cols] = pos + 1
+
+        a, b = perm[:-1], perm[1:]
+        e = self.edge[a, b]
+        self.edge_xlogx += float((_xlogx(e + 1) - _xlogx(e)).sum())
+        self.edge[a, b] = e + 1
+
+        self.members[slot] = perm
+        self.hashes[slot] = hash(perm.tobytes())
+        self.size += 1
+
+    def remove(self, slot):
+        if self.hashes[slot] is None:
+            return
+        perm = self.members[slot]
+        pos = self.position[perm, self._cols]
+        self.position_pairs -= 2 * int((pos - 1).sum())
+        self.position[perm, self._cols] = pos - 1
+
+        a, b = perm[:-1], perm[1:]
+        e = self.edge[a, b]
+        self.edge_xlogx -= float((_xlogx(e) - _xlogx(e - 1)).sum())
+        self.edge[a, b] = e - 1
+
+        self.members[slot] = -1
+        self.hashes[slot] = None
+        self.size -= 1
+
+    def replace(self, slot, perm):
+        self.add(slot, perm)
+
+    def resync(self):
+        """Recompute the running sums from the count matrices (float drift guard)."""
+        c = self.position.astype(np.int64)
+        self.position_pairs = int((c * (c - 1)).sum())
+        self.edge_xlogx = float(_xlogx(self.edge).sum())
+
+    # --- metrics ------------------------------------------------------------
+
+    def position_diversity(self):
+        p = self.size
+        if p < 2 or self.n < 2:
+            return 0.0
+        shared = self.position_pairs / (p * (p - 1))
+        return float((self.n - shared) / (self.n - 1))
+
+    def edge_entropy(self):
+        p = self.size
+        if p == 0 or self.n < 3:
+            return 0.0
+        total = p * (self.n - 1)
+        entropy = np.log(total) - self.edge_xlogx / total
+        max_entropy = np.log(min(total, self.n * (self.n - 1)))
+        return float(entropy / max_entropy) if max_entropy > 0 else 0.0
+
+    def distinct_ratio(self, slots=None):
+        hashes = [h for h in (self.hashes if slots is None else (self.hashes[s] for s in slots)) if h is not None]
+        return len(set(hashes)) / len(hashes) if hashes else 0.0
+
+    def features(self, elite_slots=None):
+        """[position_diversity, edge_entropy, distinct_ratio] as float32, all in [0, 1]."""
+        return np.array([
+            self.position_diversity(),
+            self.edge_entropy(),
+            self.distinct_ratio(elite_slots),
+        ], dtype=np.float32)
@@ -0,0 +1,84 @@
+import numpy as np
+
+# NumPy port of calcularValores + evaluar (src/utils/sequencerWorker.ts) for
+# sequences where every item appears once (sublote 1, the only case the worker
+# builds). Under that assumption stockActual[sku] is still diasStock[sku] when
+# the item starts and diasFabPonderado is diasFabricacion[sku], so the whole
+# sequence reduces to cumulative sums:
+#
+#   start_i   = sum(changeover_0..i) + sum(production_0..i-1)
+#   lost      = sum(max(0, start_i - stock_i) ** 1.2 * daily_sales_i)
+#   objective = max(0, w * lost * costoTn + (1 - w) * changeover * costoHora - bonus)
+#
+# The worker adds changeover hours and production days onto the same clock;
+# that is kept as is so costs match the app.
+
+LOST_SALES_EXPONENT = 1.2
+CONTINUITY_BONUS_SHARE = 0.1  # of costoHoraCambio, per consecutive same-family pair
+
+
+class Evaluator:
+    def __init__(self, instance):
+        self.instance = instance
+        self.n = len(instance)
+        fam = instance.family
+        # Pairwise item -> item changeover hours, 0 when either family is unknown
+        # (the worker's `fromIdx !== -1 && toIdx !== -1` check).
+        known = fam >= 0
+        safe = np.where(known, fam, 0)
+        item_setup = instance.setup_hours[np.ix_(safe, safe)] if len(instance.setup_hours) else np.zeros((self.n, self.n))
+        item_setup = np.where(known[:, None] & known[None, :], item_setup, 0.0)
+        self.item_setup = np.ascontiguousarray(item_setup)
+        self.same_family = fam[:, None] == fam[None, :]
+        self.production = instance.production_days
+        self.stock = instance.stock_days
+        self.sales = instance.daily_sales
+        self.weight = instance.sales_weight
+        self.cost_lost = instance.cost_lost_ton
+        self.cost_setup = instance.cost_setup_hour
+        self.bonus = self.cost_setup * CONTINUITY_BONUS_SHARE
+        self.evaluations = 0
+
+    def components(self, perms):
+        """(changeover hours, lost-sales units, same-family pairs) for a (P, N) batch."""
+        perms = np.atleast_2d(perms)
+        prev, nxt = perms[:, :-1], perms[:, 1:]
+        setup = self.item_setup[prev, nxt]
+        starts = np.cumsum(setup, axis=1)
+        starts += np.cumsum(self.production[perms[:, :-1]], axis=1)
+        # First item starts at t=0; the rest after their changeover.
+        delay = np.maximum(0.0, starts - self.stock[nxt])
+        lost = (np.power(delay, LOST_SALES_EXPONENT) * self.sales[nxt]).sum(axis=1)
+        first_delay = np.maximum(0.0, -self.stock[perms[:, 0]])
+        lost += np.power(first_delay, LOST_SALES_EXPONENT) * self.sales[perms[:, 0]]
+        pairs = self.same_family[prev, nxt].sum(axis=1)
+        self.evaluations += len(perms)
+        return setup.sum(axis=1), lost, pairs
+
+    def costs(self, perms):
+        """Objective (valorObjetivo, lower is better) for a (P, N) batch."""
+        changeover, lost, pairs = self.components(perms)
+        value = self.weight * lost * self.cost_lost + (1 - self.weight) * changeover * self.cost_setup
+        return np.maximum(0.0, value - pairs * self.bonus)
+
+    def cost(self, perm):
+        return float(self.costs(np.asarray(perm)[None])[0])
+
+    def breakdown(self, perm):
+        """The fields of the worker's `complete` message for one sequence."""
+        perm = np.asarray(perm)
+        changeover, lost, _ = self.components(perm[None])
+        changeover, lost = float(changeover[0]), float(lost[0])
+        setup = np.concatenate([[0.0], self.item_setup[perm[:-1], perm[1:]]])
+        cost_vp = lost * self.cost_lost
+        cost_tc = changeover * self.cost_setup
+        return {
+            "tiempoTotalCambio": changeover,
+            "ventaPerdidaTotal": lost,
+            "tiempoProduccionTotal": float(self.production.sum()),
+            "costoVentaPerdida": cost_vp,
+            "costoTiempoCambio": cost_tc,
+            "costoTotal": cost_vp + cost_tc,
+            "tiemposCambio": setup.tolist(),
+            "objetivo": self.cost(perm),
+        }
@@ -0,0 +1,279 @@
+"""
+Exact Held-Karp solver for small sequencing instances, and a lower bound for
+the rest from an exactly solved subset.
+
+The objective (evaluation.py) is not a plain TSP: an item's lost sales depend
+on its start time, i.e. on every changeover and production run before it. So
+each DP state (set of items already sequenced, last item) keeps a Pareto front
+of labels (end time, cost so far). A label dominates another of the same state
+when it ends no later and costs no more: everything still to come only gets
+worse with a later start, so the dominated label can never finish cheaper.
+Layers are processed by subset size, vectorised over all labels of a layer.
+
+Usage:
+    python exact.py --instance benchmark --items 14
+    python exact.py --instance instance_bank/n0020_00.npz --check
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+
+from evaluation import Evaluator, LOST_SALES_EXPONENT
+from ga import SEEDS
+from metaheuristics import BudgetedEvaluator, or_opt
+from instance import Instance
+
+MAX_EXACT_ITEMS = 20  # items after the fixed first one; 2^20 subsets
+SUBSET_ITEMS = 14  # items solved exactly for the lower bound of larger instances
+
+
+class _Terms:
+    """Per-transition cost pieces of the objective, for extending DP labels."""
+
+    def __init__(self, evaluator):
+        inst = evaluator.instance
+        self.setup = evaluator.item_setup
+        self.production = evaluator.production
+        self.stock = evaluator.stock
+        self.sales = evaluator.sales
+        self.lost_weight = evaluator.weight * evaluator.cost_lost
+        self.setup_weight = (1 - evaluator.weight) * evaluator.cost_setup
+        # Moving between two items of one family earns the continuity bonus.
+        self.edge = self.setup_weight * self.setup - evaluator.bonus * evaluator.same_family
+        # Without a lost-sales term the clock does not matter: one label per state.
+        self.timed = self.lost_weight > 0 and bool((self.sales > 0).any())
+        # Cheapest way into each item from another one, for the completion bound.
+        into = self.edge.copy()
+        np.fill_diagonal(into, np.inf)
+        self.min_edge_in = into.min(axis=0) if len(into) > 1 else np.zeros(len(into))
+        first_delay = max(0.0, -float(self.stock[0]))
+        self.start_cost = self.lost_weight * first_delay ** LOST_SALES_EXPONENT * self.sales[0]
+        self.start_time = float(self.production[0]) if self.timed else 0.0
+        self.n = len(inst)
+
+    def extend(self, last, t, c, k):
+        """Append item k (scalar or array) after `last` finishing at `t` with cost `c`."""
+        start = t + self.setup[last, k]
+        delay = np.maximum(0.0, start - self.stock[k])
+        cost = c + self.lost_weight * np.power(delay, LOST_SALES_EXPONENT) * self.sales[k] + self.edge[last, k]
+        end = start + self.production[k] if self.timed else np.zeros_like(start)
+        return end, cost
+
+    def entry_bound(self, k, t):
+        """Least cost of item k when it starts no earlier than `t`."""
+        delay = np.maximum(0.0, t - self.stock[k])
+        return self.min_edge_in[k] + self.lost_weight * np.power(delay, LOST_SALES_EXPONENT) * self.sales[k]
+
+    def completion_bound(self, mask, t, items):
+        """
+        Cost still to come, at least: every unsequenced item is entered by some
+        edge and starts no earlier than `t`.
+        """
+        bound = np.zeros(len(mask))
+        for k in items:
+            todo = (mask & (np.int64(1) << (k - 1))) == 0
+            bound[todo] += self.entry_bound(k, t[todo])
+        return bound
+
+
+def _pareto(group, t, c):
+    """Indices of the labels not dominated within their group (same state)."""
+    order = np.lexsort((c, t, group))
+    g, cs = group[order], c[order]
+    # Dense cost ranks keep the segmented running minimum exact in int64.
+    rank = np.empty(len(cs), dtype=np.int64)
+    rank[np.argsort(cs, kind="stable")] = np.arange(len(cs))
+    starts = np.ones(len(g), dtype=bool)
+    starts[1:] = g[1:] != g[:-1]
+    # Shift each group below the previous ones so the running min never crosses groups.
+    key = rank - np.cumsum(starts) * len(cs)
+    running = np.minimum.accumulate(key)
+    keep = starts.copy()
+    keep[1:] |= key[1:] < running[:-1]
+    return order[keep]
+
+
+def heuristic_upper_bound(instance):
+    """
+    Incumbent for pruning: the constructive heuristics (EDD, nearest neighbour,
+    ATCS) polished with or-opt. A tight incumbent prunes most of the DP.
+    """
+    ev = BudgetedEvaluator(instance)
+    rng = np.random.default_rng(0)
+    return min(or_opt(ev, rng, seq=fn(ev, None))[1] for fn in SEEDS.values())
+
+
+def held_karp(instance, max_items=MAX_EXACT_ITEMS, upper_bound=None):
+    """
+    Optimal sequence with item 0 first. Returns a dict with the sequence, its
+    cost (Evaluator objective), the number of labels generated and the time.
+    Labels whose cost plus completion bound exceeds `upper_bound` (default:
+    the best polished heuristic) are pruned.
+    """
+    m = len(instance) - 1
+    if m > max_items:
+        raise ValueError(f"{m} items after the first is above the exact limit of {max_items}")
+    start = time.perf_counter()
+    ev = Evaluator(instance)
+    terms = _Terms(ev)
+    if upper_bound is None:
+        upper_bound = heuristic_upper_bound(instance)
+    # Costs are clamped at 0, so a zero incumbent says nothing about the unclamped DP costs.
+    limit = upper_bound * (1 + 1e-9) + 1e-6 if upper_bound > 0 else np.inf
+    items = range(1, m + 1)
+
+    # One layer per subset size: mask, last item, end time, cost, parent label in the previous layer.
+    layer = {
+        "mask": np.zeros(1, dtype=np.int64),
+        "last": np.zeros(1, dtype=np.int32),
+        "time": np.array([terms.start_time]),
+        "cost": np.array([terms.start_cost]),
+        "parent": np.full(1, -1, dtype=np.int64),
+    }
+    layers = [layer]
+    generated = pruned = 0
+    for _ in range(m):
+        parts = []
+        if np.isfinite(limit):
+            rest = terms.completion_bound(layer["mask"], layer["time"], items)
+        for k in items:
+            bit = np.int64(1) << (k - 1)
+            src = np.flatnonzero((layer["mask"] & bit) == 0)
+            if not len(src):
+                continue
+            t, c = terms.extend(layer["last"][src], layer["time"][src], layer["cost"][src], k)
+            mask = layer["mask"][src] | bit
+            generated += len(src)
+            if np.isfinite(limit):
+                # Items other than k still start after the source label's end.
+                ok = c + rest[src] - terms.entry_bound(k, layer["time"][src]) <= limit
+                pruned += len(ok) - int(ok.sum())
+                src, mask, t, c = src[ok], mask[ok], t[ok], c[ok]
+            # Every label built here ends in k, so (mask, k) groups never span two k's.
+            keep = _pareto(mask, t, c)
+            parts.append((mask[keep], np.full(len(keep), k, dtype=np.int32), t[keep], c[keep], src[keep]))
+        layer = {name: np.concatenate([p[i] for p in parts])
+                 for i, name in enumerate(("mask", "last", "time", "cost", "parent"))}
+        layers.append(layer)
+
+    # Walk the parents back from the cheapest complete label.
+    idx = int(np.argmin(layer["cost"]))
+    seq = []
+    for lay in reversed(layers):
+        seq.append(int(lay["last"][idx]))
+        idx = int(lay["parent"][idx])
+    seq = np.array(seq[::-1], dtype=np.int32)
+    return {
+        "sequence": seq,
+        "cost": ev.cost(seq),
+        "optimal": True,
+        "labels": generated,
+        "pruned": pruned,
+        "peak_labels": max(len(lay["cost"]) for lay in layers),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def metric_closure(instance):
+    """
+    Copy of `instance` whose changeover matrix is its shortest-path closure, so
+    that skipping an item never makes the changeover between its neighbours
+    dearer. Items of unknown family change over in 0 h to and from anything,
+    so with any of them present the closure is all zeros.
+    """
+    d = np.array(instance.setup_hours, dtype=np.float64)
+    if (instance.family < 0).any():
+        d = np.zeros_like(d)
+    for k in range(len(d)):
+        np.minimum(d, d[:, k:k + 1] + d[k:k + 1, :], out=d)
+    return Instance(instance.quantity, instance.daily_sales, instance.stock_days, instance.production_days,
+                    instance.family, d, instance.skus, instance.family_ids, instance.name, **instance.params)
+
+
+def bound_subsets(instance, size):
+    """Item subsets worth solving exactly for a bound: the most urgent items, and the most urgent per family."""
+    urgent = np.lexsort((-instance.daily_sales[1:], instance.stock_days[1:])) + 1
+    subsets = [urgent[:size]]
+    _, first = np.unique(instance.family[urgent], return_index=True)
+    per_family = urgent[np.sort(first)]
+    if len(per_family) <= size:
+        rest = urgent[~np.isin(urgent, per_family)]
+        subsets.append(np.concatenate([per_family, rest[:size - len(per_family)]]))
+    return [np.concatenate([[0], s]) for s in subsets]
+
+
+def subset_lower_bound(instance, size=SUBSET_ITEMS):
+    """
+    Lower bound for instances too large to solve exactly: the optimum over a
+    subset of the items, with the changeover matrix replaced by its metric
+    closure. Take any sequence and drop the other items: with the closure no
+    changeover grows and every start moves earlier, so no cost term grows,
+    except that each dropped item can break one same-family pair and lose its
+    continuity bonus. Hence optimum >= held_karp(subset) - bonus * dropped.
+    """
+    start = time.perf_counter()
+    closed = metric_closure(instance)
+    bonus = Evaluator(instance).bonus
+    best, best_items = 0.0, None
+    for items in bound_subsets(instance, size):
+        result = held_karp(closed.subset(items), max_items=size)
+        dropped = len(instance) - len(items)
+        # A subset cost clamped at 0 gives a bound <= 0, i.e. nothing beyond the trivial one.
+        bound = result["cost"] - bonus * dropped
+        if bound > best:
+            best, best_items = bound, items
+    return {"lower_bound": best, "subset": best_items, "seconds": time.perf_counter() - start}
+
+
+def solve(instance, max_items=MAX_EXACT_ITEMS, subset_items=SUBSET_ITEMS):
+    """Optimal sequence when the instance is small enough, otherwise only a lower bound."""
+    if len(instance) - 1 <= max_items:
+        result = held_karp(instance, max_items)
+        result["lower_bound"] = result["cost"]
+        return result
+    result = subset_lower_bound(instance, min(subset_items, max_items))
+    result.update(sequence=None, cost=None, optimal=False)
+    return result
+
+
+def brute_force(instance):
+    ev = Evaluator(instance)
+    best, best_cost = None, np.inf
+    for rest in itertools.permutations(range(1, len(instance))):
+        seq = np.array((0,) + rest)
+        cost = ev.cost(seq)
+        if cost < best_cost:
+            best, best_cost = seq, cost
+    return best, best_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact Held-Karp solver / subset lower bound")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--items", type=int, default=None, help="Use only the first N items")
+    parser.add_argument("--max-items", type=int, default=MAX_EXACT_ITEMS, help="Largest instance solved exactly")
+    parser.add_argument("--subset-items", type=int, default=SUBSET_ITEMS, help="Subset size for the lower bound")
+    parser.add_argument("--check", action="store_true", help="Compare with brute force (n <= 10)")
+    args = parser.parse_args()
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    if args.items:
+        inst = inst.subset(np.arange(min(args.items, len(inst))))
+    print(inst)
+    result = solve(inst, args.max_items, args.subset_items)
+    if result["optimal"]:
+        print(f"Optimal cost {result['cost']:,.2f} in {1000 * result['seconds']:.1f} ms "
+              f"({result['labels']:,} labels, {result['pruned']:,} pruned by bound, "
+              f"peak layer {result['peak_labels']:,})")
+        print("Sequence:", " ".join(map(str, result["sequence"])))
+    else:
+        print(f"Lower bound {result['lower_bound']:,.2f} in {result['seconds']:.2f}s "
+              f"(too large for the exact solver, {len(inst) - 1} > {args.max_items} items)")
+    if args.check and len(inst) <= 10:
+        _, cost = brute_force(inst)
+        print(f"Brute force {cost:,.2f}: {'match' if abs(cost - result['cost']) <= 1e-6 * max(1, cost) else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import numpy as np
+
+from diversity import PopulationDiversity
+from evaluation import Evaluator
+
+# Python port of the memetic GA in src/utils/sequencerWorker.ts, working on
+# int permutations (item indices) instead of {sku, sublote, tamano} objects.
+# Item 0 is fixed at position 0 everywhere, as in the worker.
+
+DEFAULT_ELITISM_RATE = 0.1
+TOURNAMENT_SIZE = 5
+LOCAL_SEARCH_FREQUENCY = 10  # Run randomized 2-opt on the elite every N generations
+LOCAL_SEARCH_INTENSITY = 0.2  # share of the elite refined
+STAGNATION_BOOST = 20  # generations without improvement before the mutation rate is boosted
+STAGNATION_RESTART = 30  # ... before the worse half is re-seeded from the best
+
+# ATCS tuning (generarSecuenciaATCS)
+ATCS_K1 = 1.5
+ATCS_K2 = 0.5
+
+
+def scenario_mode(sales_weight):
+    """Same thresholds as the worker's scenarioMode."""
+    if sales_weight > 0.8:
+        return "min_lost_sales"
+    if sales_weight < 0.2:
+        return "min_changeovers"
+    return "balanced"
+
+
+# --- Constructive heuristics ----------------------------------------------
+
+def sequence_edd(instance):
+    """Earliest Due Date: the rest of the items by days of stock, ascending."""
+    rest = np.argsort(instance.stock_days[1:], kind="stable") + 1
+    return np.concatenate([[0], rest]).astype(np.int32)
+
+
+def sequence_nearest_neighbor(evaluator, rng=None):
+    """Always take the unvisited item with the shortest changeover (random tie-break)."""
+    n = evaluator.n
+    seq = np.empty(n, dtype=np.int32)
+    seq[0] = 0
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    current = 0
+    for k in range(1, n):
+        tc = np.where(visited, np.inf, evaluator.item_setup[current])
+        best = np.flatnonzero(tc == tc.min())
+        current = int(best[0] if rng is None else rng.choice(best))
+        seq[k] = current
+        visited[current] = True
+    return seq
+
+
+def sequence_atcs(evaluator, rng=None):
+    """Apparent Tardiness Cost with Setups, as in generarSecuenciaATCS."""
+    inst = evaluator.instance
+    n = evaluator.n
+    p = inst.production_days
+    d = inst.stock_days
+    avg_p = p[1:].sum() / max(n - 1, 1)
+    positive = inst.setup_hours[inst.setup_hours > 0]
+    avg_s = positive.mean() if len(positive) else 1.0
+    setup_days = evaluator.item_setup / 24
+
+    seq = np.empty(n, dtype=np.int32)
+    seq[0] = 0
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    current, t = 0, 0.0
+    p_safe = np.where(p > 0, p, 1.0)
+    for k in range(1, n):
+        slack = np.maximum(d - p - t, 0.0)
+        score = (1 / p_safe) * np.exp(-slack / (ATCS_K1 * avg_p or 1.0)) * np.exp(-setup_days[current] / (ATCS_K2 * avg_s))
+        score[visited] = -np.inf
+        best = np.flatnonzero(score == score.max())
+        nxt = int(best[0] if rng is None else rng.choice(best))
+        t += p[nxt] + setup_days[current, nxt]
+        current = nxt
+        seq[k] = current
+        visited[current] = True
+    return seq
+
+
+SEEDS = {
+    "edd": lambda ev, rng: sequence_edd(ev.instance),
+    "nn": sequence_nearest_neighbor,
+    "atcs": sequence_atcs,
+}
+
+
+# --- Operators --------------------------------------------------------------
+
+def crossover_ox(p1, p2, rng):
+    """Order crossover (OX1) keeping position 0."""
+    n = len(p1)
+    if n <= 2:
+        return p1.copy()
+    start = rng.integers(1, n)
+    end = rng.integers(start, n)
+    child = np.empty_like(p1)
+    child[0] = p1[0]
+    child[start:end + 1] = p1[start:end + 1]
+    used = np.zeros(n, dtype=bool)
+    used[p1[0]] = True
+    used[p1[start:end + 1]] = True
+    fill = p2[~used[p2]]
+    free = np.ones(n, dtype=bool)
+    free[0] = False
+    free[start:end + 1] = False
+    child[free] = fill
+    return child
+
+
+def mutate(seq, rate, rng):
+    """Swap or insertion mutation, never touching position 0. Mutates in place."""
+    n = len(seq)
+    if n <= 2 or rng.random() > rate:
+        return seq
+    i = rng.integers(1, n)
+    if rng.random() < 0.5:
+        j = rng.integers(1, n - 1)
+        j += j >= i  # j != i
+        seq[i], seq[j] = seq[j], seq[i]
+    else:
+        j = rng.integers(1, n)
+        item = seq[i]
+        if i < j:
+            seq[i:j] = seq[i + 1:j + 1]
+        else:
+            seq[j + 1:i + 1] = seq[j:i]
+        seq[j] = item
+    return seq
+
+
+def local_search_2opt(seq, cost, evaluator, rng, max_attempts=30):
+    """busquedaLocal: random segment reversals, each kept when it lowers the cost."""
+    n = len(seq)
+    if n <= 3:
+        return seq, cost
+    attempts = min(max_attempts, n * 2)
+    i = rng.integers(1, n - 1, size=attempts)
+    j = i + 1 + (rng.random(attempts) * (n - 1 - i)).astype(int)
+    keep = j - i > 1
+    i, j = i[keep], j[keep]
+    if len(i) == 0:
+        return seq, cost
+    best, best_cost = seq, cost
+    for a, b in zip(i, j):
+        cand = best.copy()
+        cand[a:b + 1] = cand[a:b + 1][::-1]
+        c = evaluator.cost(cand)
+        if c < best_cost:
+            best, best_cost = cand, c
+    return best, best_cost
+
+
+# --- GA ---------------------------------------------------------------------
+
+class GeneticAlgorithm:
+    """
+    One population of the worker's memetic GA. `step()` runs one generation
+    and keeps the diversity tracker in sync with the slots it replaces.
+    """
+
+    def __init__(self, instance, population_size=100, mutation_rate=0.15,
+                 elitism_rate=DEFAULT_ELITISM_RATE, mode=None, seed=None,
+                 seeds=("edd", "nn", "atcs"), evaluator=None, adaptive_mutation=True):
+        self.instance = instance
+        self.evaluator = evaluator or Evaluator(instance)
+        self.n = len(instance)
+        self.size = population_size
+        self.mutation_rate = mutation_rate
+        self.num_elite = max(1, int(elitism_rate * population_size))
+        self.mode = mode or scenario_mode(instance.sales_weight)
+        self.rng = np.random.default_rng(seed)
+        self.seed_names = seeds
+        self.adaptive_mutation = adaptive_mutation
+        self.generation = 0
+        self.stagnation = 0
+        self.diversity = PopulationDiversity(self.n, population_size)
+        self._init_population()
+
+    # --- setup
+
+    def _seed_sequences(self):
+        return {name: SEEDS[name](self.evaluator, self.rng) for name in self.seed_names}
+
+    def _init_population(self):
+        """generarPoblacionInicial: the heuristics plus shuffled copies of them."""
+        seeds = self._seed_sequences()
+        pop = [s.copy() for s in seeds.values()]
+        # Give preference based on mode
+        pools = {"min_lost_sales": ("atcs", "edd"), "min_changeovers": ("nn",)}
+        bases = [seeds[k] for k in pools.get(self.mode, seeds) if k in seeds] or list(seeds.values())
+        while len(pop) < self.size:
+            seq = bases[self.rng.integers(len(bases))].copy()
+            # Shuffle 20-50% for diversity
+            swaps = int((self.n - 1) * (0.2 + self.rng.random() * 0.3))
+            if self.n > 2 and swaps:
+                a = self.rng.integers(1, self.n, size=swaps)
+                b = self.rng.integers(1, self.n, size=swaps)
+                for x, y in zip(a, b):
+                    seq[x], seq[y] = seq[y], seq[x]
+            pop.append(seq)
+        self.population = np.array(pop[:self.size], dtype=np.int32)
+        self.costs = self.evaluator.costs(self.population)
+        for slot, perm in enumerate(self.population):
+            self.diversity.add(slot, perm)
+        best = int(np.argmin(self.costs))
+        self.best, self.best_cost = self.population[best].copy(), float(self.costs[best])
+
+    def set_slot(self, slot, perm, cost):
+        self.population[slot] = perm
+        self.costs[slot] = cost
+        self.diversity.replace(slot, perm)
+
+    def inject(self, perms):
+        """Replace the worst individuals with `perms` (e.g. migrants); returns slots used."""
+        perms = np.atleast_2d(perms)
+        costs = self.evaluator.costs(perms)
+        slots = np.argsort(self.costs)[::-1][:len(perms)]
+        for slot, perm, cost in zip(slots, perms, costs):
+            self.set_slot(slot, perm.copy(), cost)
+        self._track_best()
+        return slots
+
+    def elite_slots(self):
+        return np.argsort(self.costs, kind="stable")[:self.num_elite]
+
+    def _track_best(self):
+        i = int(np.argmin(self.costs))
+        if self.costs[i] < self.best_cost:
+            self.best, self.best_cost = self.population[i].copy(), float(self.costs[i])
+            return True
+        return False
+
+    def _tournament(self, count):
+        picks = self.rng.integers(0, self.size, size=(count, TOURNAMENT_SIZE))
+        winners = np.argmin(self.costs[picks], axis=1)
+        return picks[np.arange(count), winners]
+
+    # --- generation
+
+    def current_mutation_rate(self, override=None):
+        if override is not None:
+            return override
+        if self.adaptive_mutation and self.stagnation > STAGNATION_BOOST:
+            return min(0.8, self.mutation_rate * 2.5)
+        return self.mutation_rate
+
+    def step(self, mutation_rate=None):
+        """One generation. Returns True when the best cost improved."""
+        rate = self.current_mutation_rate(mutation_rate)
+
+        if self.stagnation > STAGNATION_RESTART:
+            self._diversify()
+
+        order = np.argsort(self.costs, kind="stable")
+        elite = order[:self.num_elite]
+        replaced = order[self.num_elite:]
+
+        if self.generation % LOCAL_SEARCH_FREQUENCY == 0:
+            for slot in elite[:max(1, int(len(elite) * LOCAL_SEARCH_INTENSITY))]:
+                seq, cost = local_search_2opt(self.population[slot], self.costs[slot], self.evaluator, self.rng)
+                if cost < self.costs[slot]:
+                    self.set_slot(slot, seq, cost)
+
+        # Children are bred from the current population before any slot is overwritten.
+        count = len(replaced)
+        parents1 = self._tournament(count)
+        parents2 = self._tournament(count)
+        children = np.empty((count, self.n), dtype=np.int32)
+        for k in range(count):
+            child = crossover_ox(self.population[parents1[k]], self.population[parents2[k]], self.rng)
+            children[k] = mutate(child, rate, self.rng)
+        child_costs = self.evaluator.costs(children) if count else np.empty(0)
+        for slot, child, cost in zip(replaced, children, child_costs):
+            self.set_slot(slot, child, cost)
+
+        self.generation += 1
+        improved = self._track_best()
+        self.stagnation = 0 if improved else self.stagnation + 1
+        return improved
+
+    def _diversify(self):
+        """Escape local optima: re-seed the worse half with double mutations of the best."""
+        order = np.argsort(self.costs, kind="stable")
+        worse = order[self.size // 2 + 1:]
+        perms = np.empty((len(worse), self.n), dtype=np.int32)
+        for k in range(len(worse)):
+            perms[k] = mutate(mutate(self.best.copy(), 1.0, self.rng), 1.0, self.rng)
+        for slot, perm, cost in zip(worse, perms, self.evaluator.costs(perms)):
+            self.set_slot(slot, perm, cost)
+        self.stagnation = 0
+
+    def run(self, generations, mutation_rate=None, callback=None):
+        for _ in range(generations):
+            self.step(mutation_rate)
+            if callback is not None and callback(self) is False:
+                break
+        return self.best, self.best_cost
+
+    def diversity_features(self):
+        return self.diversity.features(self.elite_slots())
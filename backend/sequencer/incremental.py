@@ -0,0 +1,168 @@
+"""
+Incremental re-optimization after a few items change.
+
+When a planner adds or removes a couple of orders, generarPoblacionInicial
+rebuilds the whole population from EDD / nearest neighbour / ATCS and the
+search starts over. Here the previous best sequence is repaired instead:
+
+  1. items no longer in the request are dropped, keeping the order of the rest
+     (matched by SKU; repeated SKUs in order of appearance);
+  2. new items are inserted one by one, most urgent first, at the position
+     where the full objective is lowest (cheapest insertion);
+  3. the candidate-list local search (local_search.py) runs on the items
+     within `window` positions of an insertion or a removal only. With
+     spread=True, don't-look bits let it wake up any item whose neighbours a
+     move changed, which pays when the previous plan was not a local optimum.
+
+Usage:
+    python incremental.py --instance instance_bank/n0500_00.npz --remove 2 --add 2
+    python incremental.py --instance instance_bank/n0500_00.npz --remove 5 --add 5 --compare 10
+"""
+import argparse
+import time
+import numpy as np
+
+from evaluation import Evaluator
+from local_search import DEFAULT_NEIGHBOURS, LocalSearch
+
+DEFAULT_WINDOW = 5  # positions on each side of a change woken for the local search
+
+
+def match_items(previous_skus, skus):
+    """
+    (kept, new, around) for a request with item SKUs `skus`: kept are the
+    request's indices of previous items in the previous order, new the
+    indices not in the previous sequence, around the kept items right before
+    and after a dropped one.
+    """
+    free = {}
+    for i, sku in enumerate(skus):
+        free.setdefault(str(sku), []).append(i)
+    kept, gaps = [], []
+    for sku in previous_skus:
+        items = free.get(str(sku))
+        if items:
+            kept.append(items.pop(0))
+        elif not gaps or gaps[-1] != len(kept):
+            gaps.append(len(kept))
+    new = sorted(i for items in free.values() for i in items)
+    around = {kept[g + d] for g in gaps for d in (-1, 0) if 0 <= g + d < len(kept)}
+    return kept, new, around
+
+
+def insert_items(evaluator, seq, items):
+    """Cheapest insertion of `items` (most urgent first) after position 0 of `seq`; returns (seq, cost)."""
+    seq = np.asarray(seq, dtype=np.int32)
+    cost = evaluator.cost(seq) if len(seq) == evaluator.n else None
+    stock = evaluator.stock
+    for item in sorted(items, key=lambda i: stock[i]):
+        cands = np.array([np.insert(seq, at, item) for at in range(1, len(seq) + 1)], dtype=np.int32)
+        costs = evaluator.costs(cands)
+        best = int(np.argmin(costs))
+        seq, cost = cands[best], float(costs[best])
+    return seq, cost
+
+
+def _start_sequence(kept):
+    """Previous order with the request's item 0 (the one on the mill) moved first."""
+    rest = [i for i in kept if i != 0]
+    return np.array([0] + rest, dtype=np.int32)
+
+
+def reoptimize(instance, previous_skus, window=DEFAULT_WINDOW, neighbours=DEFAULT_NEIGHBOURS,
+               spread=False, max_evaluations=None, evaluator=None):
+    """
+    Repair the previous sequence (a list of SKUs in order) for `instance` and
+    polish around the changes. Returns a dict with the sequence, its cost and
+    the cost after each step.
+    """
+    start = time.perf_counter()
+    ev = evaluator or Evaluator(instance)
+    kept, new, touched = match_items(previous_skus, instance.skus)
+    seq = _start_sequence(kept)
+    if 0 in new:
+        new.remove(0)
+    stages = {}
+    if len(seq) == ev.n:
+        stages["dropped"] = ev.cost(seq)
+    seq, cost = insert_items(ev, seq, new)
+    stages["inserted"] = cost
+    touched.update(new)
+
+    pos = np.empty(ev.n, dtype=np.int64)
+    pos[seq] = np.arange(ev.n)
+    awake = set()
+    for item in touched:
+        p = pos[item]
+        awake.update(int(x) for x in seq[max(1, p - window):p + window + 1])
+    ls = LocalSearch(ev, neighbours, max_evaluations=max_evaluations)
+    seq, cost = ls.run(seq, cost, items=sorted(awake), confine=not spread)
+    stages["local_search"] = cost
+    return {
+        "sequence": seq,
+        "cost": cost,
+        "stages": stages,
+        "kept": len(kept),
+        "added": len(new),
+        "removed": len(previous_skus) - len(kept),
+        "woken": len(awake),
+        "moves": ls.moves_applied,
+        "evaluations": ev.evaluations,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def perturb(instance, remove, add, rng):
+    """A day-to-day edit of `instance`: `remove` random items dropped, `add` copies of others with new stock."""
+    n = len(instance)
+    dropped = rng.choice(np.arange(1, n), size=remove, replace=False)
+    keep = np.setdiff1d(np.arange(n), dropped)
+    donors = rng.choice(keep[1:], size=add, replace=True)
+    edited = instance.subset(np.concatenate([keep, donors]))
+    edited.stock_days = edited.stock_days.copy()
+    edited.stock_days[len(keep):] = rng.uniform(0, np.median(instance.stock_days), size=add)
+    edited.skus = edited.skus[:len(keep)] + [f"new{k}" for k in range(add)]
+    return edited
+
+
+def main():
+    from ga import GeneticAlgorithm
+    from instance import Instance
+
+    parser = argparse.ArgumentParser(description="Warm-start re-optimization after a few items change")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--generations", type=int, default=100, help="GA generations for the previous plan")
+    parser.add_argument("--remove", type=int, default=2)
+    parser.add_argument("--add", type=int, default=2)
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--spread", action="store_true", help="Let the local search leave the windows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", type=float, default=0, metavar="SECONDS",
+                        help="Also run a fresh GA for this long on the edited instance")
+    args = parser.parse_args()
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    rng = np.random.default_rng(args.seed)
+    t = time.perf_counter()
+    ga = GeneticAlgorithm(inst, seed=args.seed)
+    ga.run(args.generations)
+    print(f"{inst}: previous plan {ga.best_cost:,.2f} ({args.generations} GA generations, "
+          f"{time.perf_counter() - t:.2f}s)")
+    previous = [inst.skus[i] for i in ga.best]
+
+    edited = perturb(inst, args.remove, args.add, rng)
+    result = reoptimize(edited, previous, args.window, spread=args.spread)
+    print(f"Edited: -{result['removed']} +{result['added']} items, {result['woken']} woken")
+    for stage, cost in result["stages"].items():
+        print(f"  {stage:<13} {cost:>16,.2f}")
+    print(f"Re-optimized {result['cost']:,.2f} in {result['seconds']:.2f}s "
+          f"({result['evaluations']:,} evaluations, {result['moves']} moves)")
+
+    if args.compare:
+        from metaheuristics import run_algorithm
+        ev = run_algorithm("ga", edited, args.seed, max_seconds=args.compare)
+        print(f"Fresh GA ({args.compare:g}s): {ev.best_cost:,.2f} ({ev.evaluations:,} evaluations)")
+
+
+if __name__ == "__main__":
+    main()
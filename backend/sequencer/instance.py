@@ -0,0 +1,148 @@
+import json
+import os
+import numpy as np
+
+# A sequencing instance: the arrays the sequencer worker receives as WorkParams
+# (src/utils/sequencerWorker.ts), with the same units:
+#   quantity         produccionTn        tonnes per item
+#   daily_sales      ventaDiaria         tonnes/day
+#   stock_days       diasStock           days of cover before the item runs out
+#   production_days  diasFabricacion     days of rolling (quantity / ritmo / 24)
+#   family           idCambios           row of setup_hours, -1 when unknown
+#   setup_hours      matrizCambioMedida  [from family][to family] -> hours
+# Item 0 is the item currently on the mill and always stays first.
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BENCHMARK_DATA = os.path.join(REPO_ROOT, "scripts", "benchmark_data.json")
+
+# Defaults of the sequencer form in ProductionSequencer.tsx
+DEFAULT_SALES_WEIGHT = 0.5
+DEFAULT_COST_LOST_TON = 100.0
+DEFAULT_COST_SETUP_HOUR = 5000.0
+
+ARRAY_FIELDS = ("quantity", "daily_sales", "stock_days", "production_days", "family", "setup_hours")
+
+
+class Instance:
+    def __init__(self, quantity, daily_sales, stock_days, production_days, family, setup_hours,
+                 skus=None, family_ids=None, name="instance",
+                 sales_weight=DEFAULT_SALES_WEIGHT, cost_lost_ton=DEFAULT_COST_LOST_TON,
+                 cost_setup_hour=DEFAULT_COST_SETUP_HOUR):
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.daily_sales = np.asarray(daily_sales, dtype=np.float64)
+        self.stock_days = np.asarray(stock_days, dtype=np.float64)
+        self.production_days = np.asarray(production_days, dtype=np.float64)
+        self.family = np.asarray(family, dtype=np.int32)
+        self.setup_hours = np.asarray(setup_hours, dtype=np.float64)
+        n = len(self.quantity)
+        for field in ARRAY_FIELDS[1:5]:
+            if len(getattr(self, field)) != n:
+                raise ValueError(f"{field} has {len(getattr(self, field))} entries, expected {n}")
+        self.skus = list(skus) if skus is not None else [str(i) for i in range(n)]
+        self.family_ids = list(family_ids) if family_ids is not None else [str(i + 1) for i in range(len(self.setup_hours))]
+        self.name = name
+        self.sales_weight = float(sales_weight)
+        self.cost_lost_ton = float(cost_lost_ton)
+        self.cost_setup_hour = float(cost_setup_hour)
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __repr__(self):
+        return f"Instance({self.name!r}, n={len(self)}, families={len(self.setup_hours)})"
+
+    @property
+    def params(self):
+        """Cost parameters, as stored in the instance bank manifest."""
+        return {
+            "sales_weight": self.sales_weight,
+            "cost_lost_ton": self.cost_lost_ton,
+            "cost_setup_hour": self.cost_setup_hour,
+        }
+
+    def with_params(self, **params):
+        """Copy sharing the arrays, with different cost parameters (e.g. another scenario)."""
+        merged = {**self.params, **params}
+        return Instance(self.quantity, self.daily_sales, self.stock_days, self.production_days,
+                        self.family, self.setup_hours, self.skus, self.family_ids, self.name, **merged)
+
+    def subset(self, items):
+        """Instance restricted to `items` (indices; items[0] becomes the fixed first item)."""
+        items = np.asarray(items)
+        return Instance(self.quantity[items], self.daily_sales[items], self.stock_days[items],
+                        self.production_days[items], self.family[items], self.setup_hours,
+                        [self.skus[i] for i in items], self.family_ids, self.name, **self.params)
+
+    # --- Loaders --------------------------------------------------------
+
+    @classmethod
+    def from_items(cls, items, rules, name="instance", **params):
+        """
+        Build an instance from article rows and changeover rules the way
+        ProductionSequencer.handleRun does: matrix rows are the sorted unique
+        change-table ids of the items; ids without a row map to -1.
+
+        items: dicts with sku_code, quantity, id_tabla_cambio_medida, ritmo_th and
+               optionally venta_diaria / dias_stock.
+        rules: dicts with from_id, to_id, duration_hours.
+        """
+        ids = sorted({str(it["id_tabla_cambio_medida"]).strip() for it in items} - {"", "S/N", "0", "-1"})
+        index = {fid: i for i, fid in enumerate(ids)}
+        matrix = np.zeros((len(ids), len(ids)))
+        for rule in rules:
+            f, t = index.get(str(rule["from_id"]).strip()), index.get(str(rule["to_id"]).strip())
+            if f is not None and t is not None:
+                matrix[f, t] = float(rule["duration_hours"] or 0)
+
+        quantity = np.array([float(it["quantity"]) for it in items])
+        pace = np.array([float(it.get("ritmo_th") or 0) for it in items])
+        production_days = np.divide(quantity, pace, out=np.zeros_like(quantity), where=pace > 0) / 24
+        daily_sales = np.array([float(it.get("venta_diaria", 0) or 0) for it in items])
+        stock_days = np.array([float(it.get("dias_stock", 999)) for it in items])
+        family = [index.get(str(it["id_tabla_cambio_medida"]).strip(), -1) for it in items]
+        return cls(quantity, daily_sales, stock_days, production_days, family, matrix,
+                   skus=[str(it["sku_code"]) for it in items], family_ids=ids, name=name, **params)
+
+    @classmethod
+    def from_benchmark_json(cls, path=BENCHMARK_DATA, **params):
+        """
+        scripts/benchmark_data.json has no SAP data; like benchmark_sequencer.js
+        it simulates stock cover as (sku_code % 5) + 1 days and treats the
+        order quantity spread over a month as the daily sale.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        items = [
+            {**it, "dias_stock": (int(it["sku_code"]) % 5) + 1, "venta_diaria": float(it["quantity"]) / 30}
+            for it in data["items"]
+        ]
+        return cls.from_items(items, data["rules"], name=os.path.splitext(os.path.basename(path))[0], **params)
+
+    @classmethod
+    def from_work_params(cls, params, name="work_params"):
+        """WorkParams as posted to sequencerWorker.ts (camelCase keys)."""
+        return cls(
+            params["produccionTn"], params["ventaDiaria"], params["diasStock"], params["diasFabricacion"],
+            params["idCambios"], params["matrizCambioMedida"],
+            skus=params.get("skus"), family_ids=None, name=name,
+            sales_weight=params.get("pesoVenta", DEFAULT_SALES_WEIGHT),
+            cost_lost_ton=params.get("costoToneladaPerdida", DEFAULT_COST_LOST_TON),
+            cost_setup_hour=params.get("costoHoraCambio", DEFAULT_COST_SETUP_HOUR),
+        )
+
+    # --- Binary format ----------------------------------------------------
+
+    def save(self, path):
+        """One compressed .npz per instance: the arrays plus a JSON meta entry."""
+        meta = {"name": self.name, "skus": self.skus, "family_ids": self.family_ids, **self.params}
+        arrays = {field: getattr(self, field) for field in ARRAY_FIELDS}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {field: data[field] for field in ARRAY_FIELDS}
+        params = {k: meta[k] for k in ("sales_weight", "cost_lost_ton", "cost_setup_hour") if k in meta}
+        return cls(**arrays, skus=meta.get("skus"), family_ids=meta.get("family_ids"),
+                   name=meta.get("name", "instance"), **params)
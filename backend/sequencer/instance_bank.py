@@ -0,0 +1,292 @@
+"""
+Synthetic instance bank for the sequencer.
+
+Samples instances of a chosen size from the real data in the repo:
+  - articles (ritmo T/H and change-table id, i.e. the family mix) from the
+    article master: backup_scheduler.json (database.articles) or an .xlsx
+    export such as Maestro_articulo_Lam1.xlsx
+  - order quantities from a log-normal fitted to the recorded programs
+    (backup_scheduler.json schedule + scripts/benchmark_data.json)
+  - changeover hours as the sub-matrix of Cambio_Medida_Lam3.xlsx for the
+    sampled families (row/column k of the sheet = change-table id k + 1)
+
+Stock and sales are not in the repo (they come from SAP at run time), so they
+are drawn from simple assumptions: see STOCK_* / COVER_* below.
+
+Each instance is one .npz file (Instance.save); manifest.json lists them with
+their size, family count, seed and total tonnage.
+
+Usage:
+    python instance_bank.py --sizes 20 50 100 500 2000 --per-size 5 --out instance_bank
+    python instance_bank.py --out instance_bank --list
+"""
+import argparse
+import json
+import math
+import os
+import time
+import numpy as np
+
+from instance import (
+    BENCHMARK_DATA,
+    DEFAULT_COST_LOST_TON,
+    DEFAULT_COST_SETUP_HOUR,
+    DEFAULT_SALES_WEIGHT,
+    REPO_ROOT,
+    Instance,
+)
+
+DEFAULT_BANK = "instance_bank"
+DEFAULT_MASTER = os.path.join(REPO_ROOT, "backup_scheduler.json")
+DEFAULT_MATRIX = os.path.join(REPO_ROOT, "Cambio_Medida_Lam3.xlsx")
+DEFAULT_SIZES = (20, 50, 100, 200, 500, 1000, 2000)
+MANIFEST = "manifest.json"
+
+QUANTITY_STEP = 50  # programs are entered in round tonnages
+NO_SALES_SHARE = 0.1  # items without sales get diasStock = 999, as in the app
+STOCK_SHAPE, STOCK_SCALE = 2.0, 7.0  # gamma: mean cover of 14 days, many items near zero
+COVER_DAYS = (15, 60)  # an order covers between half a month and two months of sales
+
+
+def _xlsx_rows(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise SystemExit("Reading .xlsx files needs openpyxl (pip install openpyxl)")
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    rows = list(wb.worksheets[0].iter_rows(values_only=True))
+    wb.close()
+    return rows
+
+
+def load_article_master(path=DEFAULT_MASTER):
+    """[(sku, ritmo_th, change-table id)] for articles with a usable pace and id."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        raw = [(a.get("codigoProgramacion") or a.get("skuLaminacion"), a.get("ritmoTH"), a.get("idTablaCambioMedida"))
+               for a in data["database"]["articles"]]
+    else:
+        rows = _xlsx_rows(path)
+        header = [str(h or "").strip() for h in rows[0]]
+        col = {name: header.index(name) for name in ("Código Programación", "Ritmo T/H", "ID Tabla Cambio Medida")}
+        raw = [(r[col["Código Programación"]], r[col["Ritmo T/H"]], r[col["ID Tabla Cambio Medida"]]) for r in rows[1:]]
+
+    articles = []
+    for sku, pace, fid in raw:
+        try:
+            pace, fid = float(pace), int(fid)
+        except (TypeError, ValueError):
+            continue
+        if pace > 0 and fid > 0:
+            articles.append((str(sku), pace, fid))
+    return articles
+
+
+def load_changeover_matrix(path=DEFAULT_MATRIX):
+    """Square hours matrix; row/column k is change-table id k + 1."""
+    rows = [r for r in _xlsx_rows(path) if any(v is not None for v in r)]
+    matrix = np.array([[float(v or 0) for v in r] for r in rows])
+    if matrix.shape[0] != matrix.shape[1]:
+        raise ValueError(f"{path}: expected a square matrix, got {matrix.shape}")
+    return matrix
+
+
+def fit_quantity_distribution(master_path=DEFAULT_MASTER, benchmark_path=BENCHMARK_DATA):
+    """Log-normal fit of the recorded order quantities."""
+    quantities = []
+    if master_path.endswith(".json") and os.path.exists(master_path):
+        with open(master_path, encoding="utf-8") as f:
+            quantities += [float(x["quantity"]) for x in json.load(f).get("schedule", [])]
+    if os.path.exists(benchmark_path):
+        with open(benchmark_path, encoding="utf-8") as f:
+            quantities += [float(x["quantity"]) for x in json.load(f)["items"]]
+    logs = np.log([q for q in quantities if q > 0])
+    if len(logs) < 2:
+        raise ValueError("Not enough recorded quantities to fit a distribution")
+    return {
+        "mu": float(logs.mean()),
+        "sigma": float(logs.std()),
+        "min": float(np.exp(logs.min())),
+        "max": float(np.exp(logs.max())),
+        "samples": int(len(logs)),
+    }
+
+
+class InstanceGenerator:
+    def __init__(self, articles, matrix, quantity_fit):
+        self.matrix = matrix
+        self.quantity_fit = quantity_fit
+        usable = [a for a in articles if a[2] <= len(matrix)]
+        if not usable:
+            raise ValueError("No article has a change-table id inside the changeover matrix")
+        self.skus = np.array([a[0] for a in usable])
+        self.pace = np.array([a[1] for a in usable])
+        self.family_of = np.array([a[2] for a in usable])
+        self.families, counts = np.unique(self.family_of, return_counts=True)
+        self.family_weight = counts / counts.sum()
+        self.members = {fid: np.flatnonzero(self.family_of == fid) for fid in self.families}
+
+    def default_family_count(self, n):
+        # ~6 families for the 22-item benchmark program, growing sub-linearly.
+        return int(np.clip(round(1.3 * math.sqrt(n)), 2, len(self.families)))
+
+    def sample_quantities(self, n, rng):
+        fit = self.quantity_fit
+        q = rng.lognormal(fit["mu"], fit["sigma"], size=n)
+        q = np.clip(q, fit["min"], fit["max"])
+        return np.maximum(QUANTITY_STEP, np.round(q / QUANTITY_STEP) * QUANTITY_STEP)
+
+    def generate(self, n, seed, families=None, name=None, **params):
+        rng = np.random.default_rng(seed)
+        k = min(families or self.default_family_count(n), len(self.families))
+
+        # Families seen more often in the master are more likely to be programmed;
+        # the mix within the program is skewed (Dirichlet) like real campaigns.
+        chosen = rng.choice(self.families, size=k, replace=False, p=self.family_weight)
+        mix = rng.dirichlet(np.ones(k))
+        item_family = chosen[rng.choice(k, size=n, p=mix)]
+        # Every chosen family appears at least once.
+        item_family[rng.permutation(n)[:k]] = chosen[: min(k, n)]
+        picks = np.array([rng.choice(self.members[fid]) for fid in item_family])
+
+        quantity = self.sample_quantities(n, rng)
+        production_days = quantity / self.pace[picks] / 24
+
+        cover = rng.uniform(*COVER_DAYS, size=n)
+        daily_sales = quantity / cover
+        stock_days = rng.gamma(STOCK_SHAPE, STOCK_SCALE, size=n)
+        no_sales = rng.random(n) < NO_SALES_SHARE
+        daily_sales[no_sales] = 0.0
+        stock_days[no_sales] = 999.0
+
+        # Matrix rows in the app's order: sorted unique ids as strings.
+        ids = sorted({str(f) for f in chosen})
+        index = {fid: i for i, fid in enumerate(ids)}
+        rows = np.array([int(f) - 1 for f in ids])
+        setup = self.matrix[np.ix_(rows, rows)]
+        family = np.array([index[str(f)] for f in item_family], dtype=np.int32)
+
+        return Instance(quantity, daily_sales, stock_days, production_days, family, setup,
+                        skus=list(self.skus[picks]), family_ids=ids,
+                        name=name or f"n{n:04d}_s{seed}", **params)
+
+
+def read_manifest(bank_dir):
+    path = os.path.join(bank_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"version": 1, "instances": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(bank_dir, manifest):
+    path = os.path.join(bank_dir, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+class InstanceBank:
+    """Read side of a bank directory: filter the manifest, load instances."""
+
+    def __init__(self, bank_dir=DEFAULT_BANK):
+        self.bank_dir = bank_dir
+        self.manifest = read_manifest(bank_dir)
+
+    def __len__(self):
+        return len(self.manifest["instances"])
+
+    def entries(self, min_n=0, max_n=None):
+        return [e for e in self.manifest["instances"]
+                if e["n"] >= min_n and (max_n is None or e["n"] <= max_n)]
+
+    def load(self, entry):
+        name = entry["file"] if isinstance(entry, dict) else entry
+        return Instance.load(os.path.join(self.bank_dir, name))
+
+    def __iter__(self):
+        for entry in self.manifest["instances"]:
+            yield self.load(entry)
+
+
+def build_bank(args):
+    os.makedirs(args.out, exist_ok=True)
+    articles = load_article_master(args.master)
+    matrix = load_changeover_matrix(args.matrix)
+    fit = fit_quantity_distribution(args.master)
+    generator = InstanceGenerator(articles, matrix, fit)
+
+    manifest = read_manifest(args.out)
+    manifest["sources"] = {
+        "master": os.path.relpath(args.master, REPO_ROOT),
+        "matrix": os.path.relpath(args.matrix, REPO_ROOT),
+        "articles": len(generator.skus),
+        "families": len(generator.families),
+    }
+    manifest["quantity_fit"] = fit
+    entries = {e["file"]: e for e in manifest["instances"]}
+
+    params = {"sales_weight": args.sales_weight, "cost_lost_ton": args.cost_lost_ton,
+              "cost_setup_hour": args.cost_setup_hour}
+    start = time.time()
+    for n in args.sizes:
+        for i in range(args.per_size):
+            seed = args.seed * 1_000_003 + n * 1000 + i
+            inst = generator.generate(n, seed, families=args.families, name=f"n{n:04d}_{i:02d}", **params)
+            filename = f"{inst.name}.npz"
+            path = os.path.join(args.out, filename)
+            inst.save(path)
+            entries[filename] = {
+                "file": filename,
+                "name": inst.name,
+                "n": n,
+                "families": int(len(inst.setup_hours)),
+                "seed": seed,
+                "total_tonnes": float(inst.quantity.sum()),
+                "production_days": round(float(inst.production_days.sum()), 3),
+                "bytes": os.path.getsize(path),
+                **params,
+            }
+    manifest["instances"] = sorted(entries.values(), key=lambda e: (e["n"], e["name"]))
+    manifest["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    write_manifest(args.out, manifest)
+    print(f"Wrote {len(args.sizes) * args.per_size} instances to {args.out}/ in {time.time() - start:.1f}s "
+          f"({len(manifest['instances'])} in the bank)")
+
+
+def list_bank(bank_dir):
+    manifest = read_manifest(bank_dir)
+    if not manifest["instances"]:
+        print(f"{bank_dir}/ has no instances")
+        return
+    print(f"{'file':<20} {'n':>5} {'fam':>4} {'tonnes':>10} {'prod days':>10} {'KB':>7}")
+    for e in manifest["instances"]:
+        print(f"{e['file']:<20} {e['n']:>5} {e['families']:>4} {e['total_tonnes']:>10,.0f} "
+              f"{e['production_days']:>10.1f} {e['bytes'] / 1024:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sequencing instance bank")
+    parser.add_argument("--out", default=DEFAULT_BANK, help="Bank directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Items per instance")
+    parser.add_argument("--per-size", type=int, default=3, help="Instances per size")
+    parser.add_argument("--families", type=int, default=None, help="Distinct families per instance (default ~1.3*sqrt(n))")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--master", default=DEFAULT_MASTER, help="Article master (.json backup or .xlsx)")
+    parser.add_argument("--matrix", default=DEFAULT_MATRIX, help="Changeover matrix (.xlsx)")
+    parser.add_argument("--sales-weight", type=float, default=DEFAULT_SALES_WEIGHT, help="pesoVenta stored with each instance")
+    parser.add_argument("--cost-lost-ton", type=float, default=DEFAULT_COST_LOST_TON, help="costoToneladaPerdida")
+    parser.add_argument("--cost-setup-hour", type=float, default=DEFAULT_COST_SETUP_HOUR, help="costoHoraCambio")
+    parser.add_argument("--list", action="store_true", help="Print the manifest and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        list_bank(args.out)
+        return
+    build_bank(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Island-model parallel GA for the sequencer.
+
+Instead of the worker's NUM_EPOCHS sequential restarts, independent GA
+populations ("islands") run in separate processes, each seeded from a
+different constructive heuristic (EDD, nearest neighbour, ATCS). Every
+`--interval` generations each island publishes its elite permutations to a
+shared-memory board and pulls the elite of its ring neighbour, replacing its
+worst individuals. All islands stop at the same wall-clock deadline.
+
+Usage:
+    python islands.py --instance benchmark --islands 4 --budget 10
+    python islands.py --instance instance_bank/n0500_00.npz --scaling 1 2 4 --budget 20
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+from bounds import gap, lower_bound
+from evaluation import Evaluator
+from ga import GeneticAlgorithm
+from instance import Instance
+
+ISLAND_SEEDS = ("edd", "nn", "atcs")
+DEFAULT_INTERVAL = 10
+DEFAULT_MIGRANTS = 2
+DEFAULT_POPULATION = 100
+
+
+def load_instance(spec):
+    if isinstance(spec, Instance):
+        return spec
+    if spec in (None, "benchmark"):
+        return Instance.from_benchmark_json()
+    return Instance.load(spec)
+
+
+class MigrationBoard:
+    """
+    Shared-memory slots, one per island: a version counter, the elite costs
+    and the elite permutations. Each slot has its own lock so an island only
+    ever waits for its neighbour, and only while a copy is in progress.
+    """
+
+    def __init__(self, islands, migrants, n, name=None, locks=None):
+        self.islands, self.migrants, self.n = islands, migrants, n
+        self.slot_bytes = 8 + 8 * migrants + 4 * migrants * n
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=islands * self.slot_bytes)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.locks = locks if locks is not None else [mp.Lock() for _ in range(islands)]
+        self.versions, self.costs, self.perms = [], [], []
+        for i in range(islands):
+            base = i * self.slot_bytes
+            self.versions.append(np.ndarray((1,), np.int64, self.shm.buf, base))
+            self.costs.append(np.ndarray((migrants,), np.float64, self.shm.buf, base + 8))
+            self.perms.append(np.ndarray((migrants, n), np.int32, self.shm.buf, base + 8 + 8 * migrants))
+        if self.owner:
+            for v in self.versions:
+                v[0] = 0
+
+    def spec(self):
+        """What a worker process needs to attach to the board."""
+        return (self.islands, self.migrants, self.n, self.shm.name, self.locks)
+
+    @classmethod
+    def attach(cls, spec):
+        islands, migrants, n, name, locks = spec
+        return cls(islands, migrants, n, name=name, locks=locks)
+
+    def publish(self, island, perms, costs):
+        k = min(len(perms), self.migrants)
+        with self.locks[island]:
+            self.perms[island][:k] = perms[:k]
+            self.costs[island][:k] = costs[:k]
+            self.costs[island][k:] = np.inf
+            self.versions[island][0] += 1
+
+    def read(self, island, seen_version=0):
+        """(version, perms, costs) of `island`, or None if nothing new since `seen_version`."""
+        with self.locks[island]:
+            version = int(self.versions[island][0])
+            if version <= seen_version:
+                return None
+            costs = self.costs[island].copy()
+            perms = self.perms[island].copy()
+        valid = np.isfinite(costs)
+        return version, perms[valid], costs[valid]
+
+    def close(self):
+        # Drop the numpy views before closing the mapping.
+        self.versions = self.costs = self.perms = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def run_island(index, instance, board_spec, cfg, results, done):
+    """Worker process: one GA population until the shared deadline or the target gap."""
+    board = MigrationBoard.attach(board_spec)
+    seed_name = ISLAND_SEEDS[index % len(ISLAND_SEEDS)]
+    ga = GeneticAlgorithm(
+        instance,
+        population_size=cfg["population_size"],
+        mutation_rate=cfg["mutation_rate"],
+        mode="balanced",
+        seed=cfg["seed"] * 1009 + index,
+        seeds=(seed_name,),
+    )
+    neighbour = (index - 1) % board.islands
+    seen = 0
+    received = accepted = 0
+    history = []
+
+    try:
+        while time.time() < cfg["deadline"] and ga.generation < cfg["max_generations"] and not done.is_set():
+            ga.step()
+            if gap(ga.best_cost, cfg["lower_bound"]) <= cfg["target_gap"]:
+                done.set()
+            if board.islands > 1 and ga.generation % cfg["interval"] == 0:
+                elite = ga.elite_slots()[:board.migrants]
+                board.publish(index, ga.population[elite], ga.costs[elite])
+                incoming = board.read(neighbour, seen)
+                if incoming is not None:
+                    seen, perms, _ = incoming
+                    known = set(h for h in ga.diversity.hashes if h is not None)
+                    fresh = [p for p in perms if hash(p.tobytes()) not in known]
+                    received += len(perms)
+                    if fresh:
+                        ga.inject(np.array(fresh))
+                        accepted += len(fresh)
+            if ga.generation % 10 == 0:
+                history.append((time.time(), ga.best_cost))
+    finally:
+        board.close()
+
+    results.put({
+        "island": index,
+        "seed": seed_name,
+        "best": ga.best.tolist(),
+        "best_cost": ga.best_cost,
+        "generations": ga.generation,
+        "evaluations": ga.evaluator.evaluations,
+        "migrants_received": received,
+        "migrants_accepted": accepted,
+        "history": history,
+    })
+
+
+def run_islands(instance, islands=None, time_budget=10.0, interval=DEFAULT_INTERVAL,
+                migrants=DEFAULT_MIGRANTS, population_size=DEFAULT_POPULATION,
+                mutation_rate=0.15, max_generations=10**9, seed=0, target_gap=None):
+    """
+    Run the island model and return the best sequence found plus per-island
+    stats. With `target_gap` (%), all islands stop as soon as one of them is
+    that close to the lower bound (bounds.py).
+    """
+    instance = load_instance(instance)
+    bound = lower_bound(instance)["lower_bound"] if target_gap is not None else 0.0
+    islands = islands or os.cpu_count() or 1
+    ctx = mp.get_context("spawn")
+    board = MigrationBoard(islands, migrants, len(instance), locks=[ctx.Lock() for _ in range(islands)])
+    results = ctx.Queue()
+    done = ctx.Event()
+
+    start = time.time()
+    cfg = {
+        "population_size": population_size,
+        "mutation_rate": mutation_rate,
+        "interval": interval,
+        "max_generations": max_generations,
+        "seed": seed,
+        "deadline": start + time_budget,
+        "lower_bound": bound,
+        "target_gap": target_gap if target_gap is not None else -1.0,
+    }
+    procs = [ctx.Process(target=run_island, args=(i, instance, board.spec(), cfg, results, done), daemon=True)
+             for i in range(islands)]
+    try:
+        for p in procs:
+            p.start()
+        # Drain the queue before join() so large results cannot block the children.
+        per_island = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        board.close()
+
+    per_island.sort(key=lambda r: r["island"])
+    winner = min(per_island, key=lambda r: r["best_cost"])
+    best = np.array(winner["best"], dtype=np.int32)
+    return {
+        "best": best,
+        "best_cost": winner["best_cost"],
+        "lower_bound": bound if target_gap is not None else None,
+        "gap": gap(winner["best_cost"], bound) if target_gap is not None else None,
+        "stopped_at_target": done.is_set(),
+        "breakdown": Evaluator(instance).breakdown(best),
+        "islands": per_island,
+        "elapsed": time.time() - start,
+        "evaluations": sum(r["evaluations"] for r in per_island),
+    }
+
+
+def print_result(result):
+    print(f"{'island':>6} {'seed':>5} {'gens':>7} {'evals/s':>10} {'migr in/acc':>12} {'best cost':>16}")
+    for r in result["islands"]:
+        print(f"{r['island']:>6} {r['seed']:>5} {r['generations']:>7} "
+              f"{r['evaluations'] / result['elapsed']:>10,.0f} "
+              f"{r['migrants_received']:>5}/{r['migrants_accepted']:<6} {r['best_cost']:>16,.2f}")
+    b = result["breakdown"]
+    print(f"\nBest cost {result['best_cost']:,.2f}  (changeover {b['tiempoTotalCambio']:.1f} h, "
+          f"lost sales {b['ventaPerdidaTotal']:,.1f})  in {result['elapsed']:.1f}s, "
+          f"{result['evaluations']:,} evaluations")
+    if result["gap"] is not None:
+        reached = ", target reached" if result["stopped_at_target"] else ""
+        print(f"Lower bound {result['lower_bound']:,.2f}: gap {result['gap']:.2f}%{reached}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Island-model parallel GA for the sequencer")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz from the bank, or 'benchmark'")
+    parser.add_argument("--islands", type=int, default=os.cpu_count() or 1, help="Island processes")
+    parser.add_argument("--budget", type=float, default=10.0, help="Wall-clock seconds")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="Generations between migrations")
+    parser.add_argument("--migrants", type=int, default=DEFAULT_MIGRANTS, help="Elite permutations exchanged")
+    parser.add_argument("--population", type=int, default=DEFAULT_POPULATION, help="Individuals per island")
+    parser.add_argument("--mutation-rate", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-gap", type=float, default=None,
+                        help="Stop once within this %% of the lower bound (and report the gap)")
+    parser.add_argument("--scaling", type=int, nargs="+", default=None,
+                        help="Compare island counts at the same budget, e.g. --scaling 1 2 4 8")
+    args = parser.parse_args()
+
+    instance = load_instance(args.instance)
+    print(f"{instance}: budget {args.budget:.0f}s, migration every {args.interval} generations\n")
+    common = dict(time_budget=args.budget, interval=args.interval, migrants=args.migrants,
+                  population_size=args.population, mutation_rate=args.mutation_rate, seed=args.seed,
+                  target_gap=args.target_gap)
+
+    if args.scaling:
+        rows = []
+        for count in args.scaling:
+            result = run_islands(instance, islands=count, **common)
+            rows.append((count, result["best_cost"], result["evaluations"] / result["elapsed"]))
+            print(f"{count:>3} islands: best cost {result['best_cost']:,.2f}")
+        base = rows[0][1]
+        print(f"\n{'islands':>7} {'best cost':>16} {'vs first':>9} {'evals/s':>10}")
+        for count, cost, rate in rows:
+            print(f"{count:>7} {cost:>16,.2f} {100 * (cost - base) / base:>8.2f}% {rate:>10,.0f}")
+        return
+
+    print_result(run_islands(instance, islands=args.islands, **common))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Local search with candidate lists and don't-look bits.
+
+The worker's orOptRelocation / full2OptFirstImprovement and the Swap/Insert
+neighbourhoods of refineWithHyper try every position for every item, but
+putting an item next to a high-changeover neighbour almost never pays. Here:
+
+  candidate lists  for each item, the items it changes over to and from most
+                   cheaply (changeover hours both ways, from the family
+                   matrix) and the items closest to it in days of stock.
+                   Moves only put an item next to one of its candidates.
+  don't-look bits  an item whose moves found nothing stays asleep until one
+                   of its neighbours changes.
+
+Moves, for item a and candidate b: insert a right after / right before b,
+move the segment of 2-3 items starting at a after b, reverse the stretch
+between a and b so they become adjacent (2-opt), and swap a with the item
+after b. An item that starts after it runs out is also tried at the last few
+positions that would still start in time. The first item of a run (items of
+one family in a row) also moves the whole run to every boundary between
+runs: changeovers take as long as production on the worker's clock, so
+the order of the runs drives lost sales, and moves of 1-3 items can't shift
+a run without first breaking it up. Every candidate is scored with the full
+objective (lost sales depend on all start times), in one batch per item.
+
+Usage:
+    python local_search.py --instance instance_bank/n0500_00.npz
+    python local_search.py --instance benchmark --neighbours 5 --baseline
+"""
+import argparse
+import time
+from collections import deque
+import numpy as np
+
+from evaluation import Evaluator
+from instance import Instance
+
+DEFAULT_NEIGHBOURS = 14
+SEGMENT_LENGTHS = (2, 3)
+DUE_POSITIONS = 3  # insertion positions tried just before a late item would run out
+
+
+def _nearest(key, k):
+    """Row-wise indices of the k smallest entries of `key`, ascending."""
+    n = len(key)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+    near = np.argpartition(key, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(key, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(key, near, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(near, order, axis=1)
+
+
+def candidate_lists(evaluator, k=DEFAULT_NEIGHBOURS):
+    """
+    (n, k) item indices per item, -1 padded: half the cheapest changeover
+    neighbours (round trip, ties by days of stock), half the items closest in
+    days of stock. The first keep families together; the second let an item
+    move to where items as urgent as it are, which changeovers alone miss.
+    """
+    n = evaluator.n
+    k = min(k, n - 1)
+    setup = evaluator.item_setup
+    stock_gap = np.abs(np.subtract.outer(evaluator.stock, evaluator.stock))
+    np.fill_diagonal(stock_gap, np.inf)
+    # Changeover hours dominate; the stock gap only orders items of equal changeover.
+    scale = np.ptp(evaluator.stock) + 1 if n else 1
+    by_setup = (setup + setup.T) * scale + stock_gap
+    lists = np.concatenate([_nearest(by_setup, k - k // 2), _nearest(stock_gap, k // 2)], axis=1)
+    out = np.full((n, k), -1, dtype=np.int32)
+    for a, row in enumerate(lists):
+        _, first = np.unique(row, return_index=True)
+        uniq = row[np.sort(first)]
+        out[a, :len(uniq)] = uniq
+    return out
+
+
+def _insert_after(seq, pos, a, j):
+    """seq with the item at position `pos` moved right after position `j`."""
+    rest = np.delete(seq, pos)
+    return np.insert(rest, j + (j < pos), a)
+
+
+class LocalSearch:
+    """
+    Best-improvement per item over candidate moves, items processed from a
+    queue of awake ones. neighbours=None tries every item as b without run
+    moves (the worker's exhaustive search, as a baseline) and dont_look=False
+    keeps every item awake for another round until a full round finds nothing.
+    """
+
+    def __init__(self, evaluator, neighbours=DEFAULT_NEIGHBOURS, dont_look=True, max_evaluations=None):
+        self.ev = evaluator
+        self.n = evaluator.n
+        self.candidates = candidate_lists(evaluator, neighbours) if neighbours else None
+        self.family = evaluator.instance.family
+        self.dont_look = dont_look
+        self.max_evaluations = max_evaluations
+        self.moves_applied = 0
+
+    def _partners(self, a):
+        if self.candidates is None:
+            return np.delete(np.arange(self.n), a)
+        row = self.candidates[a]
+        return row[row >= 0]
+
+    def start_times(self, seq):
+        """Start of each position, on the evaluator's clock."""
+        ev = self.ev
+        starts = np.zeros(len(seq))
+        starts[1:] = np.cumsum(ev.item_setup[seq[:-1], seq[1:]]) + np.cumsum(ev.production[seq[:-1]])
+        return starts
+
+    def moves(self, seq, pos, a, starts=None):
+        """Candidate sequences for item a (never moving item 0)."""
+        i = pos[a]
+        n = self.n
+        out = []
+        if starts is not None and starts[i] > self.ev.stock[a]:
+            # Late: try the last positions that still start before it runs out.
+            due = int(np.searchsorted(starts, self.ev.stock[a], side="right"))
+            for j in range(max(0, due - DUE_POSITIONS), min(due, i - 1)):
+                out.append(_insert_after(seq, i, a, j))
+        fam = self.family
+        if self.candidates is not None and (fam[a] < 0 or fam[seq[i - 1]] != fam[a]):
+            out.extend(self._run_moves(seq, i))
+        for b in self._partners(a):
+            j = pos[b]
+            # a right after b, and right before b
+            if j != i - 1:
+                out.append(_insert_after(seq, i, a, j))
+            if j >= 2 and j != i + 1:
+                out.append(_insert_after(seq, i, a, j - 1))
+            # segment starting at a, after b
+            for length in SEGMENT_LENGTHS:
+                if i + length <= n and not (i <= j < i + length) and j != i - 1:
+                    seg = seq[i:i + length]
+                    rest = np.concatenate([seq[:i], seq[i + length:]])
+                    at = j + 1 if j < i else j + 1 - length
+                    out.append(np.concatenate([rest[:at], seg, rest[at:]]))
+            # 2-opt: make a and b adjacent by reversing the stretch between them
+            if j > i + 1:
+                cand = seq.copy()
+                cand[i + 1:j + 1] = cand[i + 1:j + 1][::-1]
+                out.append(cand)
+            elif j < i - 1:
+                cand = seq.copy()
+                cand[j + 1:i + 1] = cand[j + 1:i + 1][::-1]
+                out.append(cand)
+            # swap a with the item after b
+            if j + 1 < n and j + 1 != i:
+                cand = seq.copy()
+                cand[i], cand[j + 1] = cand[j + 1], cand[i]
+                out.append(cand)
+        return out
+
+    def _run_moves(self, seq, i):
+        """The run starting at position i moved to every other run boundary."""
+        fam = self.family[seq]
+        e = i + 1
+        while e < self.n and fam[e] == fam[i] >= 0:
+            e += 1
+        rest = np.concatenate([seq[:i], seq[e:]])
+        rest_fam = np.concatenate([fam[:i], fam[e:]])
+        # Unknown families (-1) are runs of one item.
+        change = (rest_fam[1:] != rest_fam[:-1]) | (rest_fam[1:] < 0) | (rest_fam[:-1] < 0)
+        starts = np.flatnonzero(change) + 1
+        return [np.concatenate([rest[:at], seq[i:e], rest[at:]])
+                for at in np.append(starts, len(rest)) if at != i]
+
+    def run(self, seq, cost=None, items=None, confine=False):
+        """
+        Descend from `seq`; returns (sequence, cost). `items` limits the items
+        awake at the start; with don't-look bits the rest wake up when a move
+        changes their neighbours, unless `confine` keeps them asleep for good.
+        """
+        seq = np.array(seq, dtype=np.int32)
+        cost = self.ev.cost(seq) if cost is None else cost
+        n = self.n
+        pos = np.empty(n, dtype=np.int64)
+        pos[seq] = np.arange(n)
+        awake = np.ones(n, dtype=bool)
+        if items is not None:
+            awake[:] = False
+            awake[np.asarray(items, dtype=np.int64)] = True
+        awake[0] = False  # item 0 never moves
+        allowed = awake.copy() if confine else np.ones(n, dtype=bool)
+        queue = deque(int(x) for x in seq[1:] if awake[x])
+        starts = self.start_times(seq)
+        improved_round = False
+        while queue:
+            if self.max_evaluations is not None and self.ev.evaluations >= self.max_evaluations:
+                break
+            a = queue.popleft()
+            awake[a] = False
+            cands = self.moves(seq, pos, a, starts)
+            if cands:
+                costs = self.ev.costs(np.array(cands, dtype=np.int32))
+                k = int(np.argmin(costs))
+                if costs[k] < cost - 1e-9:
+                    new = cands[k]
+                    changed = self._changed_items(seq, new) if self.dont_look else ()
+                    seq, cost = new, float(costs[k])
+                    pos[seq] = np.arange(n)
+                    starts = self.start_times(seq)
+                    self.moves_applied += 1
+                    improved_round = True
+                    for x in changed:
+                        if x and allowed[x] and not awake[x]:
+                            awake[x] = True
+                            queue.append(int(x))
+                    if not awake[a]:
+                        awake[a] = True
+                        queue.append(a)
+            if not queue and not self.dont_look and improved_round:
+                # Exhaustive mode: another full round until nothing improves.
+                improved_round = False
+                awake[1:] = allowed[1:]
+                queue.extend(int(x) for x in seq[1:] if awake[x])
+        return seq, cost
+
+    @staticmethod
+    def _changed_items(old, new):
+        """Items whose predecessor or successor differs between two sequences."""
+        n = len(old)
+        succ_old = np.full(n, -1)
+        succ_new = np.full(n, -1)
+        succ_old[old[:-1]] = old[1:]
+        succ_new[new[:-1]] = new[1:]
+        pred_old = np.full(n, -1)
+        pred_new = np.full(n, -1)
+        pred_old[old[1:]] = old[:-1]
+        pred_new[new[1:]] = new[:-1]
+        return np.flatnonzero((succ_old != succ_new) | (pred_old != pred_new))
+
+
+def candidate_local_search(ev, rng, seq=None, neighbours=DEFAULT_NEIGHBOURS):
+    """Metaheuristic entry (metaheuristics.ALGORITHMS): descend from a random start."""
+    if seq is None:
+        seq = np.concatenate([[0], rng.permutation(np.arange(1, ev.n))]).astype(np.int32)
+    return LocalSearch(ev, neighbours).run(seq)
+
+
+def main():
+    from ga import sequence_edd
+
+    parser = argparse.ArgumentParser(description="Candidate-list local search")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--neighbours", type=int, default=DEFAULT_NEIGHBOURS, help="Candidates per item")
+    parser.add_argument("--start", choices=("edd", "random"), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", action="store_true", help="Also run every-position search without don't-look bits")
+    args = parser.parse_args()
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    rng = np.random.default_rng(args.seed)
+    start_seq = sequence_edd(inst) if args.start == "edd" else \
+        np.concatenate([[0], rng.permutation(np.arange(1, len(inst)))]).astype(np.int32)
+    print(f"{inst}: start cost {Evaluator(inst).cost(start_seq):,.2f}")
+
+    runs = [("candidates + don't-look", args.neighbours, True)]
+    if args.baseline:
+        runs.append(("every position", None, False))
+    for label, neighbours, dont_look in runs:
+        ev = Evaluator(inst)
+        t = time.perf_counter()
+        ls = LocalSearch(ev, neighbours, dont_look)
+        _, cost = ls.run(start_seq)
+        print(f"{label:<24} cost {cost:>18,.2f}  {ev.evaluations:>12,} evaluations  "
+              f"{ls.moves_applied:>6} moves  {time.perf_counter() - t:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+import time
+import numpy as np
+
+from evaluation import Evaluator
+from ga import GeneticAlgorithm, sequence_nearest_neighbor
+from local_search import candidate_local_search
+
+# Python ports of the metaheuristics in scripts/benchmark_sequencer.js, on int
+# permutations scored with the app objective (Evaluator) instead of the
+# script's mock cost. Item 0 stays first, as in the worker, so every move only
+# touches positions 1..n-1.
+#
+# Each algorithm takes a BudgetedEvaluator and a numpy Generator, returns
+# (best permutation, best cost) of its own run and runs for the script's
+# iteration count, or forever when `iterations` is None. The evaluator raises
+# BudgetExhausted once the time or evaluation budget is spent and keeps the
+# best permutation seen by any evaluation, so nested calls (GRASP -> VNS,
+# hyper -> or-opt) need no bookkeeping of their own.
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class BudgetedEvaluator(Evaluator):
+    """Evaluator with a time/evaluation budget and an improvement trace."""
+
+    def __init__(self, instance, max_seconds=None, max_evaluations=None):
+        super().__init__(instance)
+        self.max_seconds = max_seconds
+        self.max_evaluations = max_evaluations
+        self.best = None
+        self.best_cost = np.inf
+        self.trace = []  # (seconds, evaluations, cost) at each improvement
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def exhausted(self):
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return True
+        return self.max_seconds is not None and self.elapsed() >= self.max_seconds
+
+    def costs(self, perms):
+        if self.exhausted():
+            raise BudgetExhausted
+        perms = np.atleast_2d(perms)
+        truncated = False
+        if self.max_evaluations is not None and self.evaluations + len(perms) > self.max_evaluations:
+            perms = perms[:self.max_evaluations - self.evaluations]
+            truncated = True
+        costs = super().costs(perms)
+        i = int(np.argmin(costs))
+        # Partial sequences (ruin & recreate) are scored too; only full ones count as solutions.
+        if perms.shape[1] == self.n and costs[i] < self.best_cost:
+            self.best, self.best_cost = perms[i].copy(), float(costs[i])
+            self.trace.append((self.elapsed(), self.evaluations, self.best_cost))
+        if truncated:
+            raise BudgetExhausted
+        return costs
+
+
+def random_permutation(n, rng):
+    return np.concatenate([[0], rng.permutation(np.arange(1, n))]).astype(np.int32)
+
+
+def _start(ev, rng, seq):
+    seq = random_permutation(ev.n, rng) if seq is None else np.array(seq, dtype=np.int32)
+    return seq, ev.cost(seq)
+
+
+def _steps(iterations):
+    i = 0
+    while iterations is None or i < iterations:
+        yield i
+        i += 1
+
+
+# --- Neighbourhoods (swap, insert, reverse, batchMove) ----------------------
+
+def swap(seq, rng):
+    n = len(seq)
+    if n > 2:
+        a, b = rng.integers(1, n, size=2)
+        seq[a], seq[b] = seq[b], seq[a]
+    return seq
+
+
+def insert(seq, rng):
+    n = len(seq)
+    if n <= 2:
+        return seq
+    a, b = rng.integers(1, n, size=2)
+    item = seq[a]
+    rest = np.delete(seq, a)
+    return np.insert(rest, b, item)
+
+
+def reverse(seq, rng):
+    n = len(seq)
+    if n <= 3:
+        return seq
+    i = rng.integers(1, n - 1)
+    j = rng.integers(i + 1, n)
+    seq[i:j + 1] = seq[i:j + 1][::-1]
+    return seq
+
+
+def batch_move(seq, family, rng):
+    """Move every item of one family together as a block."""
+    n = len(seq)
+    if n <= 2:
+        return seq
+    target = family[seq[rng.integers(1, n)]]
+    in_batch = family[seq[1:]] == target
+    batch, rest = seq[1:][in_batch], seq[1:][~in_batch]
+    pos = rng.integers(0, len(rest) + 1)
+    return np.concatenate([seq[:1], rest[:pos], batch, rest[pos:]]).astype(np.int32)
+
+
+def _neighbourhoods(ev):
+    family = ev.instance.family
+    return [swap, insert, reverse, lambda s, rng: batch_move(s, family, rng)]
+
+
+# --- Algorithms -------------------------------------------------------------
+
+def random_search(ev, rng, iterations=1000, batch=100):
+    best, best_cost = None, np.inf
+    for done in range(0, iterations, batch):
+        perms = np.array([random_permutation(ev.n, rng) for _ in range(min(batch, iterations - done))])
+        costs = ev.costs(perms)
+        i = int(np.argmin(costs))
+        if costs[i] < best_cost:
+            best, best_cost = perms[i], float(costs[i])
+    return best, best_cost
+
+
+def greedy(ev, rng=None):
+    """Nearest neighbour on changeover hours from item 0 (first-index tie-break)."""
+    seq = sequence_nearest_neighbor(ev)
+    return seq, ev.cost(seq)
+
+
+def simulated_annealing(ev, rng, iterations=50000, temp=1000.0, cooling=0.999, seq=None):
+    current, current_cost = _start(ev, rng, seq)
+    best, best_cost = current.copy(), current_cost
+    family = ev.instance.family
+    for _ in _steps(iterations):
+        r = rng.random()
+        if r < 0.3:
+            nxt = swap(current.copy(), rng)
+        elif r < 0.6:
+            nxt = insert(current, rng)
+        else:
+            nxt = batch_move(current, family, rng)
+        cost = ev.cost(nxt)
+        delta = cost - current_cost
+        if delta < 0 or rng.random() < np.exp(-delta / temp):
+            current, current_cost = nxt, cost
+            if cost < best_cost:
+                best, best_cost = nxt.copy(), cost
+        temp *= cooling
+    return best, best_cost
+
+
+def vns(ev, rng, iterations=5000, seq=None):
+    """Variable neighbourhood search: shake in k = 1..4, back to 1 on improvement."""
+    current, current_cost = _start(ev, rng, seq)
+    moves = _neighbourhoods(ev)
+    for _ in _steps(iterations):
+        k = 0
+        while k < len(moves):
+            nxt = moves[k](current.copy(), rng)
+            cost = ev.cost(nxt)
+            if cost < current_cost:
+                current, current_cost = nxt, cost
+                k = 0
+            else:
+                k += 1
+    return current, current_cost
+
+
+def tabu_search(ev, rng, iterations=10000, tenure=10, samples=50, seq=None):
+    current, current_cost = _start(ev, rng, seq)
+    best, best_cost = current.copy(), current_cost
+    n = ev.n
+    if n <= 2:
+        return best, best_cost
+    tabu = {}
+    for i in _steps(iterations):
+        pairs = np.sort(rng.integers(1, n, size=(samples, 2)), axis=1)
+        cands = np.repeat(current[None], samples, axis=0)
+        rows = np.arange(samples)
+        cands[rows, pairs[:, 0]], cands[rows, pairs[:, 1]] = current[pairs[:, 1]], current[pairs[:, 0]]
+        costs = ev.costs(cands)
+        chosen = None
+        for k in np.argsort(costs, kind="stable"):
+            move = (int(pairs[k, 0]), int(pairs[k, 1]))
+            if tabu.get(move, -1) <= i or costs[k] < best_cost:
+                chosen = k
+                break
+        if chosen is None:
+            continue
+        current, current_cost = cands[chosen], float(costs[chosen])
+        tabu[(int(pairs[chosen, 0]), int(pairs[chosen, 1]))] = i + tenure
+        if current_cost < best_cost:
+            best, best_cost = current.copy(), current_cost
+    return best, best_cost
+
+
+def grasp_construct(ev, rng, alpha):
+    n = ev.n
+    seq = np.empty(n, dtype=np.int32)
+    seq[0] = 0
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[0] = False
+    current = 0
+    for k in range(1, n):
+        cand = np.flatnonzero(unvisited)
+        tc = ev.item_setup[current, cand]
+        threshold = tc.min() + alpha * (tc.max() - tc.min())
+        current = int(rng.choice(cand[tc <= threshold]))
+        seq[k] = current
+        unvisited[current] = False
+    return seq
+
+
+def grasp(ev, rng, iterations=100, alpha=0.3, refine=500):
+    """Randomised greedy construction on changeover hours, refined with a short VNS."""
+    best, best_cost = None, np.inf
+    for _ in _steps(iterations):
+        seq, cost = vns(ev, rng, refine, seq=grasp_construct(ev, rng, alpha))
+        if cost < best_cost:
+            best, best_cost = seq, cost
+    return best, best_cost
+
+
+def lahc(ev, rng, iterations=50000, history=100, seq=None):
+    """Late acceptance hill climbing with swap moves."""
+    current, current_cost = _start(ev, rng, seq)
+    best, best_cost = current.copy(), current_cost
+    past = np.full(history, current_cost)
+    for i in _steps(iterations):
+        nxt = swap(current.copy(), rng)
+        cost = ev.cost(nxt)
+        if cost <= current_cost or cost <= past[i % history]:
+            current, current_cost = nxt, cost
+            if cost < best_cost:
+                best, best_cost = nxt.copy(), cost
+        past[i % history] = current_cost
+    return best, best_cost
+
+
+def best_insertion(ev, seq, item):
+    """Insert `item` at the position (after item 0) that minimises the cost of the partial sequence."""
+    positions = np.arange(1, len(seq) + 1)
+    cands = np.array([np.insert(seq, p, item) for p in positions], dtype=np.int32)
+    return cands[int(np.argmin(ev.costs(cands)))]
+
+
+def ruin_and_recreate(ev, rng, iterations=100, ruin=4, refine=100, seq=None):
+    current, current_cost = _start(ev, rng, seq)
+    best, best_cost = current.copy(), current_cost
+    n = ev.n
+    if n <= ruin + 1:
+        return best, best_cost
+    for _ in _steps(iterations):
+        start = rng.integers(1, n - ruin + 1)
+        removed = current[start:start + ruin]
+        partial = np.concatenate([current[:start], current[start + ruin:]])
+        for item in removed[::-1]:
+            partial = best_insertion(ev, partial, item)
+        seq, cost = vns(ev, rng, refine, seq=partial)
+        if cost < current_cost:
+            current, current_cost = seq, cost
+            if cost < best_cost:
+                best, best_cost = seq.copy(), cost
+    return best, best_cost
+
+
+def guided_local_search(ev, rng, iterations=500, alpha=0.3, samples=50, seq=None):
+    """
+    Swap local search on cost + lambda * edge penalties; at each local optimum
+    the edges with the highest changeover / (1 + penalty) are penalised.
+    lambda is alpha * (local optimum cost / edges), the usual GLS scaling; the
+    script's fixed 0.5 is negligible against costs in the hundreds of thousands.
+    """
+    current, _ = _start(ev, rng, seq)
+    best, best_cost = current.copy(), np.inf
+    n = ev.n
+    if n <= 2:
+        return current, ev.cost(current)
+    penalties = np.zeros((n, n))
+    lam = None
+
+    def augmented(perms):
+        base = ev.costs(perms)
+        return base, base + (lam or 0.0) * penalties[perms[:, :-1], perms[:, 1:]].sum(axis=1)
+
+    _, current_aug = augmented(current[None])
+    current_aug = current_aug[0]
+    for _ in _steps(iterations):
+        while True:
+            pairs = rng.integers(1, n, size=(samples, 2))
+            cands = np.repeat(current[None], samples, axis=0)
+            rows = np.arange(samples)
+            cands[rows, pairs[:, 0]], cands[rows, pairs[:, 1]] = current[pairs[:, 1]], current[pairs[:, 0]]
+            _, aug = augmented(cands)
+            k = int(np.argmin(aug))
+            if aug[k] >= current_aug:
+                break
+            current, current_aug = cands[k], aug[k]
+
+        cost = ev.cost(current)
+        if cost < best_cost:
+            best, best_cost = current.copy(), cost
+        if lam is None:
+            lam = alpha * cost / (n - 1)
+        a, b = current[:-1], current[1:]
+        utility = ev.item_setup[a, b] / (1 + penalties[a, b])
+        worst = utility == utility.max()
+        penalties[a[worst], b[worst]] += 1
+        current_aug = cost + lam * penalties[a, b].sum()
+    return best, best_cost
+
+
+def or_opt(ev, rng, iterations=None, seq=None):
+    """Relocate segments of 3, 2 and 1 items to their best position until no move improves."""
+    current, current_cost = _start(ev, rng, seq)
+    n = ev.n
+    for _ in _steps(iterations):
+        improved = False
+        for size in (3, 2, 1):
+            for j in range(1, n - size + 1):
+                segment = current[j:j + size]
+                rest = np.concatenate([current[:j], current[j + size:]])
+                cands = np.array([np.concatenate([rest[:k], segment, rest[k:]])
+                                  for k in range(1, len(rest) + 1) if k != j], dtype=np.int32)
+                if not len(cands):
+                    continue
+                costs = ev.costs(cands)
+                k = int(np.argmin(costs))
+                if costs[k] < current_cost:
+                    current, current_cost = cands[k], float(costs[k])
+                    improved = True
+        if not improved:
+            break
+    return current, current_cost
+
+
+def memetic(ev, rng, generations=20, population_size=5, refine=200):
+    """Tiny population, each individual refined by VNS, one-cut order crossover."""
+    population = [vns(ev, rng, 0) for _ in range(population_size)]
+    n = ev.n
+    for _ in _steps(generations):
+        population = [vns(ev, rng, refine, seq=seq) for seq, _ in population]
+        children = []
+        for i in range(population_size):
+            p1, p2 = population[i][0], population[(i + 1) % population_size][0]
+            cut = rng.integers(1, n) if n > 1 else 1
+            seen = np.zeros(n, dtype=bool)
+            seen[p1[:cut]] = True
+            children.append(np.concatenate([p1[:cut], p2[~seen[p2]]]).astype(np.int32))
+        costs = ev.costs(np.array(children))
+        population += list(zip(children, costs))
+        population.sort(key=lambda ind: ind[1])
+        population = population[:population_size]
+    return population[0]
+
+
+def three_opt(ev, rng, iterations=100, seq=None):
+    """Segment exchange a..b <-> b..c with short random segments."""
+    current, current_cost = _start(ev, rng, seq)
+    n = ev.n
+    if n < 8:
+        return current, current_cost
+    for _ in _steps(iterations):
+        a = rng.integers(1, n - 6)
+        b = a + 2 + rng.integers(0, 2)
+        c = b + 2 + rng.integers(0, 2)
+        nxt = np.concatenate([current[:a], current[b:c], current[a:b], current[c:]])
+        cost = ev.cost(nxt)
+        if cost < current_cost:
+            current, current_cost = nxt, cost
+    return current, current_cost
+
+
+def adaptive_vns(ev, rng, iterations=10000, seq=None, weights=(1.0, 1.0, 1.0, 1.0),
+                 reward=0.1, penalty=0.01, moves=None):
+    """Roulette choice between neighbourhoods, rewarding the ones that improve."""
+    current, current_cost = _start(ev, rng, seq)
+    moves = moves or _neighbourhoods(ev)
+    weights = np.array(weights, dtype=np.float64)
+    for _ in _steps(iterations):
+        k = int(rng.choice(len(moves), p=weights / weights.sum()))
+        nxt = moves[k](current.copy(), rng)
+        cost = ev.cost(nxt)
+        if cost < current_cost:
+            current, current_cost = nxt, cost
+            weights[k] += reward
+        else:
+            weights[k] = max(0.1, weights[k] - penalty)
+    return current, current_cost
+
+
+def hyper(ev, rng, iterations=5000, disturb_every=1000):
+    """GRASP seed, adaptive neighbourhoods incl. or-opt, periodic ruin & recreate, or-opt polish."""
+    seq, cost = grasp(ev, rng, 10, alpha=0.2)
+    moves = _neighbourhoods(ev) + [lambda s, rng: or_opt(ev, rng, seq=s)[0]]
+    weights = np.array([1.0, 1.0, 1.5, 1.2, 2.0])
+    best, best_cost = seq, cost
+    for i in _steps(iterations):
+        k = int(rng.choice(len(moves), p=weights / weights.sum()))
+        nxt = moves[k](seq.copy(), rng)
+        nxt_cost = ev.cost(nxt)
+        if nxt_cost < cost:
+            seq, cost = nxt, nxt_cost
+            weights[k] += 0.2
+            if cost < best_cost:
+                best, best_cost = seq.copy(), cost
+        else:
+            weights[k] = max(0.1, weights[k] - 0.02)
+        if i and i % disturb_every == 0:
+            r_seq, r_cost = ruin_and_recreate(ev, rng, 5, seq=seq)
+            if r_cost < cost:
+                seq, cost = r_seq, r_cost
+    return or_opt(ev, rng, seq=best)
+
+
+def genetic_algorithm(ev, rng, generations=None):
+    """The worker's memetic GA (ga.py), for reference against the script's algorithms."""
+    ga = GeneticAlgorithm(ev.instance, seed=int(rng.integers(2**31)), evaluator=ev)
+    for _ in _steps(generations):
+        ga.step()
+    return ga.best, ga.best_cost
+
+
+# name -> (function, restart until the budget is spent)
+ALGORITHMS = {
+    "random": (random_search, True),
+    "greedy": (greedy, False),
+    "sa": (simulated_annealing, True),
+    "vns": (vns, True),
+    "tabu": (tabu_search, True),
+    "grasp": (grasp, True),
+    "lahc": (lahc, True),
+    "rr": (ruin_and_recreate, True),
+    "gls": (guided_local_search, True),
+    "oropt": (or_opt, True),
+    "cls": (candidate_local_search, True),
+    "memetic": (memetic, True),
+    "3opt": (three_opt, True),
+    "avns": (adaptive_vns, True),
+    "hyper": (hyper, True),
+    "ga": (genetic_algorithm, True),
+}
+
+
+def run_algorithm(name, instance, seed, max_seconds=None, max_evaluations=None):
+    """
+    Run one algorithm under a budget. Restartable algorithms are run again from
+    a fresh random start whenever they finish early, so every entry uses the
+    whole budget. Returns the BudgetedEvaluator (best, best_cost, trace, ...).
+    """
+    if max_seconds is None and max_evaluations is None:
+        raise ValueError("a time or evaluation budget is required")
+    fn, restart = ALGORITHMS[name]
+    rng = np.random.default_rng(seed)
+    ev = BudgetedEvaluator(instance, max_seconds, max_evaluations)
+    try:
+        fn(ev, rng)
+        while restart:
+            fn(ev, rng)
+    except BudgetExhausted:
+        pass
+    return ev
@@ -0,0 +1,417 @@
+"""
+Joint SKU-to-mill assignment and sequencing for laminador1/2/3.
+
+plannerOptimization.ts assigns tonnage to machines with an LP that knows
+nothing about changeovers, and the sequencer then orders one mill at a time.
+Here the assignment and the per-mill sequences are optimized together:
+
+  1. a capacity-aware greedy assignment (least flexible items first, onto the
+     compatible mill with the lowest relative load, preferring mills already
+     running the item's change-table family);
+  2. every round, each mill's subproblem runs in its own worker process: the
+     mill is re-sequenced (family decomposition + candidate-list local search
+     the first time, incremental repair around the items that came and went
+     afterwards), then it prices the removal of each of its items and the
+     cheapest insertion of a few candidate items from the other mills;
+  3. the main process applies the moves with the best marginal cost (sequence
+     cost on both mills, hours over capacity, cost per ton), and keeps the
+     round only if the real total improved; otherwise it retries with half
+     as many moves.
+
+The total is the sum of the mills' sequencing objectives (evaluation.py) plus
+OVERTIME_FACTOR changeover hours' cost for every hour over a mill's capacity
+plus the per-ton cost of rolling each item where it is assigned. A mill with
+nothing on it starts from an empty item (0 t, unknown family).
+
+Only one mill's article master is in the repo, so the CLI splits a
+single-mill instance into synthetic mills (MultiMillInstance.split); real
+data comes in through MultiMillInstance.from_mill_instances.
+
+Usage:
+    python multi_mill.py --instance instance_bank/n0500_00.npz
+    python multi_mill.py --instance instance_bank/n1000_00.npz --rounds 30 --candidates 30
+"""
+import argparse
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from decomposition import solve as decompose
+from evaluation import Evaluator
+from incremental import reoptimize
+from instance import DEFAULT_COST_LOST_TON, DEFAULT_COST_SETUP_HOUR, DEFAULT_SALES_WEIGHT, Instance
+from local_search import LocalSearch
+
+MILLS = ("laminador1", "laminador2", "laminador3")
+DEFAULT_ROUNDS = 20
+MOVE_CANDIDATES = 20  # items priced for insertion on each mill per round
+MAX_MOVES = 8  # moves applied per round at first; halved after a rejected round
+OVERTIME_FACTOR = 2.0  # an hour over capacity costs this many changeover hours
+FAMILY_AFFINITY = 0.1  # initial assignment: relative-load discount for a mill already running the family
+START_SKU = "start"
+START_STOCK_DAYS = 999.0
+
+# MultiMillInstance.split (synthetic mills)
+COMPATIBLE_SHARE = 0.7  # chance an item can be rolled on a given mill
+PACE_SPREAD = 0.15  # log-normal sigma of an item's rolling time across mills
+SETUP_SPREAD = 0.2  # per-mill scale of the changeover matrix, 1 +- this
+CAPACITY_SLACK = 1.25  # capacity = fair share of the rolling hours x this, with room for changeovers
+
+
+class Mill:
+    """
+    One mill: days of rolling per item (<= 0 or nan: can't roll it), change-table
+    row per item and changeover matrix, capacity in hours, the item on the mill
+    now (fixed first, or None) and an optional cost per tonne per item.
+    """
+
+    def __init__(self, name, production_days, family, setup_hours, capacity_hours,
+                 current=None, cost_ton=None, family_ids=None):
+        self.name = name
+        self.production_days = np.nan_to_num(np.asarray(production_days, dtype=np.float64), nan=0.0)
+        self.family = np.asarray(family, dtype=np.int32)
+        self.setup_hours = np.asarray(setup_hours, dtype=np.float64)
+        self.capacity_hours = float(capacity_hours)
+        self.current = current
+        self.cost_ton = np.zeros(len(self.family)) if cost_ton is None else np.asarray(cost_ton, dtype=np.float64)
+        self.family_ids = family_ids
+        self.compatible = self.production_days > 0
+
+
+class MultiMillInstance:
+    def __init__(self, quantity, daily_sales, stock_days, mills, skus=None, name="multi_mill",
+                 sales_weight=DEFAULT_SALES_WEIGHT, cost_lost_ton=DEFAULT_COST_LOST_TON,
+                 cost_setup_hour=DEFAULT_COST_SETUP_HOUR):
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.daily_sales = np.asarray(daily_sales, dtype=np.float64)
+        self.stock_days = np.asarray(stock_days, dtype=np.float64)
+        self.mills = list(mills)
+        n = len(self.quantity)
+        self.skus = list(skus) if skus is not None else [str(i) for i in range(n)]
+        self.name = name
+        self.params = {"sales_weight": float(sales_weight), "cost_lost_ton": float(cost_lost_ton),
+                       "cost_setup_hour": float(cost_setup_hour)}
+        for mill in self.mills:
+            if len(mill.production_days) != n or len(mill.family) != n:
+                raise ValueError(f"mill {mill.name} has data for {len(mill.production_days)} items, expected {n}")
+        self.compatible = np.array([mill.compatible for mill in self.mills])
+        for mill in self.mills:
+            if mill.current is not None:
+                self.compatible[:, mill.current] = False
+                self.compatible[self.mills.index(mill), mill.current] = True
+        orphans = np.flatnonzero(~self.compatible.any(axis=0))
+        if len(orphans):
+            raise ValueError(f"{len(orphans)} items can't be rolled on any mill (e.g. {self.skus[orphans[0]]})")
+        self.fixed = {mill.current for mill in self.mills if mill.current is not None}
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __repr__(self):
+        return f"MultiMillInstance({self.name!r}, n={len(self)}, mills={[m.name for m in self.mills]})"
+
+    def hours(self, m, items):
+        """Rolling hours of `items` on mill m (no changeovers)."""
+        return 24 * self.mills[m].production_days[np.asarray(items, dtype=np.int64)].sum()
+
+    def overtime_cost(self, m, hours):
+        return max(0.0, hours - self.mills[m].capacity_hours) * OVERTIME_FACTOR * self.params["cost_setup_hour"]
+
+    def rolling_cost(self, m, items):
+        items = np.asarray(items, dtype=np.int64)
+        return float((self.mills[m].cost_ton[items] * self.quantity[items]).sum())
+
+    def sub_instance(self, m, items):
+        """
+        Single-mill Instance: the mill's current item (or an empty start item)
+        then `items`; skus are the global item indices as strings.
+        """
+        mill = self.mills[m]
+        idx = np.asarray(items, dtype=np.int64)
+        if mill.current is not None:
+            idx = np.concatenate([[mill.current], idx])
+            head = {}
+        else:
+            head = {"quantity": 0.0, "daily_sales": 0.0, "stock_days": START_STOCK_DAYS,
+                    "production_days": 0.0, "family": -1}
+
+        def column(values, key):
+            col = values[idx]
+            return np.concatenate([[head[key]], col]) if head else col
+
+        skus = ([START_SKU] if head else []) + [str(i) for i in idx]
+        return Instance(column(self.quantity, "quantity"), column(self.daily_sales, "daily_sales"),
+                        column(self.stock_days, "stock_days"), column(mill.production_days, "production_days"),
+                        column(mill.family, "family"), mill.setup_hours,
+                        skus=skus, family_ids=mill.family_ids, name=mill.name, **self.params)
+
+    # --- builders
+
+    @classmethod
+    def from_mill_instances(cls, instances, capacity_hours, current=None, cost_ton=None, name="multi_mill"):
+        """
+        From one Instance per mill over the same items in the same order (e.g.
+        Instance.from_items with each mill's article master and changeover
+        rules; ritmo 0 -> production_days 0 marks an item the mill can't roll).
+        Quantities, sales, stock and cost parameters are taken from the first.
+        """
+        names = list(instances)
+        first = instances[names[0]]
+        current = current or {}
+        cost_ton = cost_ton or {}
+        mills = [Mill(nm, inst.production_days, inst.family, inst.setup_hours, capacity_hours[nm],
+                      current.get(nm), cost_ton.get(nm), inst.family_ids) for nm, inst in instances.items()]
+        return cls(first.quantity, first.daily_sales, first.stock_days, mills, first.skus, name, **first.params)
+
+    @classmethod
+    def split(cls, instance, names=MILLS, seed=0):
+        """
+        Synthetic mills from a single-mill instance: each item can be rolled on
+        each mill with probability COMPATIBLE_SHARE (at least one), its rolling
+        time varies by mill, each mill scales the changeover matrix, and item 0
+        is on the first mill.
+        """
+        rng = np.random.default_rng(seed)
+        n, k = len(instance), len(names)
+        compatible = rng.random((k, n)) < COMPATIBLE_SHARE
+        compatible[rng.integers(k, size=n), np.arange(n)] = True
+        pace = np.exp(rng.normal(0, PACE_SPREAD, size=(k, n)))
+        production = np.where(compatible, instance.production_days * pace, 0.0)
+        best_hours = 24 * np.where(compatible, production, np.inf).min(axis=0).sum()
+        capacity = best_hours / k * CAPACITY_SLACK
+        mills = []
+        for m, mill_name in enumerate(names):
+            scale = 1 + rng.uniform(-SETUP_SPREAD, SETUP_SPREAD)
+            mills.append(Mill(mill_name, production[m], instance.family, instance.setup_hours * scale, capacity,
+                              current=0 if m == 0 else None, family_ids=instance.family_ids))
+        return cls(instance.quantity, instance.daily_sales, instance.stock_days, mills, instance.skus,
+                   f"{instance.name} x{k} mills", **instance.params)
+
+
+def initial_assignment(multi):
+    """Mill index per item: least flexible and longest items first, onto the least loaded compatible mill."""
+    n, k = len(multi), len(multi.mills)
+    assign = np.full(n, -1, dtype=np.int64)
+    load = np.zeros(k)
+    families = [set() for _ in range(k)]
+    for m, mill in enumerate(multi.mills):
+        if mill.current is not None:
+            assign[mill.current] = m
+            load[m] += multi.hours(m, [mill.current])
+            families[m].add(int(mill.family[mill.current]))
+    hours = np.array([24 * mill.production_days for mill in multi.mills])
+    capacity = np.array([max(mill.capacity_hours, 1e-9) for mill in multi.mills])
+    flexibility = multi.compatible.sum(axis=0)
+    longest = np.where(multi.compatible, hours, 0).max(axis=0)
+    for i in np.lexsort((-longest, flexibility)):
+        if assign[i] >= 0:
+            continue
+        options = np.flatnonzero(multi.compatible[:, i])
+        score = [(load[m] + hours[m, i]) / capacity[m]
+                 - (FAMILY_AFFINITY if int(multi.mills[m].family[i]) in families[m] else 0.0) for m in options]
+        m = int(options[int(np.argmin(score))])
+        assign[i] = m
+        load[m] += hours[m, i]
+        families[m].add(int(multi.mills[m].family[i]))
+    return assign
+
+
+# --- worker processes -----------------------------------------------------------
+
+_MULTI = None
+
+
+def _init_worker(multi):
+    global _MULTI
+    _MULTI = multi
+
+
+def mill_round(job):
+    """
+    Worker: (re-)sequence one mill and price moves. Returns the sequence as
+    global item indices (with the start item first), its objective, hours,
+    removal deltas for its own items and, per candidate, the cheapest
+    insertion delta.
+    """
+    multi, m = _MULTI, job["mill"]
+    start = time.perf_counter()
+    items = list(job["items"])
+    inst = multi.sub_instance(m, items)
+    ev = Evaluator(inst)
+    if len(inst) == 1:
+        seq = np.zeros(1, dtype=np.int32)
+        cost = ev.cost(seq)
+    elif job["previous"] is None:
+        seq = decompose(inst)["sequence"]
+        seq, cost = LocalSearch(ev).run(seq)
+    else:
+        result = reoptimize(inst, job["previous"], evaluator=ev)
+        seq, cost = result["sequence"], result["cost"]
+
+    changeover = float(ev.components(seq[None])[0][0])
+    sequence = [inst.skus[i] for i in seq]
+    out_items = [int(s) for s in sequence[1:]]
+    removal = {}
+    if len(seq) > 1:
+        dropped = np.array([np.delete(seq, p) for p in range(1, len(seq))], dtype=np.int32)
+        removal = dict(zip(out_items, (ev.costs(dropped) - cost).tolist()))
+
+    insertion = {}
+    candidates = list(job["candidates"])
+    if candidates:
+        # Same rows as `inst` first, so `seq` is valid as is.
+        plus = Evaluator(multi.sub_instance(m, items + candidates))
+        for k, c in enumerate(candidates):
+            local = len(inst) + k
+            cands = np.array([np.insert(seq, at, local) for at in range(1, len(seq) + 1)], dtype=np.int32)
+            insertion[c] = float(plus.costs(cands).min() - cost)
+
+    return {
+        "mill": m,
+        "sequence": sequence,
+        "cost": float(cost),
+        "hours": multi.hours(m, [int(s) for s in sequence if s != START_SKU]) + changeover,
+        "removal": removal,
+        "insertion": insertion,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# --- outer loop ---------------------------------------------------------------------
+
+def total_cost(multi, assign, state):
+    """Sum of the mills' objectives, overtime and rolling cost."""
+    total = 0.0
+    for m, r in enumerate(state):
+        total += r["cost"] + multi.overtime_cost(m, r["hours"])
+        total += multi.rolling_cost(m, np.flatnonzero(assign == m))
+    return total
+
+
+def pick_candidates(multi, assign, state, count):
+    """Per mill, items elsewhere that it can roll, those whose removal saves most first."""
+    removal = {}
+    for r in state or ():
+        removal.update(r["removal"])
+    picks = []
+    for m in range(len(multi.mills)):
+        pool = [i for i in np.flatnonzero(multi.compatible[m] & (assign != m)) if int(i) not in multi.fixed]
+        pool.sort(key=lambda i: removal.get(int(i), 0.0))
+        picks.append([int(i) for i in pool[:count]])
+    return picks
+
+
+def propose_moves(multi, assign, state, max_moves):
+    """[(delta, item, from, to)]: the best improving moves, each item at most once."""
+    scored = []
+    for b, r in enumerate(state):
+        for item, ins in r["insertion"].items():
+            a = int(assign[item])
+            if a == b or item not in state[a]["removal"]:
+                continue
+            hours_a = state[a]["hours"] - multi.hours(a, [item])
+            hours_b = r["hours"] + multi.hours(b, [item])
+            delta = ins + state[a]["removal"][item]
+            delta += multi.overtime_cost(a, hours_a) - multi.overtime_cost(a, state[a]["hours"])
+            delta += multi.overtime_cost(b, hours_b) - multi.overtime_cost(b, r["hours"])
+            delta += multi.rolling_cost(b, [item]) - multi.rolling_cost(a, [item])
+            if delta < -1e-9:
+                scored.append((delta, item, a, b))
+    scored.sort()
+    moves, seen = [], set()
+    for move in scored:
+        if move[1] not in seen:
+            moves.append(move)
+            seen.add(move[1])
+        if len(moves) == max_moves:
+            break
+    return moves
+
+
+def _run_round(pool, multi, assign, previous, candidates):
+    jobs = []
+    for m in range(len(multi.mills)):
+        items = [int(i) for i in np.flatnonzero(assign == m) if int(i) != multi.mills[m].current]
+        jobs.append({"mill": m, "items": items, "candidates": candidates[m] if candidates else [],
+                     "previous": previous[m]["sequence"] if previous else None})
+    return list(pool.map(mill_round, jobs))
+
+
+def solve(multi, rounds=DEFAULT_ROUNDS, candidates=MOVE_CANDIDATES, max_moves=MAX_MOVES, workers=None,
+          callback=None):
+    """
+    Joint assignment + sequencing. Returns the assignment, per-mill results,
+    the total, the total of the initial assignment sequenced on its own, and
+    the total after each accepted round.
+    """
+    start = time.perf_counter()
+    assign = initial_assignment(multi)
+    workers = workers or len(multi.mills)
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(multi,)) as pool:
+        state = _run_round(pool, multi, assign, None, None)
+        state = _run_round(pool, multi, assign, state, pick_candidates(multi, assign, state, candidates))
+        total = total_cost(multi, assign, state)
+        sequential = total
+        history = [total]
+        moved = 0
+        for _ in range(rounds):
+            moves = propose_moves(multi, assign, state, max_moves)
+            if not moves:
+                break
+            trial_assign = assign.copy()
+            for _, item, _, b in moves:
+                trial_assign[item] = b
+            trial = _run_round(pool, multi, trial_assign, state,
+                               pick_candidates(multi, trial_assign, state, candidates))
+            trial_total = total_cost(multi, trial_assign, trial)
+            if trial_total < total - 1e-9:
+                assign, state, total = trial_assign, trial, trial_total
+                moved += len(moves)
+                history.append(total)
+            else:
+                max_moves //= 2
+                if not max_moves:
+                    break
+            if callback is not None and callback(total, assign, state) is False:
+                break
+    return {
+        "assignment": assign,
+        "mills": state,
+        "total": total,
+        "sequential": sequential,
+        "history": history,
+        "moved": moved,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Joint mill assignment and sequencing")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark' to split across mills")
+    parser.add_argument("--mills", nargs="+", default=list(MILLS))
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--candidates", type=int, default=MOVE_CANDIDATES, help="Items priced per mill per round")
+    parser.add_argument("--max-moves", type=int, default=MAX_MOVES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    multi = MultiMillInstance.split(inst, args.mills, args.seed)
+    print(f"{multi}: {multi.compatible.sum(axis=0).mean():.2f} compatible mills per item, "
+          f"capacity {multi.mills[0].capacity_hours:,.0f} h each")
+    result = solve(multi, args.rounds, args.candidates, args.max_moves,
+                   callback=lambda total, *_: print(f"  total {total:>18,.2f}"))
+    for m, r in enumerate(result["mills"]):
+        mill = multi.mills[m]
+        print(f"  {mill.name:<12} {len(r['sequence']) - 1:>5} items  {r['hours']:>9,.0f} / "
+              f"{mill.capacity_hours:,.0f} h  cost {r['cost']:>16,.2f}")
+    gain = 100 * (result["sequential"] - result["total"]) / result["sequential"] if result["sequential"] else 0.0
+    print(f"Assign then sequence {result['sequential']:,.2f} -> joint {result['total']:,.2f} "
+          f"({gain:.1f}% lower, {result['moved']} items moved) in {result['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
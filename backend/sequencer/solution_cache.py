@@ -0,0 +1,296 @@
+"""
+On-disk cache of sequencing solutions, keyed by the instance data.
+
+Planners re-run the sequencer on the same program after cosmetic edits (SKU
+names, row order), and every run pays the full GA again. The key here is a
+hash of the canonical form of what the objective depends on (WorkParams
+produccionTn, ventaDiaria, diasStock, diasFabricacion, idCambios,
+matrizCambioMedida, pesoVenta and the two unit costs):
+
+  - families are renumbered in order of their matrix row, keeping only the
+    ones some item uses (unused rows of the matrix change nothing);
+  - item 0 stays first (it is on the mill), the rest are sorted by their data;
+  - floats are rounded to ROUND_DECIMALS so re-exported numbers still match.
+
+A hit returns the cached sequence, mapped back to the request's item order,
+without any search. On a miss, the entry sharing the most items (same data
+and same changeovers to and from the item's family) is used as a warm start
+when it shares at least NEAR_MIN_OVERLAP of them: its order of the shared
+items, with new items inserted where they cost least, is injected into the GA.
+
+One JSON file per entry; a hit touches it, and the least recently used files
+are evicted past MAX_ENTRIES or MAX_BYTES.
+
+Usage:
+    python solution_cache.py --instance benchmark --seconds 5
+    python solution_cache.py --list
+    python solution_cache.py --clear
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+from evaluation import Evaluator
+from ga import GeneticAlgorithm
+from incremental import insert_items
+from instance import Instance
+from metaheuristics import BudgetExhausted, BudgetedEvaluator
+
+DEFAULT_CACHE = "solution_cache"
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 2**20
+ROUND_DECIMALS = 6
+NEAR_MIN_OVERLAP = 0.8  # share of the request's items an entry must contain to seed it
+DEFAULT_SECONDS = 5.0
+
+
+def _rounded(arr):
+    return np.round(np.asarray(arr, dtype=np.float64), ROUND_DECIMALS) + 0.0  # + 0.0 folds -0.0
+
+
+class CanonicalInstance:
+    """
+    Canonical form of an instance. `order[k]` is the request's index of
+    canonical item k; `key` hashes everything the objective depends on and
+    `item_keys` each item's own row, for finding near-identical entries.
+    """
+
+    def __init__(self, instance):
+        fam = instance.family
+        used = np.unique(fam[fam >= 0])
+        relabel = np.full(len(instance.setup_hours) + 1, -1, dtype=np.int64)
+        relabel[used] = np.arange(len(used))
+        family = relabel[fam]  # -1 stays -1 (last entry)
+        matrix = _rounded(instance.setup_hours[np.ix_(used, used)]) if len(used) else np.zeros((0, 0))
+        rows = np.column_stack([
+            family, _rounded(instance.stock_days), _rounded(instance.daily_sales),
+            _rounded(instance.production_days), _rounded(instance.quantity),
+        ])
+        # Item 0 first, the rest by (family, stock, sales, production, quantity).
+        rest = np.lexsort(rows[1:].T[::-1]) + 1
+        self.order = np.concatenate([[0], rest]).astype(np.int64)
+        self.rows = rows[self.order]
+        self.matrix = matrix
+
+        # Item keys must not move when another item's family comes or goes, so
+        # they use the item's own data and its family's full matrix row and
+        # column, not the renumbering over the families in use.
+        full = _rounded(instance.setup_hours)
+        own = rows[:, 1:]
+        item_keys = []
+        for i in self.order:
+            h = hashlib.sha1(own[i].tobytes())
+            f = fam[i]
+            h.update(np.concatenate([full[f], full[:, f]]).tobytes() if f >= 0 else b"unknown family")
+            item_keys.append(h.hexdigest()[:16])
+        self.item_keys = item_keys
+
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(self.rows).tobytes())
+        h.update(np.ascontiguousarray(matrix).tobytes())
+        h.update(json.dumps(instance.params, sort_keys=True).encode())
+        self.key = h.hexdigest()[:32]
+
+    def to_request(self, canonical_seq):
+        """Canonical item indices -> the request's item indices."""
+        return self.order[np.asarray(canonical_seq)].astype(np.int32)
+
+    def to_canonical(self, seq):
+        inverse = np.empty_like(self.order)
+        inverse[self.order] = np.arange(len(self.order))
+        return inverse[np.asarray(seq)]
+
+
+class SolutionCache:
+    """Directory of <key>.json entries with LRU eviction by file mtime."""
+
+    def __init__(self, path=DEFAULT_CACHE, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def _files(self):
+        return glob.glob(os.path.join(self.path, "*.json"))
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # evicted meanwhile or half-written by a crashed run
+
+    def get(self, canonical):
+        """Cached entry for exactly this instance, or None; a hit counts as a use."""
+        path = self._file(canonical.key)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def nearest(self, canonical, min_overlap=NEAR_MIN_OVERLAP):
+        """(entry, overlap) of the entry sharing the most of the request's items, if above min_overlap."""
+        wanted = set(canonical.item_keys)
+        best, best_overlap = None, min_overlap
+        for path in self._files():
+            entry = self._read(path)
+            if entry is None or entry["key"] == canonical.key:
+                continue
+            overlap = len(wanted.intersection(entry["item_keys"])) / len(wanted)
+            if overlap >= best_overlap:
+                best, best_overlap = entry, overlap
+        return (best, best_overlap) if best is not None else (None, 0.0)
+
+    def put(self, canonical, seq, cost, **info):
+        """Store a sequence given in request item order; keeps the better of an existing entry."""
+        old = self._read(self._file(canonical.key))
+        if old is not None and old["cost"] <= cost:
+            return old
+        entry = {
+            "key": canonical.key,
+            "sequence": canonical.to_canonical(seq).tolist(),
+            "cost": float(cost),
+            "n": len(seq),
+            "item_keys": canonical.item_keys,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **info,
+        }
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(canonical.key)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        self.evict()
+        return entry
+
+    def evict(self):
+        """Drop least recently used entries past the entry and byte caps; returns how many."""
+        files = []
+        for path in self._files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort(reverse=True)
+        total, removed = 0, 0
+        for count, (_, size, path) in enumerate(files, 1):
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def entries(self):
+        """All entries, most recently used first (without item keys)."""
+        out = []
+        for path in sorted(self._files(), key=os.path.getmtime, reverse=True):
+            entry = self._read(path)
+            if entry is not None:
+                entry.pop("item_keys", None)
+                entry["bytes"] = os.path.getsize(path)
+                out.append(entry)
+        return out
+
+    def clear(self):
+        for path in self._files():
+            os.remove(path)
+
+
+def warm_start(evaluator, canonical, entry):
+    """
+    Request-order sequence from a near entry: the shared items in the cached
+    order, then the new items by cheapest insertion (incremental.py). Item 0
+    of the request stays first.
+    """
+    by_key = {}
+    for k, key in enumerate(canonical.item_keys):
+        by_key.setdefault(key, []).append(int(canonical.order[k]))
+    seq = [0]
+    for k in entry["sequence"]:
+        items = by_key.get(entry["item_keys"][k])
+        if items:
+            item = items.pop(0)
+            if item:
+                seq.append(item)
+    new = sorted(set(range(1, evaluator.n)) - set(seq))
+    return insert_items(evaluator, seq, new)[0]
+
+
+def solve(instance, cache=None, max_seconds=DEFAULT_SECONDS, max_evaluations=None, seed=0):
+    """
+    Cached GA: returns {"sequence", "cost", "source"} where source is "hit",
+    "warm" (seeded from a near entry) or "cold", and stores the result.
+    """
+    cache = cache or SolutionCache()
+    start = time.perf_counter()
+    canonical = CanonicalInstance(instance)
+    entry = cache.get(canonical)
+    if entry is not None:
+        seq = canonical.to_request(entry["sequence"])
+        return {"sequence": seq, "cost": Evaluator(instance).cost(seq), "source": "hit",
+                "evaluations": 1, "seconds": time.perf_counter() - start}
+
+    near, overlap = cache.nearest(canonical)
+    ev = BudgetedEvaluator(instance, max_seconds, max_evaluations)
+    try:
+        ga = GeneticAlgorithm(instance, seed=seed, evaluator=ev)
+        if near is not None:
+            ga.inject(warm_start(ev, canonical, near))
+        while True:
+            ga.step()
+    except BudgetExhausted:
+        pass
+    if ev.best is None:
+        raise RuntimeError("budget too small to score a single sequence")
+    cache.put(canonical, ev.best, ev.best_cost, evaluations=ev.evaluations,
+              seconds=ev.elapsed(), warm_from=near["key"] if near else None)
+    return {"sequence": ev.best, "cost": ev.best_cost, "source": "warm" if near else "cold",
+            "overlap": overlap, "evaluations": ev.evaluations, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequencing with an on-disk solution cache")
+    parser.add_argument("--instance", default="benchmark", help="Instance .npz or 'benchmark'")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Cache directory")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="GA budget on a miss")
+    parser.add_argument("--max-entries", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--max-mb", type=float, default=MAX_BYTES / 2**20)
+    parser.add_argument("--list", action="store_true", help="List the cached entries")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+    args = parser.parse_args()
+
+    cache = SolutionCache(args.cache, args.max_entries, int(args.max_mb * 2**20))
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.cache}")
+        return
+    if args.list:
+        for e in cache.entries():
+            print(f"{e['key']}  n={e['n']:>5}  cost {e['cost']:>16,.2f}  {e['bytes'] / 1024:>7.1f} KB  {e['created']}")
+        return
+
+    inst = Instance.from_benchmark_json() if args.instance == "benchmark" else Instance.load(args.instance)
+    result = solve(inst, cache, args.seconds)
+    note = f" ({100 * result['overlap']:.0f}% of items shared)" if result["source"] == "warm" else ""
+    print(f"{inst}: {result['source']}{note}, cost {result['cost']:,.2f} in {result['seconds']:.3f}s "
+          f"({result['evaluations']:,} evaluations)")
+
+
+if __name__ == "__main__":
+    main()